@@ -0,0 +1,300 @@
+"""
+Bitboard module for fast card set operations.
+
+A set of cards is represented as a 52-bit integer where bit ``i`` is set
+when the card with ``Card.cardId() == i`` belongs to the set. Card ids are
+``4*(value - 2) + type.id``, so the cards of one type are every 4th bit and
+a higher bit always means a higher value.
+
+Filtering by type, follow-suit checks and array conversion become mask
+operations instead of Python loops over Card objects. Card objects remain
+available through maskToCards for display and compatibility.
+
+For batched inference, legal moves are also available as 52-element
+boolean action masks (legalActionMask, and legalActionMasks for many
+players or tables at once), so a playing network can score all 52 cards
+in one pass and ignore the illegal ones (bestLegalActions).
+"""
+
+import numpy as np
+
+from Cards.Card import CARDS, CardType
+
+
+FULL_MASK = (1 << 52) - 1
+
+# Type id of every card id
+CARD_TYPE_IDS = np.arange(52) % 4
+
+# TYPE_MASKS[t] has a bit set for every card of type id t
+TYPE_MASKS = tuple(
+    sum(1 << (4 * v + t) for v in range(13)) for t in range(4)
+)
+
+# Type ids in hand order: by decreasing type symbol, then by decreasing
+# value, the order of Card.__lt__ that hands were sorted in before bidding
+HAND_TYPE_ORDER = tuple(t.id for t in sorted(CardType, key=lambda t: t.value, reverse=True))
+
+# HAND_ORDER[k] is the card id at rank k of the hand order
+HAND_ORDER = np.array([4 * v + t for t in HAND_TYPE_ORDER for v in range(12, -1, -1)])
+
+
+def cardFromId(cid):
+    """
+    Get the Card corresponding to a card id.
+
+    Args:
+        cid (int): Card id (0-51)
+
+    Returns:
+        Card: The card with this id
+    """
+    return CARDS[cid]
+
+
+def cardsToMask(cards):
+    """
+    Convert an iterable of Card objects to a bitboard.
+
+    Args:
+        cards (iterable): Card objects
+
+    Returns:
+        int: 52-bit mask with one bit per card
+    """
+    mask = 0
+    for c in cards:
+        mask |= 1 << c.cardId()
+    return mask
+
+
+def maskToIds(mask):
+    """
+    List the card ids present in a bitboard, highest first.
+
+    Args:
+        mask (int): 52-bit card mask
+
+    Returns:
+        list: Card ids in decreasing order
+    """
+    ids = []
+    while mask:
+        b = mask.bit_length() - 1
+        ids.append(b)
+        mask ^= 1 << b
+    return ids
+
+
+def maskToCards(mask):
+    """
+    List the Card objects present in a bitboard, highest first.
+
+    Cards are ordered by decreasing cardId, i.e. by decreasing value and
+    then by decreasing type id.
+
+    Args:
+        mask (int): 52-bit card mask
+
+    Returns:
+        list: Card objects in decreasing order
+    """
+    return [CARDS[i] for i in maskToIds(mask)]
+
+
+def handIds(mask):
+    """
+    List the card ids present in a bitboard, in hand order.
+
+    The hand order (HAND_ORDER) is the order of the hand features of the
+    playing model: cards are grouped by type, by decreasing type symbol,
+    and by decreasing value within a type, as sorted(cards, reverse=True).
+
+    Args:
+        mask (int): 52-bit card mask
+
+    Returns:
+        list: Card ids in hand order
+    """
+    ids = []
+    for t in HAND_TYPE_ORDER:
+        ids += maskToIds(mask & TYPE_MASKS[t])
+    return ids
+
+
+def maskToHand(mask):
+    """
+    List the Card objects present in a bitboard, in hand order.
+
+    Args:
+        mask (int): 52-bit card mask
+
+    Returns:
+        list: Card objects, see handIds
+    """
+    return [CARDS[i] for i in handIds(mask)]
+
+
+def maskToArray(mask, val=1):
+    """
+    Convert a bitboard to a 52-element numpy array.
+
+    Args:
+        mask (int): 52-bit card mask
+        val (int or float): Value to set for cards in the mask (default: 1)
+
+    Returns:
+        np.ndarray: 52-element array indexed by cardId
+    """
+    return _maskBits(mask).astype(float) * val
+
+
+def _maskBits(mask):
+    """52-element uint8 array of the bits of a mask."""
+    return np.unpackbits(
+        np.frombuffer(mask.to_bytes(7, 'little'), dtype=np.uint8),
+        bitorder='little'
+    )[:52]
+
+
+def masksToArray(masks):
+    """
+    Convert many bitboards to boolean card arrays.
+
+    Args:
+        masks (array-like): Integer masks of any shape
+
+    Returns:
+        np.ndarray: (..., 52) boolean arrays indexed by cardId
+    """
+    masks = np.asarray(masks, dtype='<u8')
+    bits = np.unpackbits(masks[..., None].view(np.uint8), axis=-1, bitorder='little')
+    return bits[..., :52].astype(bool)
+
+
+def typeMask(mask, cType):
+    """
+    Keep only the cards of a given type.
+
+    Args:
+        mask (int): 52-bit card mask
+        cType (CardType): The card type to keep
+
+    Returns:
+        int: Mask of the cards of type cType
+    """
+    return mask & TYPE_MASKS[cType.id]
+
+
+def trickLead(trick):
+    """
+    Lead type id of the cards already played in a turn.
+
+    Args:
+        trick (list): Card objects or card ids, in playing order
+
+    Returns:
+        int: Type id of the first card, -1 if no card was played
+    """
+    if len(trick) == 0:
+        return -1
+    first = trick[0]
+    return int(first) % 4 if isinstance(first, (int, np.integer)) else first.type.id
+
+
+def legalMask(handMask, leadType=None):
+    """
+    Compute the cards that can legally be played from a hand.
+
+    A player must follow the lead type if they hold any card of it,
+    otherwise any card of the hand can be played.
+
+    Args:
+        handMask (int): Mask of the cards in hand
+        leadType (CardType or int, optional): Type of the first card of the
+                                              turn, or its id (-1: none)
+
+    Returns:
+        int: Mask of the legal cards
+    """
+    if leadType is not None:
+        lead = leadType if isinstance(leadType, (int, np.integer)) else leadType.id
+        if lead >= 0:
+            follow = handMask & TYPE_MASKS[lead]
+            if follow:
+                return follow
+    return handMask
+
+
+def legalActionMask(handMask, trick=()):
+    """
+    Legal cards of a hand as a 52-element action mask.
+
+    Args:
+        handMask (int): Mask of the cards in hand
+        trick (list): Cards (Card objects or ids) already played in the turn
+
+    Returns:
+        np.ndarray: 52-element boolean array indexed by cardId
+    """
+    return _maskBits(legalMask(handMask, trickLead(trick))).astype(bool)
+
+
+def legalActionMasks(hands, tricks=None, lead=None):
+    """
+    Legal cards of many hands at once, e.g. (tables, players, 52).
+
+    Args:
+        hands (array-like): (..., 52) boolean hands, see masksToArray
+        tricks (array-like, optional): (..., k) card ids already played in
+                                       each turn, -1 for none
+        lead (array-like, optional): (...) lead type ids, -1 when leading;
+                                     used instead of tricks
+
+    Returns:
+        np.ndarray: (..., 52) boolean legal action masks
+    """
+    hands = np.asarray(hands, dtype=bool)
+    if lead is None:
+        if tricks is None:
+            return hands.copy()
+        tricks = np.asarray(tricks)
+        if tricks.shape[-1] == 0:
+            return hands.copy()
+        first = tricks[..., 0]
+        lead = np.where(first >= 0, first % 4, -1)
+    follow = hands & (CARD_TYPE_IDS == np.asarray(lead)[..., None])
+    return np.where(follow.any(axis=-1, keepdims=True), follow, hands)
+
+
+def bestLegalActions(scores, legal):
+    """
+    Choose the best scored legal card of every row.
+
+    Args:
+        scores (array-like): (..., 52) action scores of a playing network
+        legal (array-like): (..., 52) legal action masks
+
+    Returns:
+        np.ndarray: (...) card ids
+
+    Raises:
+        ValueError: If a row has no legal card
+    """
+    legal = np.asarray(legal, dtype=bool)
+    if not legal.any(axis=-1).all():
+        raise ValueError('no legal card in a row of the action mask')
+    return np.where(legal, scores, -np.inf).argmax(axis=-1)
+
+
+def popcount(mask):
+    """
+    Count the cards in a bitboard.
+
+    Args:
+        mask (int): 52-bit card mask
+
+    Returns:
+        int: Number of set bits
+    """
+    return bin(mask).count('1')
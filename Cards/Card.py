@@ -6,7 +6,7 @@ This module defines the Card class and related enumerations for card types and v
 
 from enum import Enum
 
-import numpy as np
+from Cards.Encoding import CARD_FEATURES
 
 
 class CardType(Enum):
@@ -53,21 +53,56 @@ class Card:
     """
     Represents a playing card with a value and type (suit).
     
+    The 52 cards are immutable flyweights: Card(value, type) and
+    Card.from_id(cardId) always return the same shared instance, whose id,
+    hash, ordering key and matrix are computed once.
+    
     Attributes:
         value (CardValue): The value of the card (2-14, where 14 is Ace)
         type (CardType): The type/suit of the card (CLUB, DIAMOND, SPADE, HEART)
     """
-    
-    def __init__(self, value, type):
+    __slots__ = ('value', 'type', '_id', '_hash', '_key', '_matrix')
+
+    _by_id = [None] * 52
+
+    def __new__(cls, value, type):
         """
-        Initialize a Card with a value and type.
+        Get the shared Card with a value and type.
         
         Args:
             value (CardValue): The value of the card
             type (CardType): The type/suit of the card
         """
-        self.value = value
-        self.type = type
+        cid = 4*(value.value - 2) + type.id
+        card = cls._by_id[cid]
+        if card is None:
+            card = object.__new__(cls)
+            for name, attr in (('value', value), ('type', type), ('_id', cid),
+                               ('_hash', hash(cid)), ('_key', (type.value, value.value)),
+                               ('_matrix', CARD_FEATURES[cid])):
+                object.__setattr__(card, name, attr)
+            cls._by_id[cid] = card
+        return card
+
+    @classmethod
+    def from_id(cls, cid):
+        """
+        Get the shared Card with a given cardId.
+        
+        Args:
+            cid (int): Card id (0-51)
+        
+        Returns:
+            Card: The card with this id
+        """
+        return cls._by_id[cid]
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Card objects are immutable')
+
+    def __reduce__(self):
+        return (Card.from_id, (self._id,))
+
     def __str__(self):
         return str(self.valueChar()) + self.type.value
         #return str(self.value)[10:] + " of " + str(self.type)[9:] + "S"
@@ -75,15 +110,13 @@ class Card:
         return str(self.valueChar()) + "-" + self.type.value
 
     def __hash__(self):
-        return hash(str(self.type) + str(self.value))
+        return self._hash
 
     def __eq__(self, other):
-        return self.value == other.value and self.type == other.type
+        return self is other
 
     def __lt__(self, other):
-        if self.type.value == other.type.value:
-            return self.value.value < other.value.value
-        return self.type.value < other.type.value
+        return self._key < other._key
 
     def valueChar(self):
         if(self.value.value <= 10):
@@ -92,7 +125,7 @@ class Card:
             return str(self.value)[str(self.value).index(".") + 1]
 
     def cardId(self):
-        return  4*(self.value.value - 2) + self.type.id
+        return self._id
 
     def card_to_matrix(self):
         """
@@ -104,11 +137,10 @@ class Card:
         
         Returns:
             np.ndarray: 4-element array with normalized card value at type position
-                       Values range from 2/14 (≈0.14) to 14/14 (1.0)
+                       Values range from 2/14 (≈0.14) to 14/14 (1.0).
+                       The array is shared and read-only; copy it to modify it.
         """
-        card_matrix = np.zeros(4)
-        card_matrix[self.type.id] = self.value.value/14
-        return card_matrix
+        return self._matrix
 
     def largerThan(self, nextCard, respectype=True):
         """
@@ -133,3 +165,9 @@ class Card:
         else:
             return self.value.value > nextCard.value.value
 
+
+# Create the 52 shared cards, CARDS[i] is the card with cardId() == i
+for _value in CardValue:
+    for _type in CardType:
+        Card(_value, _type)
+CARDS = tuple(Card._by_id)
@@ -0,0 +1,179 @@
+"""
+Seeded deals generated in batches.
+
+A deal is a permutation of the 52 card ids (see Card.cardId) in dealing
+order: seat i receives deal[13*i:13*(i+1)] and, as with
+StandarDeck.cards[51], the tarneeb is the type of the last card,
+deal[51] % 4.
+
+Every deal is derived from a 64-bit seed alone: each card gets a
+splitmix64 hash of the seed and its id, and the deal is the order of the
+hashes. Any deal can therefore be reproduced from its seed, and many deals
+are generated at once with a few array operations (over a million per
+second on one core).
+
+Usage:
+    dealer = Dealer(seed=1)
+    seeds, deals = dealer.deals(100000)
+    tarneebs = dealTarneeb(deals)
+    assert (dealsFromSeeds(seeds[:10]) == deals[:10]).all()
+"""
+
+import random
+
+import numpy as np
+
+from Cards.Card import CARDS
+
+
+_GOLDEN = np.uint64(0x9e3779b97f4a7c15)
+_MIX1 = np.uint64(0xbf58476d1ce4e5b9)
+_MIX2 = np.uint64(0x94d049bb133111eb)
+_SHIFTS = (np.uint64(30), np.uint64(27), np.uint64(31))
+_MASK64 = 2 ** 64 - 1
+
+# Hash offset of every card id
+_CARD_OFFSETS = _GOLDEN * np.arange(1, 53, dtype=np.uint64)
+
+DEAL_CHUNK = 4096  # Deals hashed and sorted at once, sized for the CPU cache
+
+
+def _mixInt(z):
+    """splitmix64 finalizer of a Python int, as _mix."""
+    z = ((z ^ (z >> 30)) * 0xbf58476d1ce4e5b9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94d049bb133111eb) & _MASK64
+    return z ^ (z >> 31)
+
+
+def _mix(z):
+    """splitmix64 finalizer, in place on a uint64 array."""
+    tmp = np.empty_like(z)
+    with np.errstate(over='ignore'):
+        np.right_shift(z, _SHIFTS[0], out=tmp)
+        z ^= tmp
+        z *= _MIX1
+        np.right_shift(z, _SHIFTS[1], out=tmp)
+        z ^= tmp
+        z *= _MIX2
+        np.right_shift(z, _SHIFTS[2], out=tmp)
+        z ^= tmp
+    return z
+
+
+def dealsFromSeeds(seeds):
+    """
+    Generate the deals of many seeds.
+
+    Args:
+        seeds (array-like): (n,) 64-bit deal seeds
+
+    Returns:
+        np.ndarray: (n, 52) int8 card id permutations
+    """
+    seeds = np.asarray(seeds, dtype=np.uint64).reshape(-1)
+    deals = np.empty((len(seeds), 52), dtype=np.int8)
+    for start in range(0, len(seeds), DEAL_CHUNK):
+        with np.errstate(over='ignore'):
+            keys = _mix(seeds[start:start + DEAL_CHUNK] * _GOLDEN)[:, None] + _CARD_OFFSETS
+        deals[start:start + DEAL_CHUNK] = np.argsort(_mix(keys), axis=1)
+    return deals
+
+
+def dealFromSeed(seed):
+    """
+    Generate the deal of one seed.
+
+    Args:
+        seed (int): 64-bit deal seed
+
+    Returns:
+        np.ndarray: (52,) int8 card id permutation
+    """
+    # Same keys as dealsFromSeeds, without its batch overhead
+    with np.errstate(over='ignore'):
+        keys = _CARD_OFFSETS + np.uint64(_mixInt((int(seed) * 0x9e3779b97f4a7c15) & _MASK64))
+    return np.argsort(_mix(keys)).astype(np.int8)
+
+
+def dealTarneeb(deals):
+    """
+    Tarneeb type id of deals, the type of their last card.
+
+    Args:
+        deals (np.ndarray): (..., 52) card id permutations
+
+    Returns:
+        np.ndarray: (...) tarneeb type ids
+    """
+    return deals[..., 51] % 4
+
+
+def dealHands(deal):
+    """
+    Hands of a deal as Card objects.
+
+    Args:
+        deal (array-like): (52,) card id permutation
+
+    Returns:
+        list: 4 lists of 13 Card objects, one per seat
+    """
+    deal = np.asarray(deal).tolist()
+    return [[CARDS[c] for c in deal[13 * i:13 * (i + 1)]] for i in range(4)]
+
+
+def randomSeed():
+    """A deal seed drawn from the random module, so random.seed applies."""
+    return random.getrandbits(64)
+
+
+class Dealer:
+    """
+    Stream of seeded deals.
+
+    The n-th deal seed of a dealer is a splitmix64 output of its seed, so
+    dealers with different seeds give independent deals.
+
+    Attributes:
+        seed (int): Seed of the stream
+        count (int): Deals generated so far
+    """
+
+    def __init__(self, seed=None):
+        """
+        Initialize a dealer.
+
+        Args:
+            seed (int, optional): Seed of the stream (default: randomSeed())
+        """
+        self.seed = randomSeed() if seed is None else seed
+        self.count = 0
+
+    def seeds(self, n):
+        """
+        Next deal seeds of the stream.
+
+        Args:
+            n (int): Number of seeds
+
+        Returns:
+            np.ndarray: (n,) uint64 deal seeds
+        """
+        with np.errstate(over='ignore'):
+            index = np.arange(self.count + 1, self.count + n + 1, dtype=np.uint64)
+            seeds = _mix(np.uint64(self.seed & _MASK64) + _GOLDEN * index)
+        self.count += n
+        return seeds
+
+    def deals(self, n):
+        """
+        Next deals of the stream.
+
+        Args:
+            n (int): Number of deals
+
+        Returns:
+            tuple: ((n,) uint64 seeds, (n, 52) int8 deals)
+        """
+        seeds = self.seeds(n)
+        return seeds, dealsFromSeeds(seeds)
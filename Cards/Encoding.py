@@ -0,0 +1,139 @@
+"""
+Precomputed encoding tables for neural network inputs.
+
+Every network input is built from two tables indexed by card id
+(see Card.cardId):
+- CARD_FEATURES (52, 4): the Card.card_to_matrix row of each card, the
+  normalized value (value/14) at the position of the card's type
+- CARD_IDENTITY (52, 52): one-hot row of each card, used for 52-element
+  card sets such as cardstoArray and Player.handToArray
+
+The tarneeb is encoded as a one-hot row of TYPE_IDENTITY (typeOneHot).
+
+Both tables have an extra zero row stored after the last card, so an id of
+-1 encodes "no card". Encoders take arrays of card ids of any batch shape
+and are single fancy-index operations that can write into a preallocated
+buffer.
+"""
+
+import numpy as np
+
+
+_IDS = np.arange(52)
+
+# Tables with a trailing zero row for id -1 (no card)
+_FEATURES = np.zeros((53, 4))
+_FEATURES[_IDS, _IDS % 4] = (_IDS // 4 + 2) / 14
+_FEATURES.setflags(write=False)
+_IDENTITY = np.eye(53, 52)
+_IDENTITY.setflags(write=False)
+
+CARD_FEATURES = _FEATURES[:52]
+CARD_IDENTITY = _IDENTITY[:52]
+
+# One-hot row of each type id, e.g. the tarneeb input of the bidding model
+TYPE_IDENTITY = np.eye(4)
+TYPE_IDENTITY.setflags(write=False)
+
+HAND_SIZE = 13  # Cards encoded per hand
+TRICK_SIZE = 3  # Previously played cards encoded per turn
+CONTEXT_SIZE = 4  # Player context values before the hand
+
+
+def typeOneHot(cType):
+    """
+    Encode a card type, e.g. the tarneeb, as a one-hot array.
+
+    Args:
+        cType (CardType or int): Card type or type id
+
+    Returns:
+        np.ndarray: 4-element one-hot array
+    """
+    return TYPE_IDENTITY[int(cType)].copy()
+
+
+def padIds(ids, length, right=False):
+    """
+    Pad a list of card ids with -1 (no card) to a fixed length.
+
+    Args:
+        ids (list): Card ids
+        length (int): Length of the result
+        right (bool): Align ids to the end instead of the start
+
+    Returns:
+        np.ndarray: (length,) int array
+    """
+    ret = np.full(length, -1, dtype=np.int64)
+    if len(ids):
+        if right:
+            ret[length - len(ids):] = ids
+        else:
+            ret[:len(ids)] = ids
+    return ret
+
+
+def cardFeatures(ids, out=None):
+    """
+    Encode card ids as concatenated card_to_matrix rows.
+
+    Args:
+        ids (array-like): (..., k) card ids, -1 for no card
+        out (np.ndarray, optional): (..., k * 4) buffer to write into
+
+    Returns:
+        np.ndarray: (..., k * 4) features
+    """
+    ids = np.asarray(ids)
+    if out is None:
+        return _FEATURES[ids].reshape(ids.shape[:-1] + (-1,))
+    # Setting shape never copies, so writes always reach out
+    view = out.view()
+    view.shape = ids.shape + (4,)
+    np.take(_FEATURES, ids, axis=0, out=view)
+    return out
+
+
+def cardSetArray(ids, val=1, out=None):
+    """
+    Encode card ids as a 52-element set array, as cardstoArray does.
+
+    Args:
+        ids (array-like): (..., k) card ids, -1 for no card
+        val (int or float): Value to set for the cards (default: 1)
+        out (np.ndarray, optional): (..., 52) buffer to write into
+
+    Returns:
+        np.ndarray: (..., 52) array indexed by card id
+    """
+    ret = np.sum(_IDENTITY[np.asarray(ids)], axis=-2, out=out)
+    if val != 1:
+        ret *= val
+    return ret
+
+
+def playingInput(context, handIds, trickIds, out=None):
+    """
+    Build 68-feature playing model rows.
+
+    Layout: 4 context values, 13 hand cards * 4 values, 3 played cards *
+    4 values, as in TarneebPlayer.playCard and Turn.turn_to_matrices.
+
+    Args:
+        context (array-like): (..., 4) player context values
+        handIds (array-like): (..., 13) hand card ids, -1 padded
+        trickIds (array-like): (..., 3) played card ids, -1 padded
+        out (np.ndarray, optional): (..., 68) buffer to write into
+
+    Returns:
+        np.ndarray: (..., 68) input rows
+    """
+    context = np.asarray(context)
+    if out is None:
+        out = np.empty(context.shape[:-1] + (68,))
+    hand_end = CONTEXT_SIZE + 4 * HAND_SIZE
+    out[..., :CONTEXT_SIZE] = context
+    cardFeatures(handIds, out[..., CONTEXT_SIZE:hand_end])
+    cardFeatures(trickIds, out[..., hand_end:])
+    return out
@@ -13,10 +13,18 @@ import logging
 from Cards.Card import CardValue
 from Cards.Card import CardType
 from Cards.Card import Card
+from Cards.Card import CARDS
+from Cards.Bitboard import maskToArray
+from Cards.Dealer import dealFromSeed
+from Cards.Encoding import cardSetArray
 import random
 import numpy as np
 
 
+# The shared cards in the order of a new deck
+_NEW_DECK = [Card(i, j) for i in CardValue for j in CardType]
+
+
 class StandarDeck:
     """
     Represents a standard 52-card deck.
@@ -26,21 +34,25 @@ class StandarDeck:
     
     Attributes:
         cards (list): List of Card objects in the deck
+        seed (int): Deal seed of the card order, None if not seeded
     """
     
-    def __init__(self, shuffled=False):
+    def __init__(self, shuffled=False, seed=None):
         """
         Initialize a standard 52-card deck.
         
         Args:
             shuffled (bool): If True, shuffle the deck after creation (default: False)
+            seed (int, optional): Order the cards as the deal of this seed
+                                  (see Cards.Dealer), instead of shuffling
         """
-        self.cards = []
-        for i in CardValue:
-            for j in CardType:
-                self.cards.append(Card(i, j))
-        if shuffled:
-            random.shuffle(self.cards)
+        self.seed = seed
+        if seed is not None:
+            self.cards = [CARDS[c] for c in dealFromSeed(seed).tolist()]
+        else:
+            self.cards = list(_NEW_DECK)
+            if shuffled:
+                random.shuffle(self.cards)
         logging.info('New standard deck created with %d cards', len(self.cards))
 
     def distripute(self, n):
@@ -56,9 +68,8 @@ class StandarDeck:
         Returns:
             list: List of n Card objects removed from the deck
         """
-        ret = []
-        for i in range(n):
-            ret.append(self.cards.pop(0))
+        ret = self.cards[:n]
+        del self.cards[:n]
         return ret
 
     def winner(self, playedCards, tarneeb=None):
@@ -102,13 +113,12 @@ def cardstoArray(cards, val=1):
     list are set to val, others are 0.
     
     Args:
-        cards (list): List of Card objects
+        cards (list or int): List of Card objects or a card mask
         val (int or float): Value to set for cards in the list (default: 1)
     
     Returns:
         np.ndarray: 52-element array representing the cards
     """
-    ret = np.zeros(52)
-    for c in cards:
-        ret[c.cardId()] = val
-    return ret
\ No newline at end of file
+    if isinstance(cards, int):
+        return maskToArray(cards, val)
+    return cardSetArray(np.array([c.cardId() for c in cards], dtype=np.int64), val)
\ No newline at end of file
@@ -6,5 +6,7 @@ This package contains the Card and Deck implementations.
 
 from Cards.Card import Card, CardType, CardValue
 from Cards.StandarDeck import StandarDeck, cardstoArray
+from Cards.Bitboard import cardsToMask, maskToCards, maskToHand, legalMask
 
-__all__ = ['Card', 'CardType', 'CardValue', 'StandarDeck', 'cardstoArray']
+__all__ = ['Card', 'CardType', 'CardValue', 'StandarDeck', 'cardstoArray',
+           'cardsToMask', 'maskToCards', 'maskToHand', 'legalMask']
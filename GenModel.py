@@ -4,11 +4,13 @@ Neural network model generation with stochastic architecture selection.
 This module provides functions to generate neural network models with
 randomly varied architectures using normal distributions. This approach
 allows for exploring different model configurations during training.
+
+Keras is imported by the functions that build layers, not when this module
+is imported, so game code importing GenModel does not load TensorFlow.
 """
 
 import random
 import numpy as np
-import keras
 from enum import Enum
 
 
@@ -84,9 +86,9 @@ def normalActivation(val=actiFunction.RELU, minsigma=2):
     return ret
 
 
-def newHiddenLayer(Hunits=64, Hactivation="relu"):
+def newHiddenSpec(Hunits=64, Hactivation="relu", minsigma=2):
     """
-    Create a new hidden layer with stochastically varied parameters.
+    Draw the parameters of a hidden layer.
     
     The number of units is drawn from a normal distribution around Hunits,
     and the activation function may be randomly changed.
@@ -94,48 +96,130 @@ def newHiddenLayer(Hunits=64, Hactivation="relu"):
     Args:
         Hunits (int): Target number of units (default: 64)
         Hactivation (str): Default activation function (default: "relu")
+        minsigma (float): Threshold for activation variation (default: 2)
     
     Returns:
-        keras.layers.Dense: A configured dense layer
+        list: [units, activation]
     """
-    return keras.layers.Dense(
-        units=normaLawInt(Hunits, Hunits/10), 
-        activation=normalActivation(Hactivation)
-    )
+    return [max(normaLawInt(Hunits, Hunits/10), 1), normalActivation(Hactivation, minsigma)]
 
 
-def Model(layers=1, inputs=64, outputs=1):
+def newHiddenLayer(Hunits=64, Hactivation="relu"):
     """
-    Generate a sequential neural network model with stochastic architecture.
+    Create a new hidden layer with stochastically varied parameters.
     
-    The model structure is varied using normal distributions:
-    - Number of layers varies around the target
-    - Number of units per layer varies
-    - Activation functions may vary
+    Args:
+        Hunits (int): Target number of units (default: 64)
+        Hactivation (str): Default activation function (default: "relu")
+    
+    Returns:
+        keras.layers.Dense: A configured dense layer (see newHiddenSpec)
+    """
+    import keras
+    units, activation = newHiddenSpec(Hunits, Hactivation)
+    return keras.layers.Dense(units=units, activation=activation)
+
+
+def randomSpec(layers=1, inputs=64, outputs=1):
+    """
+    Draw a stochastic architecture, as Model does, without building it.
     
     Args:
         layers (int): Target number of hidden layers (default: 1)
         inputs (int): Number of input features (default: 64)
         outputs (int): Number of output units (default: 1)
     
+    Returns:
+        dict: 'inputs', 'outputs', 'hidden' ([units, activation] per hidden
+              layer), 'output_activation', 'optimizer' and 'loss'
+    """
+    layers = max(normaLawInt(layers, up=True), 1)
+    hidden = []
+    for i in range(layers):
+        linputs = max(normaLawInt(inputs, inputs/2, up=False), 1)
+        hidden.append(newHiddenSpec(linputs))
+    return {'inputs': inputs, 'outputs': outputs, 'hidden': hidden,
+            'output_activation': normalActivation('sigmoid'),
+            'optimizer': 'sgd', 'loss': 'mean_squared_error'}
+
+
+def mutateSpec(spec, minsigma=2):
+    """
+    Derive a new architecture from an existing one with the normal-law
+    operators used to draw architectures.
+    
+    - The number of hidden layers varies around the current one; new
+      layers are drawn as in randomSpec, extra layers are dropped
+    - The units of every layer vary by about 10%
+    - Each activation changes with the normalActivation probability
+    
+    Args:
+        spec (dict): Architecture from randomSpec or mutateSpec
+        minsigma (float): Threshold for activation variation (default: 2)
+    
+    Returns:
+        dict: The mutated architecture
+    """
+    inputs = spec['inputs']
+    hidden = [newHiddenSpec(units, activation, minsigma) for units, activation in spec['hidden']]
+    layers = max(normaLawInt(len(hidden), 0.5), 1)
+    while len(hidden) < layers:
+        hidden.append(newHiddenSpec(max(normaLawInt(inputs, inputs/2, up=False), 1)))
+    del hidden[layers:]
+    return dict(spec, hidden=hidden,
+                output_activation=normalActivation(spec['output_activation'], minsigma))
+
+
+def modelFromSpec(spec, cache=None):
+    """
+    Build and compile the model of an architecture.
+    
+    Args:
+        spec (dict): Architecture from randomSpec or mutateSpec
+        cache (ModelCache.ModelCache, optional): Cache of initial weights;
+            models of the same architecture then start from the same weights
+    
     Returns:
         keras.models.Sequential: A compiled neural network model
     """
+    if cache is not None:
+        return cache.model(spec, modelFromSpec)
+    import keras
     model = keras.models.Sequential()
-    layers = max(normaLawInt(layers, up=True), 1)
     
     # Input layer
-    model.add(keras.layers.Dense(units=64, activation='relu', input_dim=inputs))
+    model.add(keras.layers.Dense(units=64, activation='relu', input_dim=spec['inputs']))
     
     # Hidden layers with varied architecture
-    for i in range(layers):
-        linputs = max(normaLawInt(inputs, inputs/2, up=False), 1)
-        model.add(newHiddenLayer(linputs))
+    for units, activation in spec['hidden']:
+        model.add(keras.layers.Dense(units=units, activation=activation))
     
     # Output layer
-    model.add(keras.layers.Dense(units=outputs, activation=normalActivation('sigmoid')))
+    model.add(keras.layers.Dense(units=spec['outputs'], activation=spec['output_activation']))
     
     # Compile model
-    model.compile(optimizer='sgd', loss='mean_squared_error', metrics=['mae'])
+    model.compile(optimizer=spec.get('optimizer', 'sgd'),
+                  loss=spec.get('loss', 'mean_squared_error'), metrics=['mae'])
+    
+    return model
+
+
+def Model(layers=1, inputs=64, outputs=1, cache=None):
+    """
+    Generate a sequential neural network model with stochastic architecture.
+    
+    The model structure is varied using normal distributions:
+    - Number of layers varies around the target
+    - Number of units per layer varies
+    - Activation functions may vary
     
-    return model
\ No newline at end of file
+    Args:
+        layers (int): Target number of hidden layers (default: 1)
+        inputs (int): Number of input features (default: 64)
+        outputs (int): Number of output units (default: 1)
+        cache (ModelCache.ModelCache, optional): Cache of initial weights
+    
+    Returns:
+        keras.models.Sequential: A compiled neural network model
+    """
+    return modelFromSpec(randomSpec(layers, inputs, outputs), cache)
\ No newline at end of file
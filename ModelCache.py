@@ -0,0 +1,175 @@
+"""
+Initial weights of models cached by architecture.
+
+Building a model is cheap compared to what happens next: the playing
+model is warmed up by a fit on random data, and every process (training
+restarts, SelfPlay and Evolution workers) used to repeat it. A ModelCache
+stores the initial weights of every architecture it builds, in memory and
+in one .npz file per architecture, keyed by specSignature(spec). A later
+request for the same architecture, in this process or another one, builds
+the model and sets the cached weights instead of warming it up again.
+
+An architecture spec is a JSON-serializable dict that fully describes the
+compiled model: layer sizes, activations, optimizer and loss (see
+GenModel.randomSpec and GTarneeb.PLAYING_MODEL_SPEC). Keras graphs belong
+to one model object and cannot be shared between models or processes, so
+only what can be reused is cached: the weights.
+
+Usage:
+    model = modelCache.model(spec, GenModel.modelFromSpec)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+from constants import MODEL_CACHE_DIR
+
+
+def specSignature(spec):
+    """
+    Canonical signature of an architecture.
+
+    Specs differing only in key order have the same signature.
+
+    Args:
+        spec (dict): JSON-serializable architecture
+
+    Returns:
+        str: 16 hexadecimal digits
+    """
+    text = json.dumps(spec, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+class ModelCache:
+    """
+    Initial weights by architecture signature, in memory and on disk.
+
+    Attributes:
+        directory (str): Directory of the .npz files, None to keep the
+                         weights in memory only
+        hits (int): Models built from cached weights
+        misses (int): Models built and initialized from scratch
+    """
+
+    def __init__(self, directory=MODEL_CACHE_DIR):
+        """
+        Initialize a cache.
+
+        Args:
+            directory (str, optional): Directory of the .npz files (default:
+                                       constants.MODEL_CACHE_DIR)
+        """
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._weights = {}
+
+    def path(self, signature):
+        """File holding the weights of a signature."""
+        return os.path.join(self.directory, signature + '.npz')
+
+    def load(self, signature):
+        """
+        Cached weights of an architecture.
+
+        Args:
+            signature (str): Architecture signature
+
+        Returns:
+            list: Weight arrays, or None if not cached or unreadable
+        """
+        weights = self._weights.get(signature)
+        if weights is not None or self.directory is None:
+            return weights
+        try:
+            with np.load(self.path(signature)) as data:
+                weights = [data['w' + str(i)] for i in range(int(data['count']))]
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            return None
+        self._weights[signature] = weights
+        return weights
+
+    def store(self, signature, weights, spec=None):
+        """
+        Cache the weights of an architecture.
+
+        The file is written under a temporary name and renamed, so
+        processes filling the cache at the same time never read a partial
+        file.
+
+        Args:
+            signature (str): Architecture signature
+            weights (list): Weight arrays, as returned by get_weights
+            spec (dict, optional): Architecture, saved alongside for reference
+        """
+        weights = [np.array(w) for w in weights]
+        self._weights[signature] = weights
+        if self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        arrays = dict(('w' + str(i), w) for i, w in enumerate(weights))
+        fd, tmp = tempfile.mkstemp(suffix='.npz', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, count=len(weights), spec=json.dumps(spec, sort_keys=True),
+                         **arrays)
+            os.replace(tmp, self.path(signature))
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def model(self, spec, build, warmup=None):
+        """
+        Build a compiled model with the cached initial weights of its spec.
+
+        On a miss the model is built, warmed up if requested, and its
+        weights are cached.
+
+        Args:
+            spec (dict): Architecture
+            build (callable): Builds the compiled model of a spec
+            warmup (callable, optional): Initializes the weights of a new
+                                         model in place
+
+        Returns:
+            Compiled model
+        """
+        signature = specSignature(spec)
+        model = build(spec)
+        weights = self.load(signature)
+        if weights is not None:
+            try:
+                model.set_weights(weights)
+                self.hits += 1
+                return model
+            except ValueError:
+                # Stale file of a different architecture: rebuild it
+                model = build(spec)
+        self.misses += 1
+        if warmup is not None:
+            warmup(model)
+        self.store(signature, model.get_weights(), spec)
+        return model
+
+    def clear(self, disk=False):
+        """
+        Forget the cached weights.
+
+        Args:
+            disk (bool): Also delete the .npz files (default: False)
+        """
+        self._weights.clear()
+        if disk and self.directory is not None and os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith('.npz'):
+                    os.remove(os.path.join(self.directory, name))
+
+
+# Process-wide cache used by GTarneeb.buildPlayingModel
+modelCache = ModelCache()
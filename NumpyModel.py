@@ -0,0 +1,207 @@
+"""
+Pure NumPy inference for GenModel dense networks.
+
+A GenModel.Model is a stack of Dense layers, so its forward pass is a few
+matrix products. exportModel copies the weights and activations of a
+compiled Keras model into a NumpyModel, whose predict returns the same
+outputs without importing TensorFlow and without Keras' fixed per-call
+overhead. NumpyModel has the predict/get_weights/set_weights interface
+of a Keras model, so it can be given to TarneebPlayer as biddingModel
+wherever only inference is needed (game loops, worker processes).
+
+Usage:
+    fast = exportModel(player.biddingModel)
+    assert parityCheck(player.biddingModel, fast) < 1e-5
+    fast.save('bidding.npz')
+"""
+
+import json
+
+import numpy as np
+
+
+def _elu(x, alpha=1.0):
+    return np.where(x > 0, x, alpha * np.expm1(np.minimum(x, 0)))
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+def _selu(x):
+    return 1.0507009873554805 * _elu(x, 1.6732632423543772)
+
+
+# Keras 2 activations, keyed by GenModel.actiFunction value (GenModel is not
+# imported so that this module never loads Keras)
+ACTIVATIONS = {
+    'elu': _elu,
+    'softmax': _softmax,
+    'selu': _selu,
+    'softplus': lambda x: np.logaddexp(0, x),
+    'softsign': lambda x: x / (1 + np.abs(x)),
+    'relu': lambda x: np.maximum(x, 0),
+    'tanh': np.tanh,
+    'sigmoid': lambda x: 0.5 * (1 + np.tanh(0.5 * x)),
+    'hard_sigmoid': lambda x: np.clip(0.2 * x + 0.5, 0, 1),
+    'exponential': np.exp,
+    'linear': lambda x: x,
+}
+
+
+class NumpyModel:
+    """
+    Dense network evaluated with NumPy.
+
+    Attributes:
+        weights (list): (W, b) float32 arrays of every layer
+        activations (list): Activation name of every layer
+    """
+
+    def __init__(self, weights, activations):
+        """
+        Initialize a NumpyModel.
+
+        Args:
+            weights (list): Flat list [W0, b0, W1, b1, ...], as returned by
+                            Keras get_weights
+            activations (list): Activation name of every layer
+
+        Raises:
+            ValueError: If an activation is not an actiFunction value
+        """
+        for a in activations:
+            if a not in ACTIVATIONS:
+                raise ValueError('Unsupported activation ' + str(a))
+        self.activations = list(activations)
+        self._functions = [ACTIVATIONS[a] for a in activations]
+        self.set_weights(weights)
+
+    def predict(self, x, *args, **kwargs):
+        """
+        Forward pass, Keras predict compatible.
+
+        Args:
+            x (array-like): (n, inputs) input rows
+
+        Returns:
+            np.ndarray: (n, outputs) float32 outputs
+        """
+        h = np.asarray(x, dtype=np.float32)
+        for (W, b), f in zip(self.weights, self._functions):
+            h = f(h @ W + b)
+        return h
+
+    __call__ = predict
+
+    def get_weights(self):
+        """Flat list of weights, as Keras get_weights."""
+        return [a for layer in self.weights for a in layer]
+
+    def set_weights(self, weights):
+        """
+        Replace the weights.
+
+        Args:
+            weights (list): Flat list [W0, b0, W1, b1, ...]
+        """
+        weights = [np.asarray(w, dtype=np.float32) for w in weights]
+        if len(weights) != 2 * len(self.activations):
+            raise ValueError('Expected ' + str(2 * len(self.activations)) +
+                             ' weight arrays, got ' + str(len(weights)))
+        self.weights = list(zip(weights[0::2], weights[1::2]))
+
+    def save(self, path):
+        """
+        Save the model to a .npz file.
+
+        Args:
+            path (str): Output file
+        """
+        arrays = dict(('w' + str(i), w) for i, w in enumerate(self.get_weights()))
+        np.savez(path, activations=np.array(self.activations), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a model saved with save.
+
+        Args:
+            path (str): .npz file
+
+        Returns:
+            NumpyModel: The loaded model
+        """
+        with np.load(path) as data:
+            activations = [str(a) for a in data['activations']]
+            weights = [data['w' + str(i)] for i in range(2 * len(activations))]
+        return cls(weights, activations)
+
+
+def _denseActivations(layers):
+    """Activations of layer configs, rejecting anything but Dense layers."""
+    activations = []
+    for layer in layers:
+        name = layer['class_name']
+        if name == 'InputLayer':
+            continue
+        if name != 'Dense':
+            raise ValueError('Only Dense layers can be exported, found ' + name)
+        activations.append(layer['config']['activation'])
+    return activations
+
+
+def exportModel(model):
+    """
+    Copy a Keras Dense model (GenModel.Model) into a NumpyModel.
+
+    Args:
+        model: Keras Sequential model of Dense layers
+
+    Returns:
+        NumpyModel: Model computing the same outputs
+
+    Raises:
+        ValueError: If the model has other layers or activations
+    """
+    activations = _denseActivations(
+        {'class_name': type(layer).__name__, 'config': layer.get_config()}
+        for layer in model.layers)
+    return NumpyModel(model.get_weights(), activations)
+
+
+def fromSnapshot(snapshot):
+    """
+    Build a NumpyModel from a SelfPlay.modelSnapshot without Keras.
+
+    Args:
+        snapshot (dict): 'config' (model JSON) and 'weights'
+
+    Returns:
+        NumpyModel: Model computing the same outputs
+    """
+    config = json.loads(snapshot['config'])['config']
+    layers = config['layers'] if isinstance(config, dict) else config
+    return NumpyModel(snapshot['weights'], _denseActivations(layers))
+
+
+def parityCheck(model, numpy_model=None, samples=256, rng=None):
+    """
+    Compare a Keras model with its NumPy export on random inputs.
+
+    Args:
+        model: Keras model
+        numpy_model (NumpyModel, optional): Export to check (default: a new
+                                            exportModel(model))
+        samples (int): Number of random input rows (default: 256)
+        rng (np.random.Generator, optional): Random generator
+
+    Returns:
+        float: Largest absolute difference between the outputs
+    """
+    numpy_model = exportModel(model) if numpy_model is None else numpy_model
+    rng = np.random.default_rng() if rng is None else rng
+    x = rng.random((samples, numpy_model.weights[0][0].shape[0]), dtype=np.float32)
+    expected = np.asarray(model.predict(x, verbose=0))
+    return float(np.abs(expected - numpy_model.predict(x)).max())
@@ -6,16 +6,25 @@ specific game implementations.
 """
 
 import random
-import numpy as np
+
+from Cards.Bitboard import (cardsToMask, maskToCards, maskToHand, maskToArray, typeMask,
+                            legalMask, legalActionMask, trickLead)
 
 
 class Player:
     """
     Base class representing a player in a card game.
     
+    The hand is stored as a 52-bit mask (see Cards.Bitboard); the ``hand``
+    property exposes it as a tuple of Card objects in hand order (grouped
+    by type, highest card first, as sorted(cards, reverse=True)), the
+    order of the hand features of the playing model.
+
     Attributes:
         name (str): The name of the player
-        hand (list): List of Card objects in the player's hand
+        mask (int): Bitboard of the cards in the player's hand
+        hand (tuple): Card objects in the player's hand; assigning it
+                      calls setHand
         quiver (list): List of cards won by the player
     """
     
@@ -27,21 +36,64 @@ class Player:
             name (str): The name of the player
         """
         self.name = name
+        self.mask = 0
         self.quiver = []
     def __repr__(self):
         return self.name + ": " + str(self.hand) + "\t" + str(self.quiver)
+
+    @property
+    def hand(self):
+        """Tuple of Card objects in hand, in hand order (see Bitboard.handIds)."""
+        return tuple(maskToHand(self.mask))
+
+    @hand.setter
+    def hand(self, cards):
+        self.setHand(cards)
+
     def setHand(self, cards):
         """
         Set the player's hand with the given cards.
         
         Args:
-            cards (list): List of Card objects
+            cards (list or int): List of Card objects or a card mask
         """
-        self.hand = cards
+        self.mask = cards if isinstance(cards, int) else cardsToMask(cards)
     
     def clearHand(self):
         """Clear all cards from the player's hand."""
-        self.hand = []
+        self.mask = 0
+
+    def removeCard(self, card):
+        """
+        Remove a card from the player's hand.
+
+        Args:
+            card (Card): The card to remove
+        """
+        self.mask &= ~(1 << card.cardId())
+    
+    def startRound(self, seat, tarneeb):
+        """
+        Called before the first turn of a round.
+        
+        Base implementation does nothing. Override in subclasses that
+        track the game.
+        
+        Args:
+            seat (int): Seat of the player in the round (0-3)
+            tarneeb (CardType): The trump suit for this round
+        """
+    
+    def observeTurn(self, turn):
+        """
+        Called after every complete turn with the cards played by all players.
+        
+        Base implementation does nothing. Override in subclasses that
+        track the game.
+        
+        Args:
+            turn (Turn): The finished turn
+        """
     
     def filterCardsByType(self, cType):
         """
@@ -53,11 +105,7 @@ class Player:
         Returns:
             list: List of cards matching the specified type
         """
-        nh = []
-        for c in self.hand:
-            if(c.type == cType):
-                nh.append(c)
-        return nh
+        return maskToCards(typeMask(self.mask, cType))
 
     def playCard(self, cards=[], *args, **kwargs):
         """
@@ -74,14 +122,25 @@ class Player:
         Returns:
             Card: The card chosen to be played
         """
-        crd = self.chooseCard(self.hand)
-        if(len(cards) > 0):
-            fh = self.filterCardsByType(cards[0].type)
-            if(len(fh) > 0):
-                crd = self.chooseCard(fh)
-        self.hand.pop(self.hand.index(crd))
+        crd = self.chooseCard(maskToCards(legalMask(self.mask, trickLead(cards))))
+        self.removeCard(crd)
         return crd
 
+    def legalActions(self, cards=[]):
+        """
+        Legal cards of the hand as a 52-element action mask.
+        
+        A playing network can score all 52 cards at once and ignore the
+        illegal ones (see Bitboard.bestLegalActions).
+        
+        Args:
+            cards (list): List of cards already played in this turn
+        
+        Returns:
+            np.ndarray: 52-element boolean array indexed by cardId
+        """
+        return legalActionMask(self.mask, cards)
+
     def chooseCard(self, legalCards):
         """
         Choose a card from the list of legal cards.
@@ -108,7 +167,4 @@ class Player:
         Returns:
             np.ndarray: Binary array representing cards in hand
         """
-        ret = np.zeros(52)
-        for c in self.hand:
-            ret[c.cardId()] = 1
-        return ret
+        return maskToArray(self.mask)
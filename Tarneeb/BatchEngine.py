@@ -0,0 +1,239 @@
+"""
+Vectorized Tarneeb engine playing many rounds in lockstep.
+
+This module plays N tables at once using NumPy arrays instead of Card,
+Player and Turn objects:
+- Hands are an (N, 4, 52) boolean mask indexed by [table, seat, cardId]
+- The tarneeb (trump) is one type id per table
+- Every trick is resolved for all tables with one vectorized pass that
+  follows the same rules as Turn.winner
+
+Card ids follow Card.cardId(): the type id of a card is ``cardId % 4`` and
+its value is ``cardId // 4 + 2``, so comparing ids of the same type compares
+their values.
+
+Usage:
+    result = play_rounds(10000, randomPolicy())
+    result.tricks.sum(axis=0)
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from Cards.Bitboard import CARD_TYPE_IDS, legalActionMasks
+
+
+# Value rank (0-12) of every card id
+CARD_RANKS = np.arange(52) // 4
+
+RoundsBatch = namedtuple(
+    'RoundsBatch', ['deals', 'tarneeb', 'plays', 'leaders', 'winners', 'tricks']
+)
+RoundsBatch.__doc__ = """
+Result of play_rounds for N tables.
+
+Attributes:
+    deals (np.ndarray): (N, 52) card ids in dealing order, seat i receives
+                        deals[:, 13*i:13*(i+1)]
+    tarneeb (np.ndarray): (N,) tarneeb type id per table
+    plays (np.ndarray): (N, 13, 4) card ids in playing order for each turn
+    leaders (np.ndarray): (N, 13) seat that led each turn
+    winners (np.ndarray): (N, 13) seat that won each turn
+    tricks (np.ndarray): (N, 4) number of turns won by each seat
+"""
+
+
+def shuffledDeals(n, rng=None):
+    """
+    Generate n shuffled decks as card id permutations.
+
+    Args:
+        n (int): Number of decks
+        rng (np.random.Generator, optional): Random generator
+
+    Returns:
+        np.ndarray: (n, 52) array of card ids
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    return rng.permuted(np.tile(np.arange(52, dtype=np.int8), (n, 1)), axis=1)
+
+
+def checkDeals(deals, n=None):
+    """
+    Check that deals are permutations of the 52 card ids.
+
+    Args:
+        deals (array-like): (n, 52) card ids in dealing order
+        n (int, optional): Expected number of deals
+
+    Raises:
+        ValueError: If the shape is not (n, 52) or a row is not a
+                    permutation of 0-51
+    """
+    deals = np.asarray(deals)
+    if deals.ndim != 2 or deals.shape[1] != 52 or (n is not None and len(deals) != n):
+        raise ValueError('deals of shape ' + str(deals.shape) + ' instead of ' +
+                         str((len(deals) if n is None else n, 52)))
+    if not np.issubdtype(deals.dtype, np.integer):
+        raise ValueError('deals must be integer card ids, not ' + str(deals.dtype))
+    bad = np.flatnonzero((np.sort(deals, axis=1) != np.arange(52)).any(axis=1))
+    if len(bad):
+        raise ValueError('deals ' + str(bad[:10].tolist()) +
+                         ' are not permutations of the 52 card ids')
+
+
+def dealsToHands(deals):
+    """
+    Convert deals to hand masks, 13 consecutive cards per seat.
+
+    Args:
+        deals (np.ndarray): (N, 52) card ids in dealing order
+
+    Returns:
+        np.ndarray: (N, 4, 52) boolean hand masks
+    """
+    n = len(deals)
+    hands = np.zeros((n, 4, 52), dtype=bool)
+    hands[np.arange(n)[:, None], np.arange(52)[None, :] // 13, deals] = True
+    return hands
+
+
+def trickWinners(trick, tarneeb):
+    """
+    Find the winning card of complete turns for many tables at once.
+
+    Equivalent to Turn.winner: tarneeb cards beat all other cards, and
+    otherwise the highest card of the lead type (the first card) wins.
+
+    Args:
+        trick (np.ndarray): (N, 4) card ids in playing order
+        tarneeb (np.ndarray): (N,) tarneeb type id per table
+
+    Returns:
+        np.ndarray: (N,) index (0-3) of the winning card in each trick
+    """
+    types = CARD_TYPE_IDS[trick]
+    strength = np.where(types == types[:, :1], 13 + CARD_RANKS[trick], 0)
+    strength = np.where(types == tarneeb[:, None], 26 + CARD_RANKS[trick], strength)
+    return strength.argmax(axis=1)
+
+
+def legalMasks(hands, lead):
+    """
+    Compute legal cards for a batch of hands.
+
+    Args:
+        hands (np.ndarray): (N, 52) boolean hand masks
+        lead (np.ndarray): (N,) lead type id per table, -1 if leading
+
+    Returns:
+        np.ndarray: (N, 52) boolean legal card masks
+    """
+    return legalActionMasks(hands, lead=lead)
+
+
+def randomPolicy(rng=None):
+    """
+    Build a policy playing a uniformly random legal card.
+
+    Args:
+        rng (np.random.Generator, optional): Random generator
+
+    Returns:
+        callable: Policy mapping an observation batch to card ids
+    """
+    rng = np.random.default_rng() if rng is None else rng
+
+    def policy(obs):
+        legal = obs['legal']
+        return np.where(legal, rng.random(legal.shape), -1).argmax(axis=1)
+
+    return policy
+
+
+def play_rounds(n, policy, deals=None, rng=None):
+    """
+    Play n complete rounds (13 turns) in lockstep.
+
+    For each of the 52 plays the policy receives a dict of batched
+    observations, one row per table:
+    - 'seat' (N,): seat to play
+    - 'hand' (N, 52): cards held by that seat
+    - 'legal' (N, 52): cards that can legally be played
+    - 'trick' (N, 3): card ids already played in this turn, -1 if none
+    - 'lead' (N,): lead type id, -1 when the seat leads the turn
+    - 'played' (N, 52): cards played in previous turns of the round
+    - 'tarneeb' (N,): tarneeb type id
+    - 'won' (N, 4): turns won so far by each seat
+    - 'serial' (int): turn number (1-13)
+    and must return an (N,) array of legal card ids.
+
+    As in GTarneeb.playRound, seat 0 leads the first turn, the winner of a
+    turn leads the next one, and the tarneeb is the type of the last card
+    dealt.
+
+    Args:
+        n (int): Number of tables
+        policy (callable): Batched policy, see above
+        deals (np.ndarray, optional): (n, 52) card id permutations to play
+        rng (np.random.Generator, optional): Random generator for dealing
+
+    Returns:
+        RoundsBatch: Deals, plays and results of every table
+
+    Raises:
+        ValueError: If deals are not n permutations of the 52 card ids, or
+                    if the policy returns an illegal card or a card id
+                    outside 0-51
+    """
+    if deals is None:
+        deals = shuffledDeals(n, rng)
+    else:
+        checkDeals(deals, n)
+    deals = np.asarray(deals)
+    rows = np.arange(n)
+    hands = dealsToHands(deals)
+    tarneeb = (deals[:, 51] % 4).astype(np.int8)
+    played = np.zeros((n, 52), dtype=bool)
+
+    plays = np.zeros((n, 13, 4), dtype=np.int8)
+    leaders = np.zeros((n, 13), dtype=np.int8)
+    winners = np.zeros((n, 13), dtype=np.int8)
+    tricks = np.zeros((n, 4), dtype=np.int8)
+    leader = np.zeros(n, dtype=np.int64)
+
+    for t in range(13):
+        trick = np.full((n, 4), -1, dtype=np.int64)
+        lead = np.full(n, -1, dtype=np.int64)
+        for k in range(4):
+            seat = (leader + k) % 4
+            hand = hands[rows, seat]
+            legal = legalMasks(hand, lead)
+            obs = {
+                'seat': seat, 'hand': hand, 'legal': legal,
+                'trick': trick[:, :3], 'lead': lead, 'played': played,
+                'tarneeb': tarneeb, 'won': tricks, 'serial': t + 1,
+            }
+            action = np.asarray(policy(obs), dtype=np.int64)
+            if action.shape != (n,):
+                raise ValueError('Policy returned an array of shape ' + str(action.shape) +
+                                 ' instead of ' + str((n,)))
+            # Negative ids would wrap around to the last cards in legal
+            if ((action < 0) | (action >= 52)).any() or not legal[rows, action].all():
+                raise ValueError('Policy returned an illegal card at turn '
+                                 + str(t + 1))
+            hands[rows, seat, action] = False
+            trick[:, k] = action
+            if k == 0:
+                lead = CARD_TYPE_IDS[action]
+
+        winner = (leader + trickWinners(trick, tarneeb)) % 4
+        played[rows[:, None], trick] = True
+        plays[:, t] = trick
+        leaders[:, t] = leader
+        winners[:, t] = winner
+        tricks[rows, winner] += 1
+        leader = winner
+
+    return RoundsBatch(deals, tarneeb, plays, leaders, winners, tricks)
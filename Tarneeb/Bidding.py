@@ -0,0 +1,74 @@
+"""
+Batched bidding phase for many Tarneeb tables.
+
+Instead of one biddingModel.predict call on a (1, 64) row per player, the
+bidding inputs of all pending players are stacked into one matrix per
+model, predicted in a single forward pass, and the outputs are scattered
+back to the players with TarneebPlayer.setBid.
+"""
+
+import numpy as np
+
+from Cards.Encoding import typeOneHot
+
+
+def predictGrouped(players, inputs):
+    """
+    Run one forward pass per distinct bidding model.
+
+    Args:
+        players (list): TarneebPlayer objects, one per input row
+        inputs (list): (1, 64) bidding input rows
+
+    Returns:
+        np.ndarray: One model output per player, in the same order
+    """
+    groups = {}
+    for i, p in enumerate(players):
+        groups.setdefault(id(p.biddingModel), (p.biddingModel, []))[1].append(i)
+
+    outputs = np.zeros(len(players))
+    for model, rows in groups.values():
+        X = np.vstack([inputs[i] for i in rows])
+        outputs[rows] = np.asarray(model.predict(x=X, verbose=0))[:, 0]
+    return outputs
+
+
+def bidTables(tables, tarneebs, sequential=True):
+    """
+    Collect the bids of every player of many tables.
+
+    Hands must already be set. As in GTarneeb.distripute_and_bid, seat i
+    sees the bids of seats 0..i-1 of its own table, so by default the
+    tables bid seat by seat: one forward pass per model for each of the
+    4 seat positions. With sequential=False all seats bid at once without
+    seeing other bids, which is a single forward pass per model.
+
+    Args:
+        tables (list): Lists of 4 TarneebPlayer objects
+        tarneebs (list): The trump suit (CardType) of each table
+        sequential (bool): Whether seats see the bids of previous seats
+                           (default: True)
+
+    Returns:
+        np.ndarray: Sum of the bids of each table
+    """
+    bids = np.zeros((len(tables), 4))
+    tbs = [typeOneHot(t) for t in tarneebs]
+    scaled_scores = [[p.score / 41.0 for p in players] for players in tables]
+
+    seat_groups = [[i] for i in range(4)] if sequential else [list(range(4))]
+    for seats in seat_groups:
+        pending = []
+        inputs = []
+        for t, players in enumerate(tables):
+            for i in seats:
+                pending.append((t, i, players[i]))
+                inputs.append(players[i].biddingInputs(
+                    scores=scaled_scores[t], biddings=bids[t], tarneeb=tbs[t]))
+
+        outputs = predictGrouped([p for _, _, p in pending], inputs)
+        for (t, i, p), o in zip(pending, outputs):
+            bids[t, i] = p.setBid(o)
+
+    return bids.sum(axis=1)
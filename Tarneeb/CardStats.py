@@ -0,0 +1,216 @@
+"""
+Array-backed statistics of played cards.
+
+Every played card is counted in one cell of an int64 tensor indexed by
+(trump, value, won, seat, position, trick):
+- trump (2): 1 if the card is of the tarneeb type
+- value (13): card value - 2 (0 is a 2, 12 an Ace)
+- won (2): 1 if the card won its turn
+- seat (4): seat of the player who played it
+- position (4): order of the card in its turn (0 leads)
+- trick (13): turn number - 1
+
+Rounds are added in bulk from arrays of card ids (addRounds), so counting
+the 52 cards of a round, or of thousands of BatchEngine rounds, is one
+np.bincount. Statistics of worker processes are combined with merge, and
+export / load keep them in a small .npz file for analysis.
+
+Usage:
+    stats = CardStats()
+    stats.addBatch(play_rounds(10000, randomPolicy()))
+    stats.winRate(('trump', 'value'))
+"""
+
+import numpy as np
+
+from Tarneeb.BatchEngine import trickWinners
+
+
+AXES = ('trump', 'value', 'won', 'seat', 'position', 'trick')
+STATS_SHAPE = (2, 13, 2, 4, 4, 13)
+
+
+class CardStats:
+    """
+    Counts of played cards.
+
+    Attributes:
+        counts (np.ndarray): STATS_SHAPE int64 counter tensor, see AXES
+    """
+
+    def __init__(self, counts=None):
+        """
+        Initialize statistics.
+
+        Args:
+            counts (np.ndarray, optional): Counts to start from (default: zeros)
+        """
+        self.counts = np.zeros(STATS_SHAPE, dtype=np.int64)
+        if counts is not None:
+            self.counts += counts
+
+    def __repr__(self):
+        return 'CardStats(' + str(self.total()) + ' cards)'
+
+    def total(self):
+        """Number of cards counted."""
+        return int(self.counts.sum())
+
+    def reset(self):
+        """Set every count to zero."""
+        self.counts[...] = 0
+
+    def copy(self):
+        """Independent copy of the statistics."""
+        return CardStats(self.counts)
+
+    def drain(self):
+        """
+        Take the counts collected so far and reset them.
+
+        Returns:
+            CardStats: The counts since the previous drain
+        """
+        taken = self.copy()
+        self.reset()
+        return taken
+
+    def merge(self, other):
+        """
+        Add the counts of other statistics, e.g. from a worker process.
+
+        Args:
+            other (CardStats or np.ndarray): Statistics to add
+
+        Returns:
+            CardStats: self
+        """
+        self.counts += other.counts if isinstance(other, CardStats) else other
+        return self
+
+    __iadd__ = merge
+
+    def addRounds(self, plays, leaders, winners, tarneeb):
+        """
+        Count the cards of rounds, from their first turn.
+
+        Args:
+            plays (array-like): (N, T, 4) card ids in playing order, T <= 13
+            leaders (array-like): (N, T) seat that led each turn
+            winners (array-like): (N, T) seat that won each turn
+            tarneeb (array-like): (N,) tarneeb type id
+        """
+        plays = np.asarray(plays, dtype=np.int64)
+        leaders = np.asarray(leaders, dtype=np.int64)
+        tarneeb = np.asarray(tarneeb, dtype=np.int64)
+        position = np.arange(4)
+        seat = (leaders[..., None] + position) % 4
+        index = np.ravel_multi_index((
+            plays % 4 == tarneeb[:, None, None],
+            plays // 4,
+            seat == np.asarray(winners)[..., None],
+            seat,
+            np.broadcast_to(position, plays.shape),
+            np.broadcast_to(np.arange(plays.shape[1])[:, None], plays.shape),
+        ), STATS_SHAPE)
+        self.counts += np.bincount(index.ravel(), minlength=self.counts.size).reshape(STATS_SHAPE)
+
+    def addBatch(self, batch):
+        """
+        Count the cards of rounds played by BatchEngine.play_rounds.
+
+        Args:
+            batch (RoundsBatch): Played rounds
+        """
+        self.addRounds(batch.plays, batch.leaders, batch.winners, batch.tarneeb)
+
+    def addRecords(self, records):
+        """
+        Count the cards of recorded rounds (see Tarneeb.GameRecord).
+
+        Args:
+            records (np.ndarray): (n,) RECORD_DTYPE array
+        """
+        n = len(records)
+        plays = records['plays'].astype(np.int64).reshape(n, 13, 4)
+        tarneeb = records['tarneeb'].astype(np.int64)
+        leaders = np.zeros((n, 13), dtype=np.int64)
+        winners = np.zeros((n, 13), dtype=np.int64)
+        leader = np.zeros(n, dtype=np.int64)
+        for j in range(13):
+            leaders[:, j] = leader
+            leader = (leader + trickWinners(plays[:, j], tarneeb)) % 4
+            winners[:, j] = leader
+        self.addRounds(plays, leaders, winners, tarneeb)
+
+    def table(self, axes=('trump', 'value', 'won')):
+        """
+        Counts summed over every axis but the given ones.
+
+        Args:
+            axes (tuple): Names of the axes to keep, see AXES
+
+        Returns:
+            np.ndarray: Counts with the kept axes, in AXES order
+        """
+        drop = tuple(i for i, a in enumerate(AXES) if a not in axes)
+        return self.counts.sum(axis=drop)
+
+    def winRate(self, axes=('trump', 'value')):
+        """
+        Fraction of the played cards that won their turn.
+
+        Args:
+            axes (tuple): Names of the axes to keep, 'won' excluded
+
+        Returns:
+            np.ndarray: Win rate per kept cell, NaN where no card was played
+        """
+        counts = self.table(tuple(axes) + ('won',))
+        won_axis = [a for a in AXES if a in axes or a == 'won'].index('won')
+        played = counts.sum(axis=won_axis)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.take(counts, 1, axis=won_axis) / played
+
+    def toRecord(self):
+        """
+        Counts in the former cards_record format.
+
+        Returns:
+            dict: Counts by key such as 'T-12-W' (tarneeb 12 that won) or
+                  '5' (non-tarneeb 5 that lost)
+        """
+        record = {}
+        counts = self.table()
+        for trump, value, won in zip(*np.nonzero(counts)):
+            key = str(value + 2) + ('-W' if won else '')
+            record[('T-' if trump else '') + key] = int(counts[trump, value, won])
+        return record
+
+    def export(self, path):
+        """
+        Save the statistics to a .npz file.
+
+        Args:
+            path (str): Output file
+        """
+        np.savez(path, counts=self.counts, axes=np.array(AXES))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load statistics saved with export.
+
+        Args:
+            path (str): .npz file
+
+        Returns:
+            CardStats: The loaded statistics
+
+        Raises:
+            ValueError: If the file has other axes
+        """
+        with np.load(path) as data:
+            if tuple(str(a) for a in data['axes']) != AXES:
+                raise ValueError(path + ' has axes ' + str(list(data['axes'])))
+            return cls(data['counts'])
@@ -0,0 +1,335 @@
+"""
+Asynchronous checkpoints of training runs.
+
+A checkpoint holds everything GTarneeb.train needs to continue a run
+exactly where it stopped:
+- the weights and optimizer state of every bidding model and of the
+  playing model
+- the score, bid, games won and turns won of every player
+- the card statistics (cards_record)
+- the state of the random and numpy.random generators
+- the position of the loop (game, round of the game, rounds in total)
+
+captureState copies this state in the game thread, which only takes a few
+array copies. CheckpointManager.save hands the copy to a background
+thread that pickles it, writes it under a temporary name, renames it and
+deletes the oldest checkpoints beyond the retention limit, so the game
+loop never waits for the disk. Temporary files left by a run killed while
+saving are removed when the next manager opens the directory.
+
+Usage:
+    with CheckpointManager('run/checkpoints', keep=3) as checkpoints:
+        checkpoints.save(captureState(players, playModel, cards_record, progress),
+                         step)
+    progress = restoreState(CheckpointManager('run/checkpoints').load(),
+                            players, playModel, cards_record)
+"""
+
+import logging
+import os
+import pickle
+import queue
+import random
+import re
+import threading
+
+import numpy as np
+
+
+CHECKPOINT_FORMAT = 'checkpoint-%09d.pkl'
+_CHECKPOINT_NAME = re.compile(r'checkpoint-(\d+)\.pkl$')
+_TEMPORARY_NAME = re.compile(r'checkpoint-(\d+)\.pkl\.tmp$')
+
+# Player attributes saved in checkpoints
+PLAYER_FIELDS = ('score', 'bidding', 'gamesWon', 'number_of_won_turns')
+
+
+def modelState(model):
+    """
+    Copy the weights and optimizer state of a model.
+
+    Args:
+        model: Keras model
+
+    Returns:
+        dict: 'config' (architecture JSON), 'compile' (compile arguments),
+              'weights' and 'optimizer' lists of arrays
+    """
+    optimizer = getattr(model, 'optimizer', None)
+    variables = getattr(optimizer, 'variables', []) if optimizer is not None else []
+    if callable(variables):
+        variables = variables()
+    compile_config = model.get_compile_config() if optimizer is not None else None
+    return {'config': model.to_json(), 'compile': compile_config,
+            'weights': model.get_weights(),
+            'optimizer': [np.array(v) for v in variables]}
+
+
+def buildModel(state):
+    """
+    Rebuild a saved model, for architectures drawn at random (GenModel).
+
+    Args:
+        state (dict): Output of modelState
+
+    Returns:
+        keras.Model: Compiled model with the saved weights and optimizer state
+    """
+    import keras
+    model = keras.models.model_from_json(state['config'])
+    if state['compile'] is not None:
+        model.compile_from_config(state['compile'])
+    restoreModel(model, state)
+    return model
+
+
+def restoreModel(model, state):
+    """
+    Restore the weights and optimizer state of a model in place.
+
+    Args:
+        model: Keras model with the architecture of the saved one (see
+               buildModel otherwise)
+        state (dict): Output of modelState
+    """
+    model.set_weights(state['weights'])
+    saved = state['optimizer']
+    optimizer = getattr(model, 'optimizer', None)
+    if not saved or optimizer is None:
+        return
+    variables = optimizer.variables
+    if callable(variables):
+        variables = variables()
+    if len(variables) != len(saved):
+        # Optimizer slots are created on the first update
+        optimizer.build(model.trainable_variables)
+        variables = optimizer.variables
+        if callable(variables):
+            variables = variables()
+    if len(variables) != len(saved):
+        logging.warning('optimizer state of ' + str(model.name) + ' does not match, not restored')
+        return
+    for variable, value in zip(variables, saved):
+        variable.assign(value)
+
+
+def rngState():
+    """State of the random and numpy.random global generators."""
+    return {'random': random.getstate(), 'numpy': np.random.get_state()}
+
+
+def restoreRng(state):
+    """Restore the generators saved by rngState."""
+    random.setstate(state['random'])
+    np.random.set_state(state['numpy'])
+
+
+def captureState(players, playModel, cards_record, progress):
+    """
+    Copy the state of a training run.
+
+    Args:
+        players (list): The TarneebPlayer objects
+        playModel: The playing model
+        cards_record (CardStats): Card statistics
+        progress (dict): Position of the loop ('game', 'rounds',
+                         'total_rounds')
+
+    Returns:
+        dict: Picklable state, independent of later training
+    """
+    return {
+        'players': [dict([('name', p.name), ('bidding_model', modelState(p.biddingModel))] +
+                         [(f, getattr(p, f)) for f in PLAYER_FIELDS])
+                    for p in players],
+        'playing_model': modelState(playModel),
+        'cards_record': cards_record.copy(),
+        'rng': rngState(),
+        'progress': dict(progress),
+    }
+
+
+def restoreState(state, players, playModel, cards_record):
+    """
+    Restore the state of a training run in place.
+
+    The bidding models of the players are replaced by rebuilt copies of the
+    saved ones, whose architectures were drawn at random; the playing model
+    has a fixed architecture and is restored in place.
+
+    Args:
+        state (dict): Output of captureState
+        players (list): TarneebPlayer objects, in the saved order
+        playModel: Playing model with the saved architecture
+        cards_record (CardStats): Card statistics, replaced by the saved ones
+
+    Returns:
+        dict: Position of the loop at the checkpoint
+
+    Raises:
+        ValueError: If the number of players differs
+    """
+    if len(state['players']) != len(players):
+        raise ValueError('checkpoint has ' + str(len(state['players'])) + ' players, not ' +
+                         str(len(players)))
+    for p, saved in zip(players, state['players']):
+        p.biddingModel = buildModel(saved['bidding_model'])
+        for f in PLAYER_FIELDS:
+            setattr(p, f, saved[f])
+    restoreModel(playModel, state['playing_model'])
+    cards_record.reset()
+    cards_record.merge(state['cards_record'])
+    restoreRng(state['rng'])
+    return dict(state['progress'])
+
+
+class CheckpointManager:
+    """
+    Writes checkpoints in a background thread and keeps the newest ones.
+
+    Attributes:
+        directory (str): Directory of the checkpoint files
+        keep (int): Checkpoints kept on disk, None to keep all
+    """
+
+    def __init__(self, directory, keep=3):
+        """
+        Initialize a manager and start its writer thread.
+
+        Args:
+            directory (str): Directory of the checkpoint files, created if needed
+            keep (int): Checkpoints kept on disk (default: 3)
+        """
+        self.directory = directory
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+        self._removeTemporary()
+        # One checkpoint can wait while another one is written; a third
+        # save blocks instead of piling up copies in memory
+        self._queue = queue.Queue(maxsize=1)
+        self._error = None
+        self._thread = threading.Thread(target=self._write, name='checkpoint-writer',
+                                        daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def path(self, step):
+        """File of the checkpoint of a step."""
+        return os.path.join(self.directory, CHECKPOINT_FORMAT % step)
+
+    def save(self, state, step):
+        """
+        Queue a checkpoint for writing.
+
+        Args:
+            state (dict): Output of captureState, not modified afterwards
+            step (int): Checkpoint number, increasing (e.g. rounds played)
+
+        Raises:
+            OSError: If writing a previous checkpoint failed
+        """
+        self._raise()
+        self._queue.put((state, step))
+
+    def wait(self):
+        """Block until every queued checkpoint is written."""
+        self._queue.join()
+        self._raise()
+
+    def close(self):
+        """Write the queued checkpoints and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise()
+
+    def _raise(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _write(self):
+        while True:
+            item = self._queue.get()
+            tmp = None
+            try:
+                if item is None:
+                    return
+                state, step = item
+                path = self.path(step)
+                tmp = path + '.tmp'
+                with open(tmp, 'wb') as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, path)
+                self._prune()
+            except Exception as e:
+                logging.exception('checkpoint writing failed')
+                self._error = e
+                if tmp is not None and os.path.exists(tmp):
+                    os.remove(tmp)
+            finally:
+                self._queue.task_done()
+
+    def _removeTemporary(self):
+        # Half-written checkpoints of a run that was killed while saving
+        for name in os.listdir(self.directory):
+            if _TEMPORARY_NAME.match(name):
+                logging.info('removing unfinished checkpoint ' + name)
+                os.remove(os.path.join(self.directory, name))
+
+    def clear(self):
+        """
+        Delete every checkpoint of the directory, e.g. before a new run.
+
+        Checkpoints are ordered by step, so those of an older, longer run
+        would otherwise be kept instead of the new ones.
+        """
+        self.wait()
+        for step in self.steps():
+            os.remove(self.path(step))
+
+    def _prune(self):
+        if self.keep is None:
+            return
+        for step in self.steps()[:-self.keep]:
+            os.remove(self.path(step))
+
+    def steps(self):
+        """
+        Steps of the checkpoints on disk.
+
+        Returns:
+            list: Sorted step numbers
+        """
+        steps = []
+        for name in os.listdir(self.directory):
+            match = _CHECKPOINT_NAME.match(name)
+            if match:
+                steps.append(int(match.group(1)))
+        return sorted(steps)
+
+    def load(self, step=None):
+        """
+        Read a checkpoint.
+
+        Args:
+            step (int, optional): Checkpoint to read (default: the newest)
+
+        Returns:
+            dict: The saved state, or None if there is no checkpoint
+        """
+        if step is None:
+            steps = self.steps()
+            if not steps:
+                return None
+            step = steps[-1]
+        with open(self.path(step), 'rb') as f:
+            return pickle.load(f)
@@ -0,0 +1,380 @@
+"""
+Streaming training data from game records.
+
+Stored rounds (see Tarneeb.GameRecord) are read in chunks, encoded into
+model inputs by a pool of worker processes, shuffled through a bounded
+buffer and grouped into large batches for model.fit, so offline training
+does not depend on playing games and keeps every core busy.
+
+Encodings match the live game:
+- bidding rows (64): TarneebPlayer.biddingInputs as called by
+  Bidding.bidTables, one row per seat, target (tricks - 2) / 11 as in
+  TarneebPlayer.predictionY
+- playing rows (68): Turn.turn_to_matrices as called by GTarneeb.playRound
+  after each turn, one row per played card, target Card.card_to_matrix;
+  the playing model reads 52-step windows of these rows (Tarneeb.Sequences)
+
+Usage:
+    gen = biddingDataset(['games.trn'], repeat=True)
+    model.fit(gen, steps_per_epoch=stepsPerEpoch(['games.trn'], 'bidding'))
+
+    python -m Tarneeb.Dataset games.trn --kind playing --epochs 3
+"""
+
+import argparse
+import collections
+import multiprocessing
+import os
+
+import numpy as np
+
+from Cards.Bitboard import HAND_ORDER
+from Cards.Encoding import CARD_FEATURES, HAND_SIZE, TRICK_SIZE, playingInput
+from constants import (BIDDING_INPUT_DIM, DATASET_BATCH_SIZE, PLAYING_INPUT_DIM,
+                       SHUFFLE_BUFFER_SIZE, TOTAL_CARDS)
+from Tarneeb.BatchEngine import trickWinners
+from Tarneeb.GameRecord import countRecords, readRecords
+from Tarneeb.Sequences import TIMESTEPS, padRows, roundWindows
+
+# Rows produced per record
+ROWS_PER_RECORD = {'bidding': 4, 'playing': TOTAL_CARDS}
+
+
+def _handIds(hands, length=HAND_SIZE):
+    """Card ids of boolean hand masks, in hand order (Bitboard.handIds), -1 padded."""
+    order = np.argsort(~hands[..., HAND_ORDER], axis=-1, kind='stable')[..., :length]
+    ids = HAND_ORDER[order]
+    ids[np.arange(length) >= hands.sum(axis=-1, keepdims=True)] = -1
+    return ids
+
+
+def biddingArrays(records):
+    """
+    Encode the bidding samples of records.
+
+    Args:
+        records (np.ndarray): (n,) GameRecord.RECORD_DTYPE array
+
+    Returns:
+        tuple: (X, Y) float32 arrays of shapes (4n, 64) and (4n, 1)
+    """
+    n = len(records)
+    deal = records['deal'].astype(np.int64).reshape(n, 4, 13)
+    X = np.zeros((n, 4, BIDDING_INPUT_DIM), dtype=np.float32)
+    np.put_along_axis(X[..., :52], deal, 1, axis=-1)
+    X[..., 52:56] = records['scores'][:, None, :] / 41.0
+    # Seat i sees the bids of seats 0..i-1 (Bidding.bidTables)
+    X[..., 56:60] = records['bids'][:, None, :] * np.tri(4, 4, -1)
+    X[np.arange(n), :, 60 + records['tarneeb'].astype(np.int64)] = 1
+    Y = (records['tricks'].astype(np.float32) - 2) / (13 - 2)
+    return X.reshape(4 * n, BIDDING_INPUT_DIM), Y.reshape(4 * n, 1)
+
+
+def playingArrays(records):
+    """
+    Encode the playing rows of records.
+
+    Args:
+        records (np.ndarray): (n,) GameRecord.RECORD_DTYPE array
+
+    Returns:
+        tuple: (X, Y) float32 arrays of shapes (n, 52, 68) and (n, 52, 4),
+               rows in playing order
+    """
+    n = len(records)
+    rows = np.arange(n)
+    tarneeb = records['tarneeb'].astype(np.int64)
+    plays = records['plays'].astype(np.int64).reshape(n, 13, 4)
+    bids = records['bids'].astype(np.float64)
+    scores = records['scores'] / 41.0
+    hands = np.zeros((n, 4, 52), dtype=bool)
+    hands[rows[:, None], np.arange(52)[None, :] // 13, records['deal']] = True
+    won = np.zeros((n, 4))
+    leader = np.zeros(n, dtype=np.int64)
+
+    # Cards played before each position of a turn, left aligned
+    before = np.tri(4, TRICK_SIZE, -1, dtype=bool)
+
+    X = np.zeros((n, TOTAL_CARDS, PLAYING_INPUT_DIM), dtype=np.float32)
+    context = np.empty((n, 4, 4))
+    for j in range(13):
+        trick = plays[:, j]
+        seats = (leader[:, None] + np.arange(4)) % 4
+        hands[rows[:, None], seats, trick] = False
+        leader = seats[rows, trickWinners(trick, tarneeb)]
+        won[rows, leader] += 1
+
+        seat_bids = bids[rows[:, None], seats]
+        context[..., 0] = seat_bids / 13
+        context[..., 1] = scores[rows[:, None], seats]
+        np.divide(won[rows[:, None], seats], seat_bids, out=context[..., 2],
+                  where=seat_bids > 0)
+        context[..., 2][seat_bids == 0] = 0
+        context[..., 3] = trick % 4 == tarneeb[:, None]
+        played = np.where(before, trick[:, None, :TRICK_SIZE], -1)
+        playingInput(context, _handIds(hands[rows[:, None], seats]), played,
+                     out=X[:, 4 * j:4 * j + 4])
+    Y = CARD_FEATURES[plays.reshape(n, TOTAL_CARDS)].astype(np.float32)
+    return X, Y
+
+
+def _encode(job):
+    kind, records = job
+    if kind == 'bidding':
+        return biddingArrays(records)
+    return playingArrays(records)
+
+
+def recordChunks(paths, chunk_size=1024, repeat=False):
+    """
+    Stream records from several files.
+
+    Args:
+        paths (list): Record files
+        chunk_size (int): Records per chunk (default: 1024)
+        repeat (bool): Start over at the end of the files (default: False)
+
+    Yields:
+        np.ndarray: RECORD_DTYPE chunks
+    """
+    while True:
+        for path in paths:
+            yield from readRecords(path, chunk_size)
+        if not repeat:
+            return
+
+
+def encodedChunks(kind, chunks, workers=None, prefetch=None):
+    """
+    Encode record chunks in worker processes.
+
+    At most prefetch chunks are pending at once, so reading never runs
+    far ahead of training.
+
+    Args:
+        kind (str): 'bidding' or 'playing'
+        chunks (iterable): RECORD_DTYPE chunks
+        workers (int, optional): Worker processes (default: CPU count, 0 to
+                                 encode in this process)
+        prefetch (int, optional): Pending chunks (default: 2 * workers)
+
+    Yields:
+        tuple: (X, Y) encoded chunks, in completion order
+    """
+    workers = os.cpu_count() if workers is None else workers
+    if workers == 0:
+        for records in chunks:
+            yield _encode((kind, records))
+        return
+    prefetch = 2 * workers if prefetch is None else prefetch
+    with multiprocessing.get_context('spawn').Pool(workers) as pool:
+        pending = collections.deque()
+        for records in chunks:
+            pending.append(pool.apply_async(_encode, ((kind, np.array(records)),)))
+            if len(pending) >= prefetch:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def shuffleBuffer(chunks, buffer_size=SHUFFLE_BUFFER_SIZE, rng=None):
+    """
+    Shuffle samples through a bounded buffer.
+
+    Incoming samples are added to the buffer; once it holds more than
+    buffer_size samples the excess is drawn at random and emitted. The
+    remaining samples are emitted shuffled at the end.
+
+    Args:
+        chunks (iterable): (X, Y) arrays with samples along the first axis
+        buffer_size (int): Samples kept in the buffer
+        rng (np.random.Generator, optional): Random generator
+
+    Yields:
+        tuple: (X, Y) arrays of shuffled samples
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    X = Y = None
+    for x, y in chunks:
+        X = x if X is None else np.concatenate((X, x))
+        Y = y if Y is None else np.concatenate((Y, y))
+        if len(X) > buffer_size:
+            out = rng.permutation(len(X))
+            keep, out = out[:buffer_size], out[buffer_size:]
+            yield X[out], Y[out]
+            X, Y = X[keep], Y[keep]
+    if X is not None and len(X):
+        order = rng.permutation(len(X))
+        yield X[order], Y[order]
+
+
+def batches(chunks, batch_size=DATASET_BATCH_SIZE):
+    """
+    Regroup chunks of samples into batches of batch_size.
+
+    Args:
+        chunks (iterable): (X, Y) arrays with samples along the first axis
+        batch_size (int): Samples per batch; the last one may be smaller
+
+    Yields:
+        tuple: (Xbatch, Ybatch)
+    """
+    X = Y = None
+    for x, y in chunks:
+        X = x if X is None else np.concatenate((X, x))
+        Y = y if Y is None else np.concatenate((Y, y))
+        end = len(X) - len(X) % batch_size
+        for start in range(0, end, batch_size):
+            yield X[start:start + batch_size], Y[start:start + batch_size]
+        X, Y = X[end:], Y[end:]
+    if X is not None and len(X):
+        yield X, Y
+
+
+def _windowBatches(chunks, rng, batch_size, timesteps=TIMESTEPS):
+    """
+    Cut round chunks into batches of shuffled LSTM windows.
+
+    The windows of a chunk stay a strided view (Sequences.roundWindows);
+    only the windows of one batch are copied at a time. The windows left
+    at the end of a chunk start the next batch.
+    """
+    rest = None
+    for X, Y in chunks:
+        windows = roundWindows(padRows(X, timesteps), timesteps)
+        r, i = np.divmod(rng.permutation(len(X) * TOTAL_CARDS), TOTAL_CARDS)
+        start = 0
+        if rest is not None:
+            start = min(batch_size - len(rest[0]), len(r))
+            rest = (np.concatenate((rest[0], windows[r[:start], i[:start]])),
+                    np.concatenate((rest[1], Y[r[:start], i[:start]])))
+            if len(rest[0]) < batch_size:
+                continue
+            yield rest
+            rest = None
+        end = start + (len(r) - start) // batch_size * batch_size
+        for s in range(start, end, batch_size):
+            b = slice(s, s + batch_size)
+            yield windows[r[b], i[b]], Y[r[b], i[b]]
+        if end < len(r):
+            rest = windows[r[end:], i[end:]], Y[r[end:], i[end:]]
+    if rest is not None:
+        yield rest
+
+
+def biddingDataset(paths, batch_size=DATASET_BATCH_SIZE, buffer_size=SHUFFLE_BUFFER_SIZE,
+                   workers=None, repeat=False, chunk_size=1024, seed=None):
+    """
+    Bidding model batches from record files.
+
+    Args:
+        paths (list): Record files
+        batch_size (int): Rows per batch
+        buffer_size (int): Rows in the shuffle buffer
+        workers (int, optional): Encoding processes (default: CPU count)
+        repeat (bool): Loop over the files forever (default: False)
+        chunk_size (int): Records encoded per task (default: 1024)
+        seed (int, optional): Shuffle seed
+
+    Yields:
+        tuple: (X, Y) of shapes (b, 64) and (b, 1)
+    """
+    rng = np.random.default_rng(seed)
+    chunks = encodedChunks('bidding', recordChunks(paths, chunk_size, repeat), workers)
+    yield from batches(shuffleBuffer(chunks, buffer_size, rng), batch_size)
+
+
+def playingDataset(paths, batch_size=DATASET_BATCH_SIZE, buffer_size=SHUFFLE_BUFFER_SIZE,
+                   workers=None, repeat=False, chunk_size=64, seed=None):
+    """
+    Playing model batches of 52-step windows from record files.
+
+    Rounds are shuffled through the buffer (buffer_size counts rows, i.e.
+    buffer_size / 52 rounds), then the windows of each group of
+    chunk_size rounds are emitted in random order. The windows are
+    strided views of the padded rounds and only those of the current
+    batch are copied, i.e. batch_size * 52 * 68 floats.
+
+    Args:
+        paths (list): Record files
+        batch_size (int): Windows per batch
+        buffer_size (int): Rows in the shuffle buffer
+        workers (int, optional): Encoding processes (default: CPU count)
+        repeat (bool): Loop over the files forever (default: False)
+        chunk_size (int): Records encoded per task (default: 64)
+        seed (int, optional): Shuffle seed
+
+    Yields:
+        tuple: (X, Y) of shapes (b, 52, 68) and (b, 4)
+    """
+    rng = np.random.default_rng(seed)
+    chunks = encodedChunks('playing', recordChunks(paths, chunk_size, repeat), workers)
+    rounds = shuffleBuffer(chunks, max(buffer_size // TOTAL_CARDS, 1), rng)
+    yield from _windowBatches(batches(rounds, chunk_size), rng, batch_size)
+
+
+def stepsPerEpoch(paths, kind, batch_size=DATASET_BATCH_SIZE):
+    """
+    Number of batches covering the record files once.
+
+    Args:
+        paths (list): Record files
+        kind (str): 'bidding' or 'playing'
+        batch_size (int): Samples per batch
+
+    Returns:
+        int: Batches per epoch
+    """
+    total = sum(countRecords(p) for p in paths) * ROWS_PER_RECORD[kind]
+    return -(-total // batch_size)
+
+
+def toTfDataset(generator_fn, kind):
+    """
+    Wrap a dataset generator as a prefetching tf.data.Dataset.
+
+    Args:
+        generator_fn (callable): Function without arguments returning a
+                                 biddingDataset or playingDataset generator
+        kind (str): 'bidding' or 'playing'
+
+    Returns:
+        tf.data.Dataset: Dataset of (X, Y) batches
+    """
+    import tensorflow as tf
+    if kind == 'bidding':
+        shapes = ((None, BIDDING_INPUT_DIM), (None, 1))
+    else:
+        shapes = ((None, TIMESTEPS, PLAYING_INPUT_DIM), (None, 4))
+    signature = tuple(tf.TensorSpec(shape=s, dtype=tf.float32) for s in shapes)
+    return tf.data.Dataset.from_generator(generator_fn, output_signature=signature).prefetch(
+        tf.data.AUTOTUNE)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train a model offline from game records')
+    parser.add_argument('records', nargs='+', help='game record files')
+    parser.add_argument('--kind', choices=sorted(ROWS_PER_RECORD), default='bidding')
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=DATASET_BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', help='file to save the trained model to')
+    args = parser.parse_args(argv)
+
+    if args.kind == 'bidding':
+        import GenModel
+        model = GenModel.Model()
+        dataset = biddingDataset
+    else:
+        from Tarneeb.GTarneeb import buildPlayingModel
+        model = buildPlayingModel()
+        dataset = playingDataset
+    model.fit(dataset(args.records, args.batch_size, workers=args.workers, repeat=True),
+              steps_per_epoch=stepsPerEpoch(args.records, args.kind, args.batch_size),
+              epochs=args.epochs, verbose=2)
+    if args.output:
+        model.save(args.output)
+
+
+if __name__ == '__main__':
+    main()
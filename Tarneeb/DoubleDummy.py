@@ -0,0 +1,539 @@
+"""
+Double-dummy solver for Tarneeb.
+
+Given all four hands, the tarneeb (trump) type and the leader, the solver
+computes the number of tricks each side takes when every player plays
+perfectly with full knowledge of all hands. It is used to label deals
+with a noise-free target instead of the outcome of random play.
+
+Double-dummy results are per side: how the tricks of a side are shared
+between partners is not determined. sideBiddingTargets therefore gives
+each seat its side's tricks, on another scale than the own tricks of
+TarneebPlayer.predictionY and Evolution.sharedDeals; the two targets must
+not be mixed when training the same bidding models.
+
+The search is an alpha-beta minimax over bitboard hands (see
+Cards.Bitboard) with:
+- a transposition table of lower/upper bounds at trick boundaries, kept
+  across the searches of one deal. An entry only records who holds the
+  outstanding cards down to the lowest card that won a trick by rank in
+  its subtree, so it is reused by every position that differs below that
+  rank
+- move ordering: the best lead found by an earlier search of the
+  position, cashing winners and leading towards partner's winners, then,
+  in the turn, the cheapest card that secures it, that overtakes the
+  opponents, or else the lowest card
+- rank-equivalence pruning: cards of the same type with no outstanding card
+  between them are only searched once
+- quick-trick and sure-tarneeb bounds that cut positions without search
+
+Tricks are resolved with the rule of Turn.winner (Turn.cardBeats).
+
+Seats 0 and 2 are partners against seats 1 and 3, as in GTarneeb.
+
+The search runs in pure Python. Positions of up to 8 cards per hand solve
+in milliseconds, so endgames can be labeled in bulk, but a complete 13-card
+deal still takes seconds to minutes depending on the deal: labeling
+thousands of full deals per second needs a compiled solver. This one is
+exact and suited to endgames, tests and small labeled sets.
+"""
+
+import numpy as np
+
+from Cards.Bitboard import TYPE_MASKS, popcount
+from Tarneeb.Turn import cardBeats
+
+
+def _top(mask):
+    """Highest card id of a non-empty mask."""
+    return mask.bit_length() - 1
+
+
+def _canBeat(hand, lead, card, tarneeb):
+    """Whether a hand holds a legal card beating card, the winner of a turn led in lead."""
+    follow = hand & TYPE_MASKS[lead]
+    if follow:
+        return card & 3 == lead and _top(follow) > card
+    trumps = hand & TYPE_MASKS[tarneeb]
+    if not trumps:
+        return False
+    return card & 3 != tarneeb or _top(trumps) > card
+
+
+def _winningRank(trick, win):
+    """Mask of the winning card of a turn if it won by rank, 0 otherwise."""
+    c = trick[win]
+    for other in trick:
+        if other != c and other & 3 == c & 3:
+            return 1 << c
+    return 0
+
+
+def _holdingInfo(holdings):
+    """
+    Lengths and owners of the cards of one type.
+
+    Args:
+        holdings (int): The cards of one type of each seat, seat s in bits
+                        52*s to 52*s+51
+
+    Returns:
+        tuple: (length of each seat in 4 bits, seat s at bit 4*s; seat of
+                each outstanding card in 2 bits, the highest card first)
+    """
+    fields = [(holdings >> (52 * s)) & ((1 << 52) - 1) for s in range(4)]
+    lengths = 0
+    for s in range(4):
+        lengths |= popcount(fields[s]) << (4 * s)
+    remaining = fields[0] | fields[1] | fields[2] | fields[3]
+    owners = 0
+    i = 0
+    while remaining:
+        top = 1 << (remaining.bit_length() - 1)
+        for s in range(4):
+            if fields[s] & top:
+                owners |= s << (2 * i)
+        remaining ^= top
+        i += 1
+    return lengths, owners
+
+
+class DoubleDummySolver:
+    """
+    Alpha-beta double-dummy solver with a transposition table.
+
+    Hands are card masks (see Cards.Bitboard). The transposition table is
+    keyed by the leader and the length of every holding; under each key,
+    entries are grouped by how many top outstanding cards of each type
+    they match, then by who holds those cards (e.g. a King is an Ace once
+    the Ace is played).
+
+    Attributes:
+        tarneeb (int): Tarneeb type id of the deal being solved
+        table (dict): Transposition table,
+            key -> owner masks -> owners -> (lower, upper, best lead)
+        nodes (int): Number of searched positions since the last solve
+    """
+
+    def __init__(self):
+        """Initialize an empty solver."""
+        self.tarneeb = 0
+        self.table = {}
+        self.nodes = 0
+        self._holdings = {}
+
+    def solve(self, hands, tarneeb, leader=0):
+        """
+        Compute the tricks won by each side with perfect play.
+
+        Args:
+            hands (list): 4 card masks (see Cards.Bitboard) of equal size
+            tarneeb (int or CardType): Tarneeb type (id)
+            leader (int): Seat leading the first trick (default: 0)
+
+        Returns:
+            tuple: (tricks of seats 0 and 2, tricks of seats 1 and 3)
+
+        Raises:
+            ValueError: If the hands do not have the same size or overlap
+        """
+        sizes = {popcount(h) for h in hands}
+        if len(sizes) != 1:
+            raise ValueError('All hands must have the same number of cards')
+        n = sizes.pop()
+        if popcount(hands[0] | hands[1] | hands[2] | hands[3]) != 4 * n:
+            raise ValueError('A card is in several hands')
+        self.tarneeb = int(tarneeb)
+        self.table = {}
+        self.nodes = 0
+        hands = list(hands)
+
+        # MTD(f): null-window searches converging on the exact value,
+        # starting from the tricks the leader's side can cash
+        quick = self._quickTricks(hands, leader, n)[0]
+        lower, upper = 0, n
+        guess = quick if not leader & 1 else n - quick
+        while lower < upper:
+            beta = guess + 1 if guess == lower else guess
+            guess = self._search(hands, leader, beta - 1, beta)[0]
+            if guess < beta:
+                upper = guess
+            else:
+                lower = guess
+        return lower, n - lower
+
+    def solveDeal(self, deal, tarneeb=None, leader=0):
+        """
+        Solve a deal given as a permutation of card ids.
+
+        Args:
+            deal (array-like): 52 card ids, seat i holds deal[13*i:13*(i+1)]
+            tarneeb (int, optional): Tarneeb type id (default: type of the
+                                     last card, as in GTarneeb)
+            leader (int): Seat leading the first trick (default: 0)
+
+        Returns:
+            tuple: (tricks of seats 0 and 2, tricks of seats 1 and 3)
+        """
+        deal = [int(c) for c in deal]
+        hands = [0, 0, 0, 0]
+        for i, c in enumerate(deal):
+            hands[i // 13] |= 1 << c
+        if tarneeb is None:
+            tarneeb = deal[51] & 3
+        return self.solve(hands, tarneeb, leader)
+
+    def _suits(self, hands):
+        """
+        Holdings of each type: (lengths, owners) with the length held by
+        each seat in 4 bits and the seat of every outstanding card in 2
+        bits, the highest card first.
+        """
+        h0, h1, h2, h3 = hands
+        suits = []
+        for m in TYPE_MASKS:
+            holdings = (h0 & m) | (h1 & m) << 52 | (h2 & m) << 104 | (h3 & m) << 156
+            info = self._holdings.get(holdings)
+            if info is None:
+                info = self._holdings[holdings] = _holdingInfo(holdings)
+            suits.append(info)
+        return suits
+
+    def _search(self, hands, leader, alpha, beta):
+        """
+        Tricks of seats 0 and 2 from a trick boundary, within [alpha, beta].
+
+        Returns:
+            tuple: (value, mask of the cards whose rank the value relies on)
+        """
+        n = popcount(hands[0])
+        if n == 0:
+            return 0, 0
+        suits = self._suits(hands)
+        key = leader | suits[0][0] << 2 | suits[1][0] << 18 | suits[2][0] << 34 | suits[3][0] << 50
+        o0, o1, o2, o3 = suits[0][1], suits[1][1], suits[2][1], suits[3][1]
+        lower, upper, first, ranks = 0, n, -1, 0
+        entries = self.table.get(key)
+        if entries is not None:
+            for masks, bounds in entries.items():
+                m0, m1, m2, m3 = masks
+                e = bounds.get((o0 & m0, o1 & m1, o2 & m2, o3 & m3))
+                if e is not None:
+                    if e[0] > lower or e[1] < upper:
+                        lower = max(lower, e[0])
+                        upper = min(upper, e[1])
+                        ranks |= self._topCards(hands, masks)
+                    if first < 0:
+                        first = e[2]
+
+        # Tricks the leader can cash at once and tarneeb cards that no
+        # opponent can beat bound the result
+        quick, quick_ranks = self._quickTricks(hands, leader, n)
+        (sure_ns, ns_ranks), (sure_ew, ew_ranks) = self._sureTarneebs(hands)
+        if leader & 1:
+            if quick > sure_ew:
+                sure_ew, ew_ranks = quick, quick_ranks
+        elif quick > sure_ns:
+            sure_ns, ns_ranks = quick, quick_ranks
+        if sure_ns > lower:
+            lower = sure_ns
+            ranks |= ns_ranks
+        if n - sure_ew < upper:
+            upper = n - sure_ew
+            ranks |= ew_ranks
+
+        if lower >= beta:
+            return lower, ranks
+        if upper <= alpha or lower == upper:
+            return upper, ranks
+        alpha = max(alpha, lower)
+        beta = min(beta, upper)
+
+        if n == 1:
+            # Last trick: the cards are forced
+            value, found = self._lastTrick(hands, leader)
+            first = -1
+        else:
+            value, first, found = self._play(hands, leader, (), None, alpha, beta, first)
+        ranks |= found
+
+        if value <= alpha:
+            upper = value
+        elif value >= beta:
+            lower = value
+        else:
+            lower = upper = value
+        self._store(key, hands, suits, ranks, lower, upper, first)
+        return value, ranks
+
+    @staticmethod
+    def _topCards(hands, masks):
+        """Cards of a position matched by the owner masks of an entry."""
+        remaining = hands[0] | hands[1] | hands[2] | hands[3]
+        ranks = 0
+        for t, m in enumerate(TYPE_MASKS):
+            k = masks[t].bit_length() // 2
+            cards = remaining & m
+            for _ in range(k):
+                top = 1 << (cards.bit_length() - 1)
+                ranks |= top
+                cards ^= top
+        return ranks
+
+    def _store(self, key, hands, suits, ranks, lower, upper, first):
+        """Add a transposition table entry matching the top cards of ranks."""
+        remaining = hands[0] | hands[1] | hands[2] | hands[3]
+        masks = []
+        for m in TYPE_MASKS:
+            relevant = ranks & m
+            if relevant:
+                # Every outstanding card from the lowest relevant one up
+                low = relevant & -relevant
+                masks.append((1 << (2 * popcount(remaining & m & ~(low - 1)))) - 1)
+            else:
+                masks.append(0)
+        masks = tuple(masks)
+        owners = tuple(o & mask for (_, o), mask in zip(suits, masks))
+        bounds = self.table.setdefault(key, {}).setdefault(masks, {})
+        e = bounds.get(owners)
+        if e is not None:
+            lower, upper = max(lower, e[0]), min(upper, e[1])
+        bounds[owners] = (lower, upper, first)
+
+    def _lastTrick(self, hands, leader):
+        """Tricks of seats 0 and 2 in the last trick, and the winning rank."""
+        trick = [hands[(leader + k) & 3].bit_length() - 1 for k in range(4)]
+        win = 0
+        for k in (1, 2, 3):
+            if cardBeats(trick[k], trick[win], self.tarneeb):
+                win = k
+        return (0 if (leader + win) & 1 else 1), _winningRank(trick, win)
+
+    def _quickTricks(self, hands, leader, n):
+        """
+        Lower bound on the tricks the leader's side wins by cashing top cards.
+
+        The leader cashes, type by type, the top outstanding cards held in
+        their own hand. Outside the tarneeb type, a cash is only counted
+        while each opponent holding tarneeb cards must still follow.
+
+        Returns:
+            tuple: (tricks, mask of the cashed cards)
+        """
+        hand = hands[leader]
+        remaining = hands[0] | hands[1] | hands[2] | hands[3]
+        trump = TYPE_MASKS[self.tarneeb]
+        opponents = [o for o in (hands[(leader + 1) & 3], hands[(leader + 3) & 3])
+                     if o & trump]
+        total = 0
+        ranks = 0
+        for m in TYPE_MASKS:
+            r = remaining & m
+            h = hand & m
+            count = 0
+            while r:
+                top = 1 << (r.bit_length() - 1)
+                if not h & top:
+                    break
+                count += 1
+                r ^= top
+                ranks |= top
+            if count and m != trump:
+                for o in opponents:
+                    count = min(count, popcount(o & m))
+            total += count
+        return min(total, n), ranks
+
+    def _sureTarneebs(self, hands):
+        """
+        Lower bounds on the tricks of each side from top tarneeb cards.
+
+        A tarneeb card higher than every tarneeb card of the opponents wins
+        its trick for its side whenever it is played, and one hand plays its
+        cards in different tricks.
+
+        Returns:
+            tuple: (sure tricks, mask of those cards) of seats 0 and 2, then
+                   of seats 1 and 3
+        """
+        trump = TYPE_MASKS[self.tarneeb]
+        t0, t1, t2, t3 = [h & trump for h in hands]
+        ns, ew = t0 | t2, t1 | t3
+        # Cards above the highest opposing tarneeb card
+        above_ew = ns & ~((1 << ew.bit_length()) - 1)
+        above_ns = ew & ~((1 << ns.bit_length()) - 1)
+        return ((max(popcount(t0 & above_ew), popcount(t2 & above_ew)), above_ew),
+                (max(popcount(t1 & above_ns), popcount(t3 & above_ns)), above_ns))
+
+    def _distinct(self, hands, seat, legal, trick):
+        """Legal cards of seat without cards equivalent to a higher one kept."""
+        outstanding = (hands[0] | hands[1] | hands[2] | hands[3]) & ~hands[seat]
+        for c in trick:
+            outstanding |= 1 << c
+        moves = []
+        for m in TYPE_MASKS:
+            cards = legal & m
+            previous = -1
+            while cards:
+                c = cards.bit_length() - 1
+                cards ^= 1 << c
+                # Skip cards equivalent to the previous (higher) one
+                if previous < 0 or outstanding & m & ((1 << previous) - (1 << (c + 1))):
+                    moves.append(c)
+                previous = c
+        return moves
+
+    def _leadOrder(self, hands, seat, moves):
+        """Sort leads: cash winners, lead towards partner's winners, then low cards."""
+        tarneeb = self.tarneeb
+        trump = TYPE_MASKS[tarneeb]
+        partner = hands[(seat + 2) & 3]
+        lho, rho = hands[(seat + 1) & 3], hands[(seat + 3) & 3]
+        everyone = hands[0] | hands[1] | hands[2] | hands[3]
+        scores = {}
+        for c in moves:
+            t = c & 3
+            m = TYPE_MASKS[t]
+            # Opponents void in the type with tarneeb cards can ruff it
+            ruffed = t != tarneeb and any(not o & m and o & trump for o in (lho, rho))
+            top = _top(everyone & m)
+            if c == top and not ruffed:
+                score = 100
+            elif partner & (1 << top) and not ruffed:
+                score = 80 - (c >> 2)
+            elif ruffed:
+                score = -20 - (c >> 2)
+            else:
+                score = 40 - (c >> 2)
+            scores[c] = score
+        moves.sort(key=scores.__getitem__, reverse=True)
+
+    def _moves(self, hands, seat, trick, winCard):
+        """Legal, non-equivalent cards of seat in search order."""
+        hand = hands[seat]
+        if not trick:
+            moves = self._distinct(hands, seat, hand, trick)
+            self._leadOrder(hands, seat, moves)
+            return moves
+
+        lead = trick[0] & 3
+        legal = hand & TYPE_MASKS[lead] or hand
+        moves = self._distinct(hands, seat, legal, trick)
+        if len(moves) == 1:
+            return moves
+
+        tarneeb = self.tarneeb
+        pos = len(trick)
+        # Opponents still to play in this turn
+        later = [hands[(seat + k) & 3] for k in range(1, 4 - pos) if k & 1]
+        win, win_pos = winCard
+        partner_wins = not (pos - win_pos) & 1
+
+        def order(c):
+            if cardBeats(c, win, tarneeb):
+                best, ours = c, True
+            else:
+                best, ours = win, partner_wins
+            if ours and not any(_canBeat(o, lead, best, tarneeb) for o in later):
+                # Secures the turn: cheapest such card first
+                return (0, c >> 2)
+            # Otherwise overtake the opponents if possible, as cheaply as
+            # possible, else play low
+            return (1 if best == c and not partner_wins else 2, c >> 2)
+
+        moves.sort(key=order)
+        return moves
+
+    def _play(self, hands, leader, trick, winCard, alpha, beta, first=-1):
+        """
+        Search the remaining plays of the current trick.
+
+        Returns the value, the card played by the current seat that reached
+        it and the mask of the cards whose rank the value relies on. A first
+        card (the best lead found by an earlier search of the position) is
+        tried before the others when it is in hand.
+        """
+        self.nodes += 1
+        pos = len(trick)
+        seat = (leader + pos) & 3
+        maximizing = not seat & 1
+
+        moves = self._moves(hands, seat, trick, winCard)
+        if first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+
+        best = -1 if maximizing else 14
+        best_card = -1
+        ranks = 0
+        for c in moves:
+            if winCard is None or cardBeats(c, winCard[0], self.tarneeb):
+                win = (c, pos)
+            else:
+                win = winCard
+            hands[seat] ^= 1 << c
+            if pos < 3:
+                v, _, found = self._play(hands, leader, trick + (c,), win, alpha, beta)
+            else:
+                winner = (leader + win[1]) & 3
+                won = 0 if winner & 1 else 1
+                v, found = self._search(hands, winner, alpha - won, beta - won)
+                v += won
+                found |= _winningRank(trick + (c,), win[1])
+            hands[seat] ^= 1 << c
+            ranks |= found
+
+            if maximizing:
+                if v > best:
+                    best, best_card = v, c
+                    if best > alpha:
+                        alpha = best
+            else:
+                if v < best:
+                    best, best_card = v, c
+                    if best < beta:
+                        beta = best
+            if alpha >= beta:
+                break
+        return best, best_card, ranks
+
+
+def solveDeals(deals, tarneebs=None, leader=0):
+    """
+    Solve many deals given as card id permutations.
+
+    Args:
+        deals (np.ndarray): (N, 52) card ids, seat i holds 13*i..13*i+12
+        tarneebs (np.ndarray, optional): (N,) tarneeb type ids (default: type
+                                         of the last card of each deal)
+        leader (int): Seat leading the first trick (default: 0)
+
+    Returns:
+        np.ndarray: (N, 2) tricks of seats 0/2 and of seats 1/3
+    """
+    solver = DoubleDummySolver()
+    ret = np.zeros((len(deals), 2), dtype=np.int8)
+    for i, deal in enumerate(deals):
+        tarneeb = None if tarneebs is None else tarneebs[i]
+        ret[i] = solver.solveDeal(deal, tarneeb, leader)
+    return ret
+
+
+def sideBiddingTargets(deals, tarneebs=None, leader=0):
+    """
+    Side bidding targets of each seat from double-dummy results.
+
+    Each seat gets the tricks of its side (not its own tricks, see the
+    module docstring), scaled as TarneebPlayer.predictionY:
+    (tricks - 2) / (13 - 2).
+
+    Args:
+        deals (np.ndarray): (N, 52) card ids
+        tarneebs (np.ndarray, optional): (N,) tarneeb type ids
+        leader (int): Seat leading the first trick (default: 0)
+
+    Returns:
+        np.ndarray: (N, 4) targets, one per seat
+    """
+    tricks = solveDeals(deals, tarneebs, leader)
+    return (tricks[:, [0, 1, 0, 1]] - 2) / (13 - 2)
@@ -0,0 +1,282 @@
+"""
+Parallel neuroevolution of bidding network architectures.
+
+A Population holds GenModel architectures (GenModel.randomSpec). Every
+generation, the candidates not yet scored are trained and scored in worker
+processes, the best ones (the elite) are kept, and the rest of the
+population is replaced by mutations of the elite (GenModel.mutateSpec),
+which use the same normal-law operators as GenModel.Model.
+
+All candidates are scored on the same fixed deals, generated once by
+sharedDeals and sent to every worker when the pool starts, so a generation
+only costs the training of its new candidates. Each deal is played
+several times by BatchEngine with random legal cards; the bidding target
+of a seat is its mean number of tricks, encoded as in Dataset.biddingArrays.
+The fitness of a candidate is minus its mean squared error on the
+validation deals after a fixed number of training epochs.
+
+Usage:
+    with Population(size=16, elite=4, workers=8, seed=1) as population:
+        population.run(10)
+        model = population.bestModel()
+
+    python -m Tarneeb.Evolution --generations 10 --size 16 --workers 8
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+
+import numpy as np
+
+import GenModel
+from constants import BIDDING_INPUT_DIM
+from Tarneeb.BatchEngine import play_rounds, randomPolicy, shuffledDeals
+from Tarneeb.Dataset import biddingArrays
+from Tarneeb.GameRecord import recordsFromBatch
+
+
+def sharedDeals(n, playouts=4, rng=None):
+    """
+    Bidding samples of n deals with targets averaged over random playouts.
+
+    Args:
+        n (int): Number of deals
+        playouts (int): Random playouts of every deal (default: 4)
+        rng (np.random.Generator, optional): Random generator
+
+    Returns:
+        tuple: (X, Y) float32 arrays of shapes (4n, 64) and (4n, 1)
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    deals = shuffledDeals(n, rng)
+    policy = randomPolicy(rng)
+    tricks = np.zeros((n, 4))
+    for _ in range(playouts):
+        batch = play_rounds(n, policy, deals=deals)
+        tricks += batch.tricks
+        records = recordsFromBatch(batch, np.zeros((n, 4), dtype=np.uint8))
+    X, _ = biddingArrays(records)
+    Y = (tricks / playouts - 2) / (13 - 2)
+    return X, Y.reshape(4 * n, 1).astype(np.float32)
+
+
+# Deals of the worker process, set by _initWorker
+_data = None
+
+
+def _initWorker(data):
+    """Store the shared deals and keep each worker on one core."""
+    global _data
+    _data = data
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(1)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def evaluateSpec(job):
+    """
+    Train an architecture on the shared deals and score it.
+
+    Args:
+        job (tuple): (spec, seed, epochs, batch_size)
+
+    Returns:
+        tuple: (fitness, weights) where fitness is minus the validation
+               mean squared error
+    """
+    import keras
+    spec, seed, epochs, batch_size = job
+    X, Y, X_val, Y_val = _data
+    # Workers build many models: drop the graphs of the previous ones
+    keras.backend.clear_session()
+    keras.utils.set_random_seed(seed)
+    model = GenModel.modelFromSpec(spec)
+    model.fit(X, Y, epochs=epochs, batch_size=batch_size, verbose=0)
+    prediction = np.asarray(model.predict(X_val, batch_size=4096, verbose=0))
+    mse = float(np.mean((prediction - Y_val) ** 2))
+    # Diverging networks score the worst possible fitness
+    return (-mse if np.isfinite(mse) else -np.inf), model.get_weights()
+
+
+class Population:
+    """
+    Architectures of bidding networks evolved in parallel.
+
+    Attributes:
+        specs (list): Architecture of every candidate
+        fitness (list): Fitness of every candidate, None until evaluated
+        weights (list): Trained weights of every candidate, None until evaluated
+        elite (int): Candidates kept from one generation to the next
+        generation (int): Generations completed
+        history (list): Best and mean fitness of every generation
+    """
+
+    def __init__(self, size=16, elite=4, workers=None, train_deals=4096, val_deals=1024,
+                 playouts=4, epochs=3, batch_size=256, minsigma=2, layers=1, seed=None):
+        """
+        Initialize a random population and its shared deals.
+
+        Args:
+            size (int): Number of candidates (default: 16)
+            elite (int): Candidates kept every generation (default: 4)
+            workers (int, optional): Worker processes (default: CPU count,
+                                     0 to evaluate in this process)
+            train_deals (int): Training deals (default: 4096)
+            val_deals (int): Validation deals (default: 1024)
+            playouts (int): Random playouts per deal (default: 4)
+            epochs (int): Training epochs per candidate (default: 3)
+            batch_size (int): Training batch size (default: 256)
+            minsigma (float): Activation mutation threshold (default: 2)
+            layers (int): Target hidden layers of new candidates (default: 1)
+            seed (int, optional): Seed of the deals, architectures and
+                                  training
+        """
+        if not 0 < elite <= size:
+            raise ValueError('elite must be between 1 and size')
+        self.rng = np.random.default_rng(seed)
+        if seed is not None:
+            # GenModel draws architectures from the global generators
+            random.seed(seed)
+            np.random.seed(seed)
+        self.elite = elite
+        self.workers = os.cpu_count() if workers is None else workers
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.minsigma = minsigma
+        self.data = sharedDeals(train_deals, playouts, self.rng) + \
+            sharedDeals(val_deals, playouts, self.rng)
+        self.specs = [GenModel.randomSpec(layers, BIDDING_INPUT_DIM) for _ in range(size)]
+        self.fitness = [None] * size
+        self.weights = [None] * size
+        self.generation = 0
+        self.history = []
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def evaluate(self):
+        """Train and score every candidate not evaluated yet."""
+        todo = [i for i, f in enumerate(self.fitness) if f is None]
+        jobs = [(self.specs[i], int(self.rng.integers(2 ** 31)), self.epochs, self.batch_size)
+                for i in todo]
+        if not self.workers:
+            global _data
+            _data = self.data
+            results = map(evaluateSpec, jobs)
+        else:
+            if self._pool is None:
+                self._pool = multiprocessing.get_context('spawn').Pool(
+                    self.workers, initializer=_initWorker, initargs=(self.data,))
+            results = self._pool.imap(evaluateSpec, jobs)
+        for i, (fitness, weights) in zip(todo, results):
+            self.fitness[i] = fitness
+            self.weights[i] = weights
+
+    def step(self):
+        """
+        Run one generation: evaluate, keep the elite and mutate it.
+
+        Returns:
+            float: Best fitness of the generation
+        """
+        self.evaluate()
+        order = sorted(range(len(self.specs)), key=lambda i: -self.fitness[i])
+        best = self.fitness[order[0]]
+        self.history.append({'generation': self.generation, 'best': best,
+                             'mean': float(np.mean(self.fitness)),
+                             'spec': self.specs[order[0]]})
+        logging.info("generation %d: best %.5f mean %.5f %s", self.generation, best,
+                     self.history[-1]['mean'], self.specs[order[0]])
+        keep = order[:self.elite]
+        specs = [self.specs[i] for i in keep]
+        fitness = [self.fitness[i] for i in keep]
+        weights = [self.weights[i] for i in keep]
+        for _ in range(len(self.specs) - self.elite):
+            parent = specs[self.rng.integers(self.elite)]
+            specs.append(GenModel.mutateSpec(parent, self.minsigma))
+            fitness.append(None)
+            weights.append(None)
+        self.specs, self.fitness, self.weights = specs, fitness, weights
+        self.generation += 1
+        return best
+
+    def run(self, generations):
+        """
+        Run several generations.
+
+        Args:
+            generations (int): Number of generations
+
+        Returns:
+            list: History of every generation run so far
+        """
+        for _ in range(generations):
+            self.step()
+        return self.history
+
+    def best(self):
+        """
+        Best evaluated candidate.
+
+        Returns:
+            tuple: (spec, fitness, weights)
+        """
+        scored = [i for i, f in enumerate(self.fitness) if f is not None]
+        if not scored:
+            self.evaluate()
+            scored = range(len(self.specs))
+        i = max(scored, key=lambda i: self.fitness[i])
+        return self.specs[i], self.fitness[i], self.weights[i]
+
+    def bestModel(self):
+        """
+        Build the best candidate with its trained weights.
+
+        Returns:
+            keras.models.Sequential: A compiled bidding model
+        """
+        spec, _, weights = self.best()
+        model = GenModel.modelFromSpec(spec)
+        model.set_weights(weights)
+        return model
+
+    def close(self):
+        """Shut down the worker processes, if any."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Evolve bidding network architectures')
+    parser.add_argument('--generations', type=int, default=10)
+    parser.add_argument('--size', type=int, default=16)
+    parser.add_argument('--elite', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--train-deals', type=int, default=4096)
+    parser.add_argument('--val-deals', type=int, default=1024)
+    parser.add_argument('--playouts', type=int, default=4)
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', help='file to save the best model to')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    with Population(args.size, args.elite, args.workers, args.train_deals, args.val_deals,
+                    args.playouts, args.epochs, seed=args.seed) as population:
+        population.run(args.generations)
+        if args.output:
+            population.bestModel().save(args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,10 @@ training for both bidding and playing strategies. It manages:
 Usage:
     python Tarneeb/GTarneeb.py
 
+The module can also be imported: the training loop only runs through
+train() or when executed as a script, so worker processes (see
+Tarneeb.SelfPlay) can reuse the round functions.
+
 Note: This module contains the training loop. For simple games without
 training, see Game.py or example.py.
 """
@@ -19,23 +23,35 @@ import os
 
 from termcolor import colored
 from Cards.StandarDeck import StandarDeck
+from Cards.Dealer import randomSeed
+from Cards.Encoding import typeOneHot
 from Tarneeb.TarneebPlayer import TarneebPlayer
 from Tarneeb.Turn import Turn
+from Tarneeb.Bidding import bidTables
+from Tarneeb.ReplayBuffer import biddingBuffer, playingBuffer
+from Tarneeb.Sequences import emptyRound, padRows, roundWindows, stepsPerEpoch, windowBatches
+from Tarneeb.Profiler import profiler
+from Tarneeb.GameRecord import GameRecordWriter, roundRecord
+from Tarneeb.Checkpoint import CheckpointManager, captureState, restoreState
+from Tarneeb.CardStats import CardStats
+from Tarneeb.WinTable import playingLoss
+from Cards.Bitboard import maskToIds
+from ModelCache import modelCache
 import numpy as np
 import logging
-import keras
 
 logging.basicConfig(level=logging.INFO)
 
 
 # Game >> Round >> Turn
-def distripute_and_bid(players, tarneeb):
+def distripute_and_bid(players, tarneeb, standardeck):
     """
     Distribute cards to players and collect their bids.
     
     This method:
     1. Distributes 13 cards to each player
     2. Collects bids from each player using their neural network
+       (batched per model, see Tarneeb.Bidding.bidTables)
     3. Returns the sum of all bids
     
     The round is cancelled if the sum is less than 11.
@@ -43,29 +59,24 @@ def distripute_and_bid(players, tarneeb):
     Args:
         players (list): List of 4 TarneebPlayer objects
         tarneeb (CardType): The trump suit for this round
+        standardeck (StandarDeck): The shuffled deck to deal from
     
     Returns:
         float: Sum of all player bids
     """
+    # Each player receives cards
+    with profiler.phase('deal'):
+        for p in players:
+            p.setHand(standardeck.distripute(13))
 
-    # Scale scores for neural network input (0-1 range)
-    scaled_scores = []
+    # Bids are made seat by seat, one forward pass per model
+    with profiler.phase('bid'):
+        bidding_sum = bidTables([players], [tarneeb])[0]
     for p in players:
-        scaled_scores.append(p.score / 41.0)
-    
-    bids = np.zeros(4)
-    tbs = np.zeros(4)
-    tbs[tarneeb.id] = 1
-    
-    # Each player receives cards and makes a bid
-    for i in range(4):
-        players[i].setHand(standardeck.distripute(13))
-        players[i].bid(scores=scaled_scores, biddings=bids, tarneeb=tbs)
-        bids[i] = players[i].bidding
-        logging.info(players[i].name + ' bid=' + str(players[i].bidding) + 
-                    ' on hand ' + str(players[i].hand))
+        logging.info(p.name + ' bid=' + str(p.bidding) + 
+                    ' on hand ' + str(p.hand))
     
-    return bids.sum()
+    return bidding_sum
 
 
 def tarneeb_to_array(tarneeb):
@@ -76,11 +87,9 @@ def tarneeb_to_array(tarneeb):
         tarneeb (CardType): The trump suit
     
     Returns:
-        np.ndarray: 4-element one-hot encoded array
+        np.ndarray: 4-element one-hot encoded array (see Encoding.typeOneHot)
     """
-    tbs = np.zeros(4)
-    tbs[tarneeb.id] = 1
-    return tbs
+    return typeOneHot(tarneeb)
 
 
 def clearHands(players):
@@ -90,8 +99,6 @@ def clearHands(players):
     Args:
         players (list): List of TarneebPlayer objects
     """
-    standardeck = StandarDeck(shuffled=True)
-    tarneeb = standardeck.cards[51].type
     for p in players:
         p.prediction = 2
         p.clearHand()
@@ -114,6 +121,8 @@ def playRound(players, tarneeb):
     starter_player = 0
     j = 0
     turns = []
+    for i, p in enumerate(players):
+        p.startRound(i, tarneeb)
     
     # Play all 13 turns
     while len(players[starter_player].hand) > 0:
@@ -121,89 +130,122 @@ def playRound(players, tarneeb):
         current_turn_cards = []
         
         # Each player plays a card
-        for i in range(4):
-            current_turn_cards.append(
-                players[(i + starter_player) % 4].playCard(current_turn_cards)
-            )
+        with profiler.phase('play'):
+            for i in range(4):
+                current_turn_cards.append(
+                    players[(i + starter_player) % 4].playCard(current_turn_cards)
+                )
 
         # Create turn object and determine winner
-        turn = Turn(current_turn_cards, serial=j, 
-                   starting_player_id=starter_player, tarneeb=tarneeb)
+        with profiler.phase('trick'):
+            turn = Turn(current_turn_cards, serial=j, 
+                       starting_player_id=starter_player, tarneeb=tarneeb)
+        profiler.count('turns')
         starter_player = turn.winnerId  # Winner leads next turn
-
-        # Record card statistics for analysis
-        for c in turn.played_cards:
-            k = str(c.value.value)
-            if c == turn.winCard:
-                k += '-W'
-            if c.type == tarneeb:
-                k = 'T-' + k
-            if k in cards_record.keys():
-                cards_record[k] += 1
-            else:
-                cards_record[k] = 1
+        for p in players:
+            p.observeTurn(turn)
 
         logging.info('turn number ' + str(turn))
         players[turn.winnerId].number_of_won_turns += 1
         turns.append(turn)
         logging.info(str(turns))
-        turn.turn_to_matrices(players)
+        with profiler.phase('encode'):
+            turn.inputs = turn.turn_to_matrices(players)
+
+    # Record card statistics for analysis, one bulk update per round
+    plays = [[[c.cardId() for c in turn.played_cards] for turn in turns]]
+    cards_record.addRounds(plays, [[turn.starting_player_id for turn in turns]],
+                           [[turn.winnerId for turn in turns]], [tarneeb.id])
+
+    # Collect loss information from all turns, one table lookup per round
+    logging.debug('turns = ' + str(turns))
+    losses = playingLoss(plays, [tarneeb.id], [[turn.winCardId for turn in turns]],
+                         tricks=[[turn.serial - 1 for turn in turns]])[0]
+    for turn, loss in zip(turns, losses.tolist()):
+        turn.loss = dict(zip(turn.played_cards, loss))
+    
+    return turns
 
-    # Collect loss information from all turns
-    print('turns = ', turns)
-    round_loss = {}
-    for turn in turns:
-        round_loss.update(turn.loss)
-    print(round_loss)
+
+# Architecture of the playing model, the ModelCache key of its warm-up weights
+PLAYING_MODEL_SPEC = {
+    'kind': 'lstm',
+    'timesteps': 52,  # Maximum number of turns
+    'features': 68,  # Input features per turn
+    'units': 64,
+    'outputs': 4,  # Card representation dimension
+    'output_activation': 'linear',
+    'optimizer': 'adam',
+    'loss': 'mean_squared_error',
+    'warmup': {'samples': 52, 'epochs': 10, 'batch_size': 4},
+}
+
+
+def playingModelFromSpec(spec=PLAYING_MODEL_SPEC):
+    """
+    Build and compile the playing model of an architecture.
     
-    # Prepare input matrices for training (not currently used)
-    input_matrix = np.zeros([4 * 13, 68])
-    for turn in turns:
-        input_matrix[(turn.serial - 1) * 4:turn.serial * 4] = turn.turn_to_matrices(players)
+    Args:
+        spec (dict): Architecture (default: PLAYING_MODEL_SPEC)
     
-    return turns
+    Returns:
+        keras.models.Sequential: Compiled LSTM model, not warmed up
+    """
+    import keras
+    
+    # Define the LSTM model
+    model = keras.models.Sequential()
+    model.add(keras.layers.LSTM(spec['units'], input_shape=(spec['timesteps'], spec['features']), 
+                                return_sequences=False))
+    model.add(keras.layers.Dense(spec['outputs'], activation=spec['output_activation']))
+
+    # Compile the model
+    model.compile(optimizer=spec['optimizer'], loss=spec['loss'])
+    
+    return model
+
+
+def warmUpPlayingModel(model, spec=PLAYING_MODEL_SPEC):
+    """
+    Pre-train a new playing model on random data, in place.
+    
+    Args:
+        model: Model built by playingModelFromSpec(spec)
+        spec (dict): Its architecture (default: PLAYING_MODEL_SPEC)
+    """
+    warmup = spec['warmup']
+    X = np.random.random((warmup['samples'], spec['timesteps'], spec['features']))
+    y = np.random.random((warmup['samples'], spec['outputs']))
+    model.fit(X, y, epochs=warmup['epochs'], batch_size=warmup['batch_size'], verbose=0)
 
 
-def buildPlayingModel():
+def buildPlayingModel(cache=modelCache):
     """
     Build an LSTM neural network model for card playing decisions.
     
     The model uses LSTM to process sequential game state information
     and output card selection probabilities.
     
-    Architecture:
+    Architecture (PLAYING_MODEL_SPEC):
     - Input: (timesteps=52, features=68)
     - LSTM layer: 64 units
     - Output: 4 values (card representation)
     
+    Args:
+        cache (ModelCache.ModelCache, optional): Cache of the warm-up
+            weights (default: ModelCache.modelCache, None to always warm up)
+    
     Returns:
         keras.models.Sequential: Compiled LSTM model
     
-    Note: The model is pre-trained on random data for initialization.
-          Real training happens during gameplay.
+    Note: The model is pre-trained on random data for initialization, once
+          per cache. Real training happens during gameplay.
     """
-    timesteps = 52  # Maximum number of turns
-    features = 68  # Input features per turn
-    output_dim = 4  # Card representation dimension
-    number_of_samples = 52
-
-    # Create random training data for model initialization
-    X = np.random.random((number_of_samples, timesteps, features))
-    y = np.random.random((number_of_samples, output_dim))
-
-    # Define the LSTM model
-    model = keras.models.Sequential()
-    model.add(keras.layers.LSTM(64, input_shape=(timesteps, features), 
-                                return_sequences=False))
-    model.add(keras.layers.Dense(output_dim, activation='linear'))
-
-    # Compile the model
-    model.compile(optimizer='adam', loss='mean_squared_error')
-
-    # Initial training on random data
-    model.fit(X, y, epochs=10, batch_size=4, verbose=0)
-    
-    return model
+    if cache is None:
+        model = playingModelFromSpec()
+        warmUpPlayingModel(model)
+        return model
+    return cache.model(PLAYING_MODEL_SPEC, playingModelFromSpec, warmUpPlayingModel)
 
 
 def loss_t(y_true, y_pred):
@@ -225,106 +267,343 @@ def loss_t(y_true, y_pred):
 
 
 # Global variables for game statistics
-cards_record = {}  # Track which cards win
+cards_record = CardStats()  # Track which cards win (see Tarneeb.CardStats)
 round_loss = {}  # Loss values from current round
 
-# Initialize players
-logging.info('Creating players')
-players = []
-for i in range(4):
-    players.append(TarneebPlayer("p" + str(i)))
-logging.info('Creating 4 players ' + str(players))
-
 # Training configuration
 NUMBER_OF_TRAINING_GAMES = 2
-playModel = buildPlayingModel()
+REPLAY_BATCH_SIZE = 256  # Bidding samples drawn from the replay buffer per round
+REPLAY_ROUNDS = 8  # Played rounds drawn from the replay buffer per round
+PLAYING_BATCH_SIZE = 32  # Windows per playing model batch
+CHECKPOINT_EVERY = 10  # Rounds between checkpoints
+CHECKPOINT_KEEP = 3  # Checkpoints kept on disk
 
-logging.info('training for ' + str(NUMBER_OF_TRAINING_GAMES) + ' games')
 
-# Main training loop
-for z in range(NUMBER_OF_TRAINING_GAMES):
-    logging.info("Game number " + str(z))
-    turns = []
-    print("Game ", "-" * 50, z)
+def dealRound(players):
+    """
+    Shuffle, deal and bid until the sum of the bids is at least 11.
     
-    # Reset scores for new game
+    Args:
+        players (list): List of 4 TarneebPlayer objects
+    
+    Returns:
+        CardType: The trump suit of the round
+    """
+    bidding_sum = 0
+    while bidding_sum < 11:
+        profiler.count('deals')
+        with profiler.phase('shuffle'):
+            # Seeded deal: StandarDeck(seed=seed) reproduces it
+            seed = randomSeed()
+            standardeck = StandarDeck(seed=seed)
+        tarneeb = standardeck.cards[51].type
+        with profiler.phase('deal'):
+            clearHands(players)
+        bidding_sum = distripute_and_bid(players, tarneeb, standardeck)
+    
+    logging.info('The tarneeb is: ' + str(tarneeb) + 
+                ' sum of bidding: ' + str(bidding_sum) + ' deal seed: ' + str(seed))
+    return tarneeb
+
+
+def biddingTrainingData(players):
+    """
+    Collect the bidding samples of a finished round.
+    
+    Must be called before roundOver resets the won turns.
+    
+    Args:
+        players (list): List of 4 TarneebPlayer objects
+    
+    Returns:
+        tuple: (Xbid, Ybid) with shapes (4, 64) and (4,)
+    """
+    Xbid = np.concatenate([p.bidding_input for p in players]).reshape(4, 64)
+    Ybid = np.concatenate([p.predictionY() for p in players])
+    return Xbid, Ybid
+
+
+def trainBiddingModels(players, Xbid, Ybid):
+    """
+    Train the bidding models of the players on the samples of a round.
+    
+    Players sharing a bidding model (see Tarneeb.ModelRegistry) fit it
+    once, not once per seat.
+    
+    Args:
+        players (list): List of 4 TarneebPlayer objects
+        Xbid (np.ndarray): Bidding inputs
+        Ybid (np.ndarray): Bidding targets
+    """
+    trained = set()
     for p in players:
-        p.score = 0
+        model = p.biddingModel
+        if id(model) not in trained:
+            trained.add(id(model))
+            p.trainBidding(Xbid, Ybid)
+
+
+def playingTrainingData(players, turns):
+    """
+    Collect the playing samples of a finished round.
     
-    rounds = 0
-    winner = ""
-    gameOver = False
+    The turn rows are the inputs encoded by playRound right after each
+    turn (Turn.inputs), the same encoding as Dataset.playingArrays. They
+    are stored after 51 rows of zero padding so that playingWindows can
+    cut one 52-step sequence per played card.
     
-    # Play rounds until someone reaches 41 points
-    while not gameOver:
-        rounds += 1
-        logging.info("Game " + str(z) + " round " + str(rounds))
-        
-        # Ensure valid bidding (sum >= 11)
-        bidding_sum = 0
-        Xbid = np.array([])
-        Ybid = np.array([])
+    Args:
+        players (list): List of 4 TarneebPlayer objects
+        turns (list): The 13 Turn objects of the round
+    
+    Returns:
+        tuple: (X, Yplay) with shapes (103, 68) and (52, 4)
+    
+    Raises:
+        ValueError: If a turn was not encoded during play
+    """
+    Yplay = np.zeros((52, 4))
+    X = emptyRound()
+    
+    # Collect turn data
+    for i, turn in enumerate(turns):
+        if turn.inputs is None:
+            raise ValueError('turn ' + str(turn.serial) + ' was not encoded during play')
+        X[i * 4 + 51:(i + 1) * 4 + 51] = turn.inputs
+        for j, c in enumerate(turn.played_cards):
+            Yplay[4 * i + j] = c.card_to_matrix()
+    return X, Yplay
+
+
+def playingWindows(X):
+    """
+    Reshape padded turn rows into LSTM input sequences.
+    
+    The sequences are a read-only strided view over X, no rows are copied
+    (see Tarneeb.Sequences).
+    
+    Args:
+        X (np.ndarray): (103, 68) rows from playingTrainingData
+    
+    Returns:
+        np.ndarray: (52, 52, 68) sequences, one per played card
+    """
+    return roundWindows(X)
+
+
+def finishRound(players):
+    """
+    Score a finished round and detect the end of the game.
+    
+    Args:
+        players (list): List of 4 TarneebPlayer objects
+    
+    Returns:
+        str: Name of the player who reached 41 points, "" otherwise
+    """
+    winner = ""
+    for p in players:
+        p.print_player_round_results()
+        p.roundOver()
         
-        while bidding_sum < 11:
-            standardeck = StandarDeck(shuffled=True)
-            tarneeb = standardeck.cards[51].type
-            clearHands(players)
-            bidding_sum = distripute_and_bid(players, tarneeb)
+        # Check for winner (TODO: Handle ties if multiple players reach 41)
+        if p.score >= 41:
+            winner = p.name
+            p.gamesWon += 1
+    return winner
+
+
+def train(number_of_games=NUMBER_OF_TRAINING_GAMES, max_rounds=None, replay_dir=None,
+          profile_dir=None, record_path=None, checkpoint_dir=None,
+          checkpoint_every=CHECKPOINT_EVERY, checkpoint_keep=CHECKPOINT_KEEP, resume=True):
+    """
+    Play games and train the bidding and playing models after each round.
+    
+    With replay_dir, the samples of every round are kept in disk-backed
+    replay buffers (see Tarneeb.ReplayBuffer). The bidding models train on
+    random mini-batches drawn from all stored rounds, and the playing model
+    on the windows of REPLAY_ROUNDS stored rounds drawn at random.
+    
+    With profile_dir, the time spent in every phase of the loop is recorded
+    (see Tarneeb.Profiler) and written there as profile.txt and a Chrome
+    trace, trace.json.
+    
+    With record_path, every round is appended to a binary game record file
+    (see Tarneeb.GameRecord), which is closed even if training is stopped
+    by an exception or KeyboardInterrupt.
+    
+    With checkpoint_dir, the models, optimizers, players, card statistics
+    and random generators are saved every checkpoint_every rounds and at
+    the end, by a background thread (see Tarneeb.Checkpoint). If training
+    is stopped by an exception or KeyboardInterrupt, the checkpoints
+    already queued are still written. With resume,
+    a run finds its newest checkpoint there and continues from it;
+    number_of_games and max_rounds count from the start of the run.
+    Without resume, the checkpoints already in checkpoint_dir are deleted.
+    
+    Args:
+        number_of_games (int): Number of games to play
+        max_rounds (int, optional): Stop after this many rounds in total
+        replay_dir (str, optional): Directory of the replay buffers
+        profile_dir (str, optional): Directory of the profiling results
+        record_path (str, optional): Game record file to append rounds to
+        checkpoint_dir (str, optional): Directory of the checkpoints
+        checkpoint_every (int): Rounds between checkpoints (default: 10)
+        checkpoint_keep (int): Checkpoints kept on disk (default: 3)
+        resume (bool): Continue from the newest checkpoint (default: True)
+    
+    Returns:
+        list: The 4 TarneebPlayer objects
+    """
+    if profile_dir is not None:
+        profiler.reset()
+        profiler.enable()
+    
+    # Initialize players
+    logging.info('Creating players')
+    players = []
+    for i in range(4):
+        players.append(TarneebPlayer("p" + str(i)))
+    logging.info('Creating 4 players ' + str(players))
+    
+    playModel = buildPlayingModel()
+    
+    bidding_replay = playing_replay = None
+    if replay_dir is not None:
+        bidding_replay = biddingBuffer(os.path.join(replay_dir, 'bidding'))
+        playing_replay = playingBuffer(os.path.join(replay_dir, 'playing'))
+    records = GameRecordWriter(record_path) if record_path is not None else None
+    checkpoints = None
+    
+    try:
+        start_game = rounds = total_rounds = saved_rounds = 0
+        if checkpoint_dir is not None:
+            checkpoints = CheckpointManager(checkpoint_dir, checkpoint_keep)
+            state = checkpoints.load() if resume else None
+            if state is not None:
+                progress = restoreState(state, players, playModel, cards_record)
+                start_game = progress['game']
+                rounds = progress['rounds']
+                total_rounds = saved_rounds = progress['total_rounds']
+                logging.info('resuming at game ' + str(start_game) + ' round ' + str(rounds))
+            elif not resume:
+                # A new run: older checkpoints would outrank and prune its own
+                checkpoints.clear()
+    
+        logging.info('training for ' + str(number_of_games) + ' games')
+    
+        # Main training loop
+        for z in range(start_game, number_of_games):
+            logging.info("Game number " + str(z))
+            print("Game ", "-" * 50, z)
         
-        logging.info('The tarneeb is: ' + str(tarneeb) + 
-                    ' sum of bidding: ' + str(bidding_sum))
+            # Reset scores for new game, unless resuming in the middle of it
+            if rounds == 0:
+                for p in players:
+                    p.score = 0
         
-        # Play the round
-        turns = playRound(players, tarneeb)
-        print(players)
+            winner = ""
         
-        # Process round results and train models
-        for p in players:
-            p.print_player_round_results()
-            Xbid = np.append(Xbid, p.bidding_input)
-            Ybid = np.append(Ybid, p.predictionY())
-            p.roundOver()
+            # Play rounds until someone reaches 41 points
+            while not winner:
+                rounds += 1
+                logging.info("Game " + str(z) + " round " + str(rounds))
             
-            # Check for winner (TODO: Handle ties if multiple players reach 41)
-            if p.score >= 41:
-                gameOver = True
-                winner = p.name
-                p.gamesWon += 1
-                logging.info('game ' + str(z) + ' ended with ' + str(rounds) + 
-                           ' rounds and player ' + str(winner) + ' is the winner')
-
-        # Train bidding models with results from this round
-        logging.info('Round ' + str(rounds) + ' ended. Training bidding models ...')
-        Xbid = Xbid.reshape(4, 64)
-        for pl in players:
-            pl.trainBidding(Xbid, Ybid)
-
-        # Prepare training data for playing model
-        Xplay = np.zeros((52, 52, 68))
-        Yplay = np.zeros((52, 4))
-        X = np.zeros((103, 68))
-        
-        # Collect turn data
-        for i, turn in enumerate(turns):
-            X[i * 4 + 51:(i + 1) * 4 + 51] = turn.turn_to_matrices(players)
-            for j, c in enumerate(turn.played_cards):
-                Yplay[4 * i + j] = c.card_to_matrix()
-        
-        # Reshape for LSTM input
-        for i in range(52):
-            Xplay[i] = X[i:i + 52]
-        
-        # Train playing model
-        playModel.fit(Xplay, Yplay, verbose=2)
-        
-        # Exit after first round for testing (remove in production)
-        exit()
-
-# Display final results
-print()
-for p in players:
-    print(p.name, colored(p.gamesWon, "blue"))
-
-print("Card statistics:", cards_record)
+                # Ensure valid bidding (sum >= 11)
+                tarneeb = dealRound(players)
+                hands = [maskToIds(p.mask) for p in players]
+                scores = [p.score for p in players]
+            
+                # Play the round
+                turns = playRound(players, tarneeb)
+                print(players)
+            
+                # Process round results and train models
+                with profiler.phase('encode'):
+                    Xbid, Ybid = biddingTrainingData(players)
+                winner = finishRound(players)
+                if winner:
+                    logging.info('game ' + str(z) + ' ended with ' + str(rounds) + 
+                               ' rounds and player ' + str(winner) + ' is the winner')
+                if records is not None:
+                    records.append(roundRecord(players, hands, tarneeb, turns, scores))
+            
+                with profiler.phase('encode'):
+                    X, Yplay = playingTrainingData(players, turns)
+                if bidding_replay is not None:
+                    with profiler.phase('replay'):
+                        bidding_replay.extend(Xbid, Ybid)
+                        playing_replay.extend(X[51:], Yplay)
+                        Xbid, Ybid = bidding_replay.sample(REPLAY_BATCH_SIZE)
+                        rows, Yrows = playing_replay.sampleBlocks(REPLAY_ROUNDS, 52)
+            
+                # Train bidding models with results from this round
+                logging.info('Round ' + str(rounds) + ' ended. Training bidding models ...')
+                with profiler.phase('train_bidding'):
+                    trainBiddingModels(players, Xbid, Ybid)
+            
+                # Train playing model
+                with profiler.phase('train_playing'):
+                    if playing_replay is not None:
+                        Xrounds = padRows(rows)
+                        playModel.fit(windowBatches(Xrounds, Yrows, PLAYING_BATCH_SIZE),
+                                      steps_per_epoch=stepsPerEpoch(Xrounds, PLAYING_BATCH_SIZE),
+                                      verbose=2)
+                    else:
+                        playModel.fit(playingWindows(X), Yplay, verbose=2)
+            
+                profiler.count('rounds')
+                profiler.endRound()
+                total_rounds += 1
+                if checkpoints is not None:
+                    progress = ({'game': z + 1, 'rounds': 0} if winner else
+                                {'game': z, 'rounds': rounds})
+                    progress['total_rounds'] = total_rounds
+                    if total_rounds % checkpoint_every == 0:
+                        with profiler.phase('checkpoint'):
+                            checkpoints.save(captureState(players, playModel, cards_record,
+                                                          progress), total_rounds)
+                        saved_rounds = total_rounds
+                if max_rounds is not None and total_rounds >= max_rounds:
+                    break
+            rounds = 0
+            profiler.endGame()
+            if max_rounds is not None and total_rounds >= max_rounds:
+                break
+    
+        if checkpoints is not None:
+            if total_rounds != saved_rounds:
+                checkpoints.save(captureState(players, playModel, cards_record, progress),
+                                 total_rounds)
+    
+        if bidding_replay is not None:
+            bidding_replay.flush()
+            playing_replay.flush()
+    finally:
+        if records is not None:
+            records.close()
+        # Write the checkpoints still queued, even when training is stopped
+        if checkpoints is not None:
+            checkpoints.close()
+    
+    if profile_dir is not None:
+        os.makedirs(profile_dir, exist_ok=True)
+        summary = profiler.summary()
+        print(summary)
+        with open(os.path.join(profile_dir, 'profile.txt'), 'w') as f:
+            f.write(summary + '\n')
+        profiler.writeChromeTrace(os.path.join(profile_dir, 'trace.json'))
+        profiler.enable(False)
+    
+    # Display final results
+    print()
+    for p in players:
+        print(p.name, colored(p.gamesWon, "blue"))
+    
+    print("Card statistics:", cards_record.toRecord())
+    return players
 
 
+if __name__ == '__main__':
+    # Stop after the first round for testing (remove max_rounds in production)
+    train(NUMBER_OF_TRAINING_GAMES, max_rounds=1)
@@ -0,0 +1,365 @@
+"""
+Compact binary records of played rounds.
+
+Each round is stored as one fixed-size record of 125 bytes (RECORD_DTYPE):
+- deal (52 x uint8): card ids, seat i holds deal[13*i:13*(i+1)]
+- tarneeb (uint8): tarneeb type id
+- bids (4 x uint8): bid of each seat, clipped to 0..13 (a mutated bidding
+  model can output bids outside the game's range)
+- plays (52 x uint8): card ids in playing order; seat 0 leads the first
+  turn and the winner of a turn leads the next one, as in
+  GTarneeb.playRound, so the seat of every card follows from the cards
+- tricks (4 x uint8): turns won by each seat
+- deltas (4 x int8): score change of each seat
+- scores (4 x int16): score of each seat before the round, all zero on the
+  first round of a game
+Deltas and scores out of the range of their type are clipped as well,
+never wrapped around.
+
+A record file is an 8-byte header (MAGIC) followed by records, so files
+can be appended to, concatenated after stripping the header, and mapped
+into memory as one structured array (openRecords).
+
+Usage:
+    with GameRecordWriter('games.trn') as writer:
+        writer.append(roundRecord(players, hands, tarneeb, turns, scores))
+
+    for records in readRecords('games.trn'):
+        for tarneeb, turn in replayRound(records[0], players):
+            ...
+"""
+
+import os
+
+import numpy as np
+
+from Cards.Card import CARDS, CardType
+from Tarneeb.Turn import Turn
+
+
+MAGIC = b'TRNREC01'
+
+RECORD_DTYPE = np.dtype([
+    ('deal', np.uint8, 52),
+    ('tarneeb', np.uint8),
+    ('bids', np.uint8, 4),
+    ('plays', np.uint8, 52),
+    ('tricks', np.uint8, 4),
+    ('deltas', np.int8, 4),
+    ('scores', '<i2', 4),
+])
+RECORD_SIZE = RECORD_DTYPE.itemsize
+
+_TYPES = sorted(CardType, key=lambda t: t.id)
+
+
+def emptyRecords(n):
+    """
+    Allocate zeroed records.
+
+    Args:
+        n (int): Number of records
+
+    Returns:
+        np.ndarray: (n,) RECORD_DTYPE array
+    """
+    return np.zeros(n, dtype=RECORD_DTYPE)
+
+
+def _clipped(values, dtype, low=None, high=None):
+    """Values as integers clipped to the range of a field type, or to low..high."""
+    info = np.iinfo(dtype)
+    low = info.min if low is None else low
+    high = info.max if high is None else high
+    return np.clip(np.asarray(values, dtype=np.int64), low, high)
+
+
+def _storedBids(bids):
+    return _clipped(bids, np.uint8, 0, 13)
+
+
+def roundDeltas(bids, tricks, scores):
+    """
+    Score changes of a round, as TarneebPlayer.getResult computes them.
+
+    Args:
+        bids (array-like): (..., 4) bids
+        tricks (array-like): (..., 4) turns won
+        scores (array-like): (..., 4) scores before the round
+
+    Returns:
+        np.ndarray: (..., 4) score changes
+    """
+    bids = np.asarray(bids, dtype=np.int64)
+    ret = np.where((bids >= 7) & (np.asarray(scores) < 30), 2 * bids, bids)
+    return np.where(np.asarray(tricks) < bids, -ret, ret)
+
+
+def roundRecord(players, hands, tarneeb, turns, scores):
+    """
+    Build the record of a round played by GTarneeb.playRound.
+
+    Args:
+        players (list): The 4 TarneebPlayer objects, after finishRound
+        hands (list): Card ids dealt to each seat
+        tarneeb (CardType): The trump suit of the round
+        turns (list): The 13 Turn objects of the round
+        scores (list): Scores of the players before the round
+
+    Returns:
+        np.void: One RECORD_DTYPE record
+    """
+    rec = emptyRecords(1)[0]
+    rec['deal'] = np.concatenate([np.asarray(h, dtype=np.uint8) for h in hands])
+    rec['tarneeb'] = tarneeb.id
+    rec['bids'] = _storedBids([p.bidding for p in players])
+    rec['plays'] = [c.cardId() for turn in turns for c in turn.played_cards]
+    rec['tricks'] = np.bincount([turn.winnerId for turn in turns], minlength=4)
+    rec['deltas'] = _clipped([p.score - s for p, s in zip(players, scores)], np.int8)
+    rec['scores'] = _clipped(scores, np.int16)
+    return rec
+
+
+def recordsFromBatch(batch, bids, scores=None):
+    """
+    Build records for rounds played by BatchEngine.play_rounds.
+
+    Args:
+        batch (RoundsBatch): Result of play_rounds for N tables
+        bids (array-like): (N, 4) bids
+        scores (array-like, optional): (N, 4) scores before the rounds
+                                       (default: first round of a game)
+
+    Returns:
+        np.ndarray: (N,) RECORD_DTYPE array
+    """
+    n = len(batch.tarneeb)
+    scores = np.zeros((n, 4), dtype=np.int64) if scores is None else np.asarray(scores)
+    recs = emptyRecords(n)
+    recs['deal'] = batch.deals
+    recs['tarneeb'] = batch.tarneeb
+    recs['bids'] = _storedBids(bids)
+    recs['plays'] = batch.plays.reshape(n, 52)
+    recs['tricks'] = batch.tricks
+    recs['deltas'] = _clipped(roundDeltas(bids, batch.tricks, scores), np.int8)
+    recs['scores'] = _clipped(scores, np.int16)
+    return recs
+
+
+class GameRecordWriter:
+    """
+    Append-only writer of round records.
+
+    Records are buffered and written in blocks; the header is written when
+    the file is created. Use it as a context manager or call close().
+
+    Attributes:
+        path (str): Record file
+        count (int): Records written by this writer
+    """
+
+    def __init__(self, path, buffer_size=4096):
+        """
+        Open a record file for appending, creating it if needed.
+
+        Args:
+            path (str): Record file
+            buffer_size (int): Records kept in memory between writes
+
+        Raises:
+            ValueError: If an existing file is not a record file
+        """
+        self.path = path
+        self.count = 0
+        self._buffer = emptyRecords(buffer_size)
+        self._size = 0
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        else:
+            _checkHeader(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def append(self, record):
+        """
+        Add one record.
+
+        Args:
+            record (np.void): RECORD_DTYPE record, see roundRecord
+        """
+        self._buffer[self._size] = record
+        self._size += 1
+        self.count += 1
+        if self._size == len(self._buffer):
+            self.flush()
+
+    def extend(self, records):
+        """
+        Add many records.
+
+        Args:
+            records (np.ndarray): RECORD_DTYPE array, see recordsFromBatch
+        """
+        self.flush()
+        self._file.write(np.ascontiguousarray(records, dtype=RECORD_DTYPE).tobytes())
+        self.count += len(records)
+
+    def flush(self):
+        """Write the buffered records to the file."""
+        if self._size:
+            self._file.write(self._buffer[:self._size].tobytes())
+            self._size = 0
+        self._file.flush()
+
+    def close(self):
+        """Flush and close the file."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+def _checkHeader(path):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(path + ' is not a Tarneeb record file')
+
+
+def countRecords(path):
+    """
+    Number of records in a file.
+
+    Args:
+        path (str): Record file
+
+    Returns:
+        int: Number of complete records
+    """
+    return (os.path.getsize(path) - len(MAGIC)) // RECORD_SIZE
+
+
+def readRecords(path, chunk_size=65536):
+    """
+    Stream the records of a file in chunks.
+
+    Args:
+        path (str): Record file
+        chunk_size (int): Records per chunk (default: 65536)
+
+    Yields:
+        np.ndarray: (<= chunk_size,) RECORD_DTYPE arrays
+
+    Raises:
+        ValueError: If the file is not a record file
+    """
+    _checkHeader(path)
+    with open(path, 'rb') as f:
+        f.seek(len(MAGIC))
+        while True:
+            data = f.read(chunk_size * RECORD_SIZE)
+            n = len(data) // RECORD_SIZE
+            if n == 0:
+                return
+            yield np.frombuffer(data, dtype=RECORD_DTYPE, count=n)
+
+
+def iterRecords(path, chunk_size=65536):
+    """
+    Stream the records of a file one by one.
+
+    Args:
+        path (str): Record file
+        chunk_size (int): Records read at once (default: 65536)
+
+    Yields:
+        np.void: RECORD_DTYPE records
+    """
+    for chunk in readRecords(path, chunk_size):
+        yield from chunk
+
+
+def openRecords(path):
+    """
+    Map all records of a file into memory, read-only.
+
+    Args:
+        path (str): Record file
+
+    Returns:
+        np.memmap: (n,) RECORD_DTYPE array
+    """
+    _checkHeader(path)
+    n = countRecords(path)
+    if n == 0:
+        return emptyRecords(0)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=len(MAGIC), shape=(n,))
+
+
+def recordHands(record):
+    """
+    Hands dealt in a record.
+
+    Args:
+        record (np.void): RECORD_DTYPE record
+
+    Returns:
+        list: 4 lists of Card objects
+    """
+    deal = record['deal']
+    return [[CARDS[c] for c in deal[13 * i:13 * (i + 1)]] for i in range(4)]
+
+
+def replayTurns(record):
+    """
+    Rebuild the Turn objects of a recorded round.
+
+    Args:
+        record (np.void): RECORD_DTYPE record
+
+    Returns:
+        tuple: (tarneeb CardType, list of the 13 Turn objects)
+    """
+    tarneeb = _TYPES[record['tarneeb']]
+    plays = record['plays']
+    leader = 0
+    turns = []
+    for j in range(13):
+        turn = Turn([CARDS[c] for c in plays[4 * j:4 * j + 4]], serial=j + 1,
+                    starting_player_id=leader, tarneeb=tarneeb)
+        leader = turn.winnerId
+        turns.append(turn)
+    return tarneeb, turns
+
+
+def replayRound(record, players):
+    """
+    Replay a recorded round through player objects.
+
+    The players receive their recorded hands, bids and scores; after each
+    turn their hands and won turns are updated as in GTarneeb.playRound,
+    so encoders such as Turn.turn_to_matrices see the same state.
+
+    Args:
+        record (np.void): RECORD_DTYPE record
+        players (list): 4 TarneebPlayer objects, modified in place
+
+    Yields:
+        tuple: (tarneeb CardType, Turn) for each of the 13 turns
+    """
+    for p, hand, bid, score in zip(players, recordHands(record),
+                                   record['bids'], record['scores']):
+        p.setHand(hand)
+        p.bidding = int(bid)
+        p.score = int(score)
+        p.number_of_won_turns = 0
+    tarneeb, turns = replayTurns(record)
+    for turn in turns:
+        for i, c in enumerate(turn.played_cards):
+            players[(turn.starting_player_id + i) % 4].removeCard(c)
+        players[turn.winnerId].number_of_won_turns += 1
+        yield tarneeb, turn
@@ -0,0 +1,215 @@
+"""
+Micro-batching inference for many concurrent tables.
+
+Every table runs as an asyncio coroutine. Instead of calling
+model.predict on its own (1, 64) bidding row, a table awaits
+InferenceBroker.predict(model, x). The broker queues the rows of all
+tables per model and runs one forward pass when max_batch rows are
+waiting or when the oldest row has waited max_wait seconds, then hands
+every table its own output rows.
+
+Only bidding goes through the broker: the play of the cards is
+GTarneeb.playRound, where TarneebPlayer.playCard picks a random legal
+card without a forward pass, so there is no playing prediction to batch.
+Once playCard uses the playing model, its windows can be awaited through
+InferenceBroker.predict the same way.
+
+max_batch and max_wait trade latency for throughput: larger values give
+larger batches, smaller ones answer sooner. stats() reports the batch
+sizes and latencies actually achieved. Requests are grouped by model
+object, so tables sharing their models get the largest batches.
+
+Usage:
+    results, stats = playTables([players0, players1, ...], rounds=10,
+                                max_batch=512, max_wait=0.005)
+"""
+
+import asyncio
+import time
+
+import numpy as np
+
+from Cards.Dealer import randomSeed
+from Cards.Encoding import typeOneHot
+from Cards.StandarDeck import StandarDeck
+from Tarneeb.GTarneeb import finishRound, playRound
+
+
+class InferenceBroker:
+    """
+    Collects predict requests from coroutines into batches per model.
+
+    Attributes:
+        max_batch (int): Rows that trigger an immediate forward pass
+        max_wait (float): Seconds a row may wait for its batch to fill
+    """
+
+    def __init__(self, max_batch=256, max_wait=0.002):
+        """
+        Initialize a broker.
+
+        Args:
+            max_batch (int): Rows per forward pass (default: 256)
+            max_wait (float): Maximum wait in seconds (default: 0.002)
+        """
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending = {}  # id(model) -> (model, [rows], [(future, submitted)])
+        self._timers = {}
+        self.resetStats()
+
+    def resetStats(self):
+        """Clear the statistics."""
+        self._stats = {'batches': 0, 'requests': 0, 'rows': 0, 'full_flushes': 0,
+                       'deadline_flushes': 0, 'predict_time': 0.0,
+                       'latency_sum': 0.0, 'latency_max': 0.0}
+
+    async def predict(self, model, x):
+        """
+        Predict rows with a model as part of a batch.
+
+        Args:
+            model: Keras-like model with predict(X, verbose=0)
+            x (np.ndarray): (k, ...) input rows, k >= 1
+
+        Returns:
+            np.ndarray: (k, ...) output rows for x
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = id(model)
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = self._pending[key] = (model, [], [])
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key, False)
+        entry[1].append(np.asarray(x))
+        entry[2].append((future, time.perf_counter()))
+        if sum(len(r) for r in entry[1]) >= self.max_batch:
+            self._flush(key, True)
+        return await future
+
+    def _flush(self, key, full):
+        entry = self._pending.pop(key, None)
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        if entry is None:
+            return
+        model, rows, requests = entry
+        stats = self._stats
+        start = time.perf_counter()
+        try:
+            X = np.concatenate(rows)
+            outputs = np.asarray(model.predict(X, verbose=0))
+        except Exception as e:
+            for future, _ in requests:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        done = time.perf_counter()
+        stats['batches'] += 1
+        stats['requests'] += len(requests)
+        stats['rows'] += len(X)
+        stats['full_flushes' if full else 'deadline_flushes'] += 1
+        stats['predict_time'] += done - start
+        bounds = np.cumsum([len(r) for r in rows])[:-1]
+        for (future, submitted), out in zip(requests, np.split(outputs, bounds)):
+            latency = done - submitted
+            stats['latency_sum'] += latency
+            stats['latency_max'] = max(stats['latency_max'], latency)
+            if not future.done():
+                future.set_result(out)
+
+    def flush(self):
+        """Run the forward passes of every pending request now."""
+        for key in list(self._pending):
+            self._flush(key, False)
+
+    def stats(self):
+        """
+        Achieved batching and latency.
+
+        Returns:
+            dict: batches, requests, rows, mean_batch (rows per forward
+                  pass), full_flushes, deadline_flushes, predict_time (s),
+                  mean_latency_ms and max_latency_ms (submit to result)
+        """
+        s = self._stats
+        return {'batches': s['batches'], 'requests': s['requests'], 'rows': s['rows'],
+                'mean_batch': s['rows'] / max(s['batches'], 1),
+                'full_flushes': s['full_flushes'],
+                'deadline_flushes': s['deadline_flushes'],
+                'predict_time': s['predict_time'],
+                'mean_latency_ms': 1e3 * s['latency_sum'] / max(s['requests'], 1),
+                'max_latency_ms': 1e3 * s['latency_max']}
+
+
+async def bidAsync(players, tarneeb, broker):
+    """
+    Collect the bids of one table through the broker.
+
+    Same rules as Bidding.bidTables: seat i sees the bids of seats 0..i-1.
+
+    Args:
+        players (list): 4 TarneebPlayer objects with their hands set
+        tarneeb (CardType): The trump suit
+        broker (InferenceBroker): Broker batching the predictions
+
+    Returns:
+        float: Sum of the bids
+    """
+    bids = np.zeros(4)
+    tbs = typeOneHot(tarneeb)
+    scores = [p.score / 41.0 for p in players]
+    for i, p in enumerate(players):
+        inp = p.biddingInputs(scores=scores, biddings=bids, tarneeb=tbs)
+        output = await broker.predict(p.biddingModel, inp)
+        bids[i] = p.setBid(output[0][0])
+    return bids.sum()
+
+
+async def playTable(players, broker, rounds=1):
+    """
+    Play rounds at one table, bidding through the broker.
+
+    Args:
+        players (list): 4 TarneebPlayer objects
+        broker (InferenceBroker): Broker batching the predictions
+        rounds (int): Number of rounds to play (default: 1)
+
+    Returns:
+        list: Scores of the players after the rounds
+    """
+    for _ in range(rounds):
+        bidding_sum = 0
+        while bidding_sum < 11:
+            standardeck = StandarDeck(seed=randomSeed())
+            tarneeb = standardeck.cards[51].type
+            for p in players:
+                p.setHand(standardeck.distripute(13))
+            bidding_sum = await bidAsync(players, tarneeb, broker)
+        playRound(players, tarneeb)
+        finishRound(players)
+    return [p.score for p in players]
+
+
+def playTables(tables, rounds=1, max_batch=256, max_wait=0.002):
+    """
+    Play rounds at many tables concurrently with batched bidding.
+
+    Args:
+        tables (list): Lists of 4 TarneebPlayer objects
+        rounds (int): Rounds per table (default: 1)
+        max_batch (int): Rows per forward pass (default: 256)
+        max_wait (float): Maximum wait in seconds (default: 0.002)
+
+    Returns:
+        tuple: (scores of each table, broker stats)
+    """
+    broker = InferenceBroker(max_batch, max_wait)
+
+    async def run():
+        return await asyncio.gather(*[playTable(t, broker, rounds) for t in tables])
+
+    results = asyncio.run(run())
+    return results, broker.stats()
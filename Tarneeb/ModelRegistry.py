@@ -0,0 +1,175 @@
+"""
+Registry of models shared by many players.
+
+Instead of every TarneebPlayer holding its own GenModel network, players
+can refer to a model by id (TarneebPlayer(..., biddingModelId=...)) and
+the registry holds one model per id. Players given the same id share
+weights and training (self-play); distinct ids give distinct models
+(population play). Because Bidding.predictGrouped and the inference
+broker batch requests per model object, every player using one id is
+served by a single forward pass.
+
+Usage:
+    registry.create('bidding')
+    tables = registryTables(400, ['bidding'] * 4)
+"""
+
+import copy
+
+import numpy as np
+
+import GenModel
+
+
+class ModelRegistry:
+    """
+    Models indexed by id.
+
+    Attributes:
+        factory (callable): Builds a new model for create() (default:
+                            GenModel.Model)
+    """
+
+    def __init__(self, factory=None):
+        """
+        Initialize an empty registry.
+
+        Args:
+            factory (callable, optional): Model builder used by create
+        """
+        self.factory = GenModel.Model if factory is None else factory
+        self._models = {}
+        self._next = 0
+
+    def __len__(self):
+        return len(self._models)
+
+    def __contains__(self, model_id):
+        return model_id in self._models
+
+    def ids(self):
+        """List the registered model ids."""
+        return list(self._models)
+
+    def _newId(self):
+        while 'model-' + str(self._next) in self._models:
+            self._next += 1
+        return 'model-' + str(self._next)
+
+    def add(self, model, model_id=None):
+        """
+        Register an existing model.
+
+        Args:
+            model: Keras-like model
+            model_id (str, optional): Id to use (default: a new id)
+
+        Returns:
+            str: The model id
+        """
+        model_id = self._newId() if model_id is None else model_id
+        self._models[model_id] = model
+        return model_id
+
+    def create(self, model_id=None, **kwargs):
+        """
+        Build a model with the factory and register it.
+
+        Args:
+            model_id (str, optional): Id to use (default: a new id)
+            **kwargs: Arguments of the factory
+
+        Returns:
+            str: The model id
+        """
+        return self.add(self.factory(**kwargs), model_id)
+
+    def get(self, model_id):
+        """
+        Look up a model.
+
+        Args:
+            model_id (str): Model id
+
+        Returns:
+            The registered model
+
+        Raises:
+            KeyError: If the id is not registered
+        """
+        return self._models[model_id]
+
+    def remove(self, model_id):
+        """Unregister a model."""
+        del self._models[model_id]
+
+    def clone(self, model_id, new_id=None):
+        """
+        Register an independent copy of a model with the same weights.
+
+        Args:
+            model_id (str): Model to copy
+            new_id (str, optional): Id of the copy (default: a new id)
+
+        Returns:
+            str: The id of the copy
+        """
+        model = self.get(model_id)
+        if hasattr(model, 'to_json'):
+            import keras
+            copied = keras.models.clone_model(model)
+            copied.set_weights(model.get_weights())
+            if getattr(model, 'optimizer', None) is not None:
+                copied.compile(optimizer=type(model.optimizer).from_config(
+                    model.optimizer.get_config()), loss=model.loss)
+        else:
+            copied = copy.deepcopy(model)
+        return self.add(copied, new_id)
+
+    def predict(self, model_ids, inputs):
+        """
+        Run the inputs of many players, one forward pass per model.
+
+        Args:
+            model_ids (list): Model id of every input row
+            inputs (list): (1, features) input rows
+
+        Returns:
+            np.ndarray: First output of every row, in the same order
+        """
+        groups = {}
+        for i, model_id in enumerate(model_ids):
+            groups.setdefault(model_id, []).append(i)
+        outputs = np.zeros(len(model_ids))
+        for model_id, rows in groups.items():
+            X = np.vstack([inputs[i] for i in rows])
+            outputs[rows] = np.asarray(self.get(model_id).predict(X, verbose=0))[:, 0]
+        return outputs
+
+
+# Process-wide registry used by players that do not name one
+registry = ModelRegistry()
+
+
+def registryTables(n, model_ids, playModel=None, registry=registry):
+    """
+    Create tables of players referring to registered bidding models.
+
+    Args:
+        n (int): Number of tables
+        model_ids (list): Bidding model id of each of the 4 seats; ids
+                          missing from the registry are created
+        playModel: Optional playing model shared by every player
+        registry (ModelRegistry): Registry holding the models
+
+    Returns:
+        list: n lists of 4 TarneebPlayer objects
+    """
+    from Tarneeb.TarneebPlayer import TarneebPlayer
+    for model_id in model_ids:
+        if model_id not in registry:
+            registry.create(model_id)
+    return [[TarneebPlayer('t' + str(t) + '-p' + str(i), playModel=playModel,
+                           biddingModelId=model_id, registry=registry)
+             for i, model_id in enumerate(model_ids)]
+            for t in range(n)]
@@ -0,0 +1,310 @@
+"""
+Monte Carlo determinization player for Tarneeb.
+
+MonteCarloPlayer keeps track of the cards played during the round and of
+the types other players are known to lack (they did not follow the lead).
+To choose a card it repeatedly:
+1. samples the hidden hands of the other players consistently with what
+   has been played (a "determinization")
+2. plays every legal card followed by a fast random rollout to the end of
+   the round on that sample
+and plays the card that won the most tricks for its side on average. The
+search stops when the millisecond budget is spent, so the strength of the
+player grows with CPU time rather than with training. Samples can be
+evaluated in parallel worker processes. Workers are spawned rather than
+forked, since the parent may already have TensorFlow loaded. With a seed
+and a sample cap the choices are reproducible.
+"""
+
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Cards.Bitboard import FULL_MASK, TYPE_MASKS, legalMask, maskToIds, trickLead
+from Cards.Card import CARDS
+from Tarneeb.TarneebPlayer import TarneebPlayer
+from Tarneeb.Turn import cardBeats
+
+
+def _randomCard(mask, rng):
+    """A random card id of a non-empty mask."""
+    ids = maskToIds(mask)
+    return ids[int(rng.random() * len(ids))]
+
+
+def sampleHands(state, rng):
+    """
+    Deal the unknown cards to the other players.
+
+    Each player receives as many cards as they still hold, and never a card
+    of a type they are known to lack. Cards are dealt most constrained
+    first; if the constraints cannot be met after a few attempts they are
+    ignored.
+
+    Args:
+        state (dict): Knowledge of the player, see MonteCarloPlayer.state
+        rng (random.Random): Random generator
+
+    Returns:
+        list: 4 hand masks, the player's own hand included
+    """
+    seat = state['seat']
+    others = [s for s in range(4) if s != seat]
+    unknown = maskToIds(state['unknown'])
+    for attempt in range(20):
+        hands = [0, 0, 0, 0]
+        hands[seat] = state['hand']
+        need = dict((s, state['counts'][s]) for s in others)
+        voids = state['voids'] if attempt < 19 else [0, 0, 0, 0]
+        allowed = [[s for s in others if not voids[s] & (1 << c)] for c in unknown]
+        order = sorted(range(len(unknown)), key=lambda i: (len(allowed[i]), rng.random()))
+        ok = True
+        for i in order:
+            seats = [s for s in allowed[i] if need[s] > 0]
+            if not seats:
+                ok = False
+                break
+            # Weight by remaining space so the last cards still fit
+            r = rng.random() * sum(need[s] for s in seats)
+            for s in seats:
+                r -= need[s]
+                if r < 0:
+                    break
+            hands[s] |= 1 << unknown[i]
+            need[s] -= 1
+        if ok:
+            return hands
+    return hands
+
+
+def rollout(hands, trick, leader, tarneeb, rng):
+    """
+    Finish the round with random legal plays.
+
+    Args:
+        hands (list): 4 hand masks, modified in place
+        trick (list): Card ids already played in the current turn
+        leader (int): Seat that led the current turn
+        tarneeb (int): Tarneeb type id
+        rng (random.Random): Random generator
+
+    Returns:
+        list: Turns won by each seat from the current turn on
+    """
+    won = [0, 0, 0, 0]
+    trick = list(trick)
+    while True:
+        lead = trick[0] & 3 if trick else -1
+        win = 0
+        for i in range(1, len(trick)):
+            if cardBeats(trick[i], trick[win], tarneeb):
+                win = i
+        for pos in range(len(trick), 4):
+            seat = (leader + pos) & 3
+            c = _randomCard(legalMask(hands[seat], lead), rng)
+            hands[seat] ^= 1 << c
+            trick.append(c)
+            if pos == 0:
+                lead = c & 3
+            elif cardBeats(c, trick[win], tarneeb):
+                win = pos
+        leader = (leader + win) & 3
+        won[leader] += 1
+        trick = []
+        if not hands[leader]:
+            return won
+
+
+def evaluateCards(state, candidates, budget, seed=None, max_samples=None):
+    """
+    Average tricks won by the player's side for each candidate card.
+
+    Every sampled deal is used once for each candidate so that candidates
+    are compared on the same hidden hands.
+
+    Args:
+        state (dict): Knowledge of the player, see MonteCarloPlayer.state
+        candidates (list): Legal card ids to evaluate
+        budget (float): Seconds to spend
+        seed (int, optional): Seed of the random generator
+        max_samples (int, optional): Stop after this many samples even if
+                                     budget is left
+
+    Returns:
+        tuple: (total tricks per candidate as np.ndarray, number of samples)
+    """
+    rng = random.Random(seed)
+    seat = state['seat']
+    totals = np.zeros(len(candidates))
+    samples = 0
+    deadline = time.perf_counter() + budget
+    while samples == 0 or (time.perf_counter() < deadline and
+                           (max_samples is None or samples < max_samples)):
+        hands = sampleHands(state, rng)
+        for i, c in enumerate(candidates):
+            h = list(hands)
+            h[seat] ^= 1 << c
+            won = rollout(h, state['trick'] + [c], state['leader'], state['tarneeb'], rng)
+            totals[i] += won[seat] + won[(seat + 2) & 3]
+        samples += 1
+    return totals, samples
+
+
+class MonteCarloPlayer(TarneebPlayer):
+    """
+    Tarneeb player choosing cards by Monte Carlo determinization.
+
+    Bidding is inherited from TarneebPlayer.
+
+    Attributes:
+        budget_ms (float): Time budget per decision in milliseconds
+        workers (int): Worker processes evaluating samples (0: in process)
+        max_samples (int): Deals sampled per worker and decision at most
+                           (None: until the budget is spent)
+        seat (int): Seat of the player in the current round
+        tarneeb (int): Tarneeb type id of the current round
+        played (int): Mask of the cards of finished turns
+        voids (list): Per seat, mask of the types they are known to lack
+        turns_done (int): Number of finished turns in the round
+        last_samples (int): Number of deals sampled for the last decision
+    """
+
+    def __init__(self, name, budget_ms=50, workers=0, seed=None, max_samples=None,
+                 playModel=None, biddingModel=None):
+        """
+        Initialize a MonteCarloPlayer.
+
+        Args:
+            name (str): Player's name
+            budget_ms (float): Time budget per decision in milliseconds
+            workers (int): Worker processes evaluating samples (default: 0)
+            seed (int, optional): Seed of the sample generators
+            max_samples (int, optional): Deals sampled per worker and
+                                         decision at most
+            playModel: Optional model for playing (unused by the search)
+            biddingModel: Optional pre-trained model for bidding
+        """
+        TarneebPlayer.__init__(self, name, playModel=playModel, biddingModel=biddingModel)
+        self.budget_ms = budget_ms
+        self.workers = workers
+        self.max_samples = max_samples
+        self._rng = random.Random(seed)
+        self._pool = None
+        self.last_samples = 0
+        self.startRound(0, None)
+
+    def startRound(self, seat, tarneeb):
+        """
+        Reset the round knowledge.
+
+        Args:
+            seat (int): Seat of the player in the round (0-3)
+            tarneeb (CardType): The trump suit for this round
+        """
+        self.seat = seat
+        self.tarneeb = tarneeb.id if tarneeb is not None else 0
+        self.played = 0
+        self.voids = [0, 0, 0, 0]
+        self.turns_done = 0
+
+    def observeTurn(self, turn):
+        """
+        Record the cards of a finished turn and who failed to follow.
+
+        Args:
+            turn (Turn): The finished turn
+        """
+        self._observeCards(turn.played_cards, turn.starting_player_id)
+        self.turns_done += 1
+
+    def _observeCards(self, cards, leader):
+        lead = cards[0].type.id
+        for i, c in enumerate(cards):
+            self.played |= 1 << c.cardId()
+            if c.type.id != lead:
+                self.voids[(leader + i) % 4] |= TYPE_MASKS[lead]
+
+    def state(self, sdcards):
+        """
+        Knowledge available to choose a card, as plain picklable values.
+
+        Args:
+            sdcards (list): Cards already played in this turn
+
+        Returns:
+            dict: seat, hand, tarneeb, trick ids, leader of the turn, mask of
+                  unknown cards, cards held by each seat and known voids
+        """
+        leader = (self.seat - len(sdcards)) % 4
+        voids = list(self.voids)
+        trick = [c.cardId() for c in sdcards]
+        if sdcards:
+            lead = sdcards[0].type.id
+            for i, c in enumerate(sdcards):
+                if c.type.id != lead:
+                    voids[(leader + i) % 4] |= TYPE_MASKS[lead]
+        trick_mask = sum(1 << c for c in trick)
+        counts = [13 - self.turns_done - (1 if (s - leader) % 4 < len(trick) else 0)
+                  for s in range(4)]
+        return {'seat': self.seat, 'hand': self.mask, 'tarneeb': self.tarneeb,
+                'trick': trick, 'leader': leader, 'counts': counts, 'voids': voids,
+                'unknown': FULL_MASK & ~self.mask & ~self.played & ~trick_mask}
+
+    def playCard(self, sdcards, *args, **kwargs):
+        """
+        Play the legal card with the best Monte Carlo evaluation.
+
+        Args:
+            sdcards (list): Cards already played in this turn
+
+        Returns:
+            Card: The card chosen to play
+        """
+        candidates = maskToIds(legalMask(self.mask, trickLead(sdcards)))
+        if len(candidates) == 1:
+            card = CARDS[candidates[0]]
+        else:
+            totals, samples = self.evaluate(self.state(sdcards), candidates)
+            self.last_samples = samples
+            card = CARDS[candidates[int(np.argmax(totals))]]
+        self.removeCard(card)
+        return card
+
+    def evaluate(self, state, candidates):
+        """
+        Evaluate candidates within the time budget, in parallel if enabled.
+
+        Args:
+            state (dict): Output of state()
+            candidates (list): Legal card ids
+
+        Returns:
+            tuple: (total tricks per candidate, number of samples)
+        """
+        budget = self.budget_ms / 1000.0
+        if not self.workers:
+            return evaluateCards(state, candidates, budget,
+                                 self._rng.randrange(2 ** 32), self.max_samples)
+        if self._pool is None:
+            # Forking a parent that has loaded TensorFlow is unsafe
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        futures = [self._pool.submit(evaluateCards, state, candidates, budget,
+                                     self._rng.randrange(2 ** 32), self.max_samples)
+                   for _ in range(self.workers)]
+        totals = np.zeros(len(candidates))
+        samples = 0
+        for f in futures:
+            t, n = f.result()
+            totals += t
+            samples += n
+        return totals, samples
+
+    def close(self):
+        """Shut down the worker processes, if any."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
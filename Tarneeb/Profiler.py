@@ -0,0 +1,206 @@
+"""
+Named phase timers and counters for the training loop.
+
+The training loop (GTarneeb) wraps its phases in profiler.phase(name) and
+counts events with profiler.count(name). The shared module-level profiler
+is disabled by default: phase() then returns one shared no-op context
+manager and count() returns immediately, so the hooks cost a method call.
+
+When enabled, every phase is recorded with its start time, so results can
+be exported as:
+- a summary table with totals per phase, per round and per game
+- a Chrome trace (chrome://tracing or https://ui.perfetto.dev) timeline
+
+Usage:
+    from Tarneeb.Profiler import profiler
+    profiler.enable()
+    with profiler.phase('deal'):
+        ...
+    profiler.endRound()
+    print(profiler.summary())
+    profiler.writeChromeTrace('trace.json')
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+
+_NULL_PHASE = nullcontext()
+
+
+class _Phase:
+    """Context manager timing one phase of an enabled Profiler."""
+
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, self.start, time.perf_counter_ns() - self.start)
+        return False
+
+
+class Profiler:
+    """
+    Phase timers and counters aggregated per round and per game.
+
+    Attributes:
+        enabled (bool): Whether phases and counters are recorded
+        totals (dict): Phase name -> [calls, nanoseconds] over the run
+        counters (dict): Counter name -> value over the run
+        rounds (list): Per finished round, {'phases': {name: seconds},
+                       'counters': {name: value}}
+        games (list): Same as rounds, per finished game
+        events (list): (name, start ns, duration ns, thread id) of every phase
+    """
+
+    def __init__(self, enabled=False):
+        """
+        Initialize an empty profiler.
+
+        Args:
+            enabled (bool): Start recording immediately (default: False)
+        """
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        """Forget all recorded phases, counters, rounds and games."""
+        self.totals = {}
+        self.counters = {}
+        self.rounds = []
+        self.games = []
+        self.events = []
+        self.origin = time.perf_counter_ns()
+        self._round = ({}, {})
+        self._game = ({}, {})
+
+    def enable(self, enabled=True):
+        """Turn recording on (or off with enabled=False)."""
+        self.enabled = enabled
+
+    def phase(self, name):
+        """
+        Time a block of code.
+
+        Args:
+            name (str): Phase name
+
+        Returns:
+            Context manager, a shared no-op one when disabled
+        """
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def add(self, name, start, duration):
+        """
+        Record one phase measured by the caller.
+
+        Args:
+            name (str): Phase name
+            start (int): time.perf_counter_ns() at the start of the phase
+            duration (int): Duration in nanoseconds
+        """
+        total = self.totals.get(name)
+        if total is None:
+            total = self.totals[name] = [0, 0]
+        total[0] += 1
+        total[1] += duration
+        for phases, _ in (self._round, self._game):
+            phases[name] = phases.get(name, 0) + duration
+        self.events.append((name, start, duration, threading.get_ident()))
+
+    def count(self, name, n=1):
+        """
+        Increment a counter.
+
+        Args:
+            name (str): Counter name
+            n (int): Increment (default: 1)
+        """
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + n
+        for _, counters in (self._round, self._game):
+            counters[name] = counters.get(name, 0) + n
+
+    @staticmethod
+    def _close(current):
+        phases, counters = current
+        return {'phases': dict((k, v / 1e9) for k, v in phases.items()),
+                'counters': dict(counters)}
+
+    def endRound(self):
+        """Close the aggregation of the current round."""
+        if not self.enabled:
+            return
+        self.rounds.append(self._close(self._round))
+        self._round = ({}, {})
+
+    def endGame(self):
+        """Close the aggregation of the current game."""
+        if not self.enabled:
+            return
+        self.games.append(self._close(self._game))
+        self._game = ({}, {})
+
+    def summary(self):
+        """
+        Format the recorded phases and counters as a table.
+
+        Returns:
+            str: One line per phase with calls, total seconds, share of the
+                 profiled time, mean per call and mean per round, followed
+                 by the counters
+        """
+        profiled = sum(t for _, t in self.totals.values()) or 1
+        rounds = max(len(self.rounds), 1)
+        lines = ['%-16s %8s %10s %7s %12s %12s' % ('phase', 'calls', 'total s', '%',
+                                                    'ms/call', 's/round')]
+        for name, (calls, total) in sorted(self.totals.items(), key=lambda kv: -kv[1][1]):
+            lines.append('%-16s %8d %10.3f %6.1f%% %12.3f %12.4f' % (
+                name, calls, total / 1e9, 100.0 * total / profiled,
+                total / 1e6 / calls, total / 1e9 / rounds))
+        lines.append('rounds: %d, games: %d' % (len(self.rounds), len(self.games)))
+        for name, value in sorted(self.counters.items()):
+            lines.append('%-16s %8d %12.2f/round' % (name, value, value / rounds))
+        return '\n'.join(lines)
+
+    def chromeTrace(self):
+        """
+        Recorded phases in the Chrome trace event format.
+
+        Returns:
+            dict: {'traceEvents': [...]} with one complete event per phase
+        """
+        pid = os.getpid()
+        events = [{'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                   'ts': (start - self.origin) / 1e3, 'dur': duration / 1e3}
+                  for name, start, duration, tid in self.events]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'rounds': self.rounds, 'games': self.games,
+                              'counters': self.counters}}
+
+    def writeChromeTrace(self, path):
+        """
+        Write the Chrome trace JSON to a file.
+
+        Args:
+            path (str): Output file
+        """
+        with open(path, 'w') as f:
+            json.dump(self.chromeTrace(), f)
+
+
+# Shared profiler used by the training loop, disabled by default
+profiler = Profiler()
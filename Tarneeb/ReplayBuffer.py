@@ -0,0 +1,231 @@
+"""
+Disk-backed replay buffer for bidding and playing samples.
+
+Samples are stored in fixed-size numpy memmap files used as a ring buffer:
+once the capacity is reached the oldest samples are overwritten. Appends
+are O(1), mini-batches are drawn uniformly at random, and the buffer can be
+reopened by later runs, so millions of samples can be kept across training
+runs without holding them in RAM.
+
+The write position is saved in meta.json every flush_every samples (and
+on flush), after the samples themselves, so a crashed run loses at most
+the samples since the last save and never reopens at a position that does
+not match the stored rows.
+
+Usage:
+    buffer = biddingBuffer('replay/bidding')
+    buffer.extend(Xbid, Ybid)
+    X, Y = buffer.sample(256)
+    rows, Y = playingBuffer('replay/playing').sampleBlocks(8, 52)  # whole rounds
+"""
+
+import json
+import os
+
+import numpy as np
+
+from constants import BIDDING_INPUT_DIM, PLAYING_INPUT_DIM
+
+
+FLUSH_EVERY = 1024  # Samples between automatic flushes
+
+
+class ReplayBuffer:
+    """
+    Ring buffer of (x, y) samples stored in memory-mapped .npy files.
+
+    The directory holds x.npy, y.npy and meta.json with the write position
+    and the number of stored samples.
+
+    Attributes:
+        path (str): Directory of the buffer files
+        capacity (int): Maximum number of samples kept
+        size (int): Number of samples currently stored
+        head (int): Index where the next sample is written
+        flush_every (int): Samples between automatic flushes, None to only
+                           flush on request
+        X (np.memmap): (capacity, x_dim) inputs
+        Y (np.memmap): (capacity, y_dim) targets
+    """
+
+    def __init__(self, path, x_dim, y_dim=1, capacity=1000000, dtype=np.float32,
+                 flush_every=FLUSH_EVERY):
+        """
+        Open the buffer in path, creating it if it does not exist.
+
+        Args:
+            path (str): Directory of the buffer files
+            x_dim (int): Number of input features per sample
+            y_dim (int): Number of target values per sample (default: 1)
+            capacity (int): Maximum number of samples (default: 1000000)
+            dtype: Storage type of the samples (default: float32)
+            flush_every (int): Samples between automatic flushes (default:
+                               FLUSH_EVERY, None to only flush on request)
+
+        Raises:
+            ValueError: If an existing buffer has a different shape
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self._unflushed = 0
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, 'meta.json')
+        x_path = os.path.join(path, 'x.npy')
+        y_path = os.path.join(path, 'y.npy')
+
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            self.X = np.lib.format.open_memmap(x_path, mode='r+')
+            self.Y = np.lib.format.open_memmap(y_path, mode='r+')
+            if self.X.shape[1] != x_dim or self.Y.shape[1] != y_dim:
+                raise ValueError('Replay buffer in ' + path + ' stores ' +
+                                 str(self.X.shape[1]) + ' -> ' + str(self.Y.shape[1]) +
+                                 ' samples, not ' + str(x_dim) + ' -> ' + str(y_dim))
+            self.capacity = len(self.X)
+            self.size = meta['size']
+            self.head = meta['head']
+        else:
+            self.X = np.lib.format.open_memmap(x_path, mode='w+', dtype=dtype,
+                                               shape=(capacity, x_dim))
+            self.Y = np.lib.format.open_memmap(y_path, mode='w+', dtype=dtype,
+                                               shape=(capacity, y_dim))
+            self.capacity = capacity
+            self.size = 0
+            self.head = 0
+            self._writeMeta()
+
+    def __len__(self):
+        return self.size
+
+    def _writeMeta(self):
+        meta_path = os.path.join(self.path, 'meta.json')
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump({'size': self.size, 'head': self.head}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def append(self, x, y):
+        """
+        Store one sample, overwriting the oldest one when full.
+
+        Args:
+            x (array-like): Input features
+            y (array-like or float): Target values
+        """
+        self.X[self.head] = np.ravel(x)
+        self.Y[self.head] = np.ravel(y)
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self._written(1)
+
+    def extend(self, X, Y):
+        """
+        Store a batch of samples.
+
+        Args:
+            X (np.ndarray): (n, x_dim) inputs
+            Y (np.ndarray): (n, y_dim) or (n,) targets
+        """
+        X = np.asarray(X).reshape(-1, self.X.shape[1])
+        Y = np.asarray(Y).reshape(-1, self.Y.shape[1])
+        n = len(X)
+        if n > self.capacity:
+            X, Y = X[-self.capacity:], Y[-self.capacity:]
+            n = self.capacity
+        first = min(n, self.capacity - self.head)
+        self.X[self.head:self.head + first] = X[:first]
+        self.Y[self.head:self.head + first] = Y[:first]
+        self.X[:n - first] = X[first:]
+        self.Y[:n - first] = Y[first:]
+        self.head = (self.head + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+        self._written(n)
+
+    def _written(self, n):
+        self._unflushed += n
+        if self.flush_every is not None and self._unflushed >= self.flush_every:
+            self.flush()
+
+    def sample(self, batch_size, rng=None):
+        """
+        Draw a random mini-batch of stored samples.
+
+        Args:
+            batch_size (int): Number of samples (drawn with replacement)
+            rng (np.random.Generator, optional): Random generator
+
+        Returns:
+            tuple: (X, Y) arrays loaded in memory
+
+        Raises:
+            ValueError: If the buffer is empty
+        """
+        if self.size == 0:
+            raise ValueError('Cannot sample from an empty replay buffer')
+        rng = np.random.default_rng() if rng is None else rng
+        idx = np.sort(rng.integers(0, self.size, batch_size))
+        return self.X[idx], self.Y[idx]
+
+    def sampleBlocks(self, batch_size, block, rng=None):
+        """
+        Draw random blocks of consecutive samples, e.g. the 52 turn rows of a round.
+
+        The samples must have been stored block at a time (extend with
+        block rows), so that the blocks end at the write position.
+
+        Args:
+            batch_size (int): Number of blocks (drawn with replacement)
+            block (int): Samples per block
+            rng (np.random.Generator, optional): Random generator
+
+        Returns:
+            tuple: (X, Y) arrays of shapes (batch_size, block, x_dim) and
+                   (batch_size, block, y_dim), loaded in memory
+
+        Raises:
+            ValueError: If the buffer holds no complete block
+        """
+        blocks = self.size // block
+        if blocks == 0:
+            raise ValueError('Replay buffer holds fewer than ' + str(block) + ' samples')
+        rng = np.random.default_rng() if rng is None else rng
+        back = rng.integers(1, blocks + 1, batch_size)
+        idx = (self.head - back[:, None] * block + np.arange(block)) % self.capacity
+        return self.X[idx], self.Y[idx]
+
+    def flush(self):
+        """Write pending samples, then the buffer position, to disk."""
+        self.X.flush()
+        self.Y.flush()
+        self._writeMeta()
+        self._unflushed = 0
+
+
+def biddingBuffer(path, capacity=1000000):
+    """
+    Open a buffer of bidding samples (TarneebPlayer.bidding_input rows).
+
+    Args:
+        path (str): Directory of the buffer files
+        capacity (int): Maximum number of samples
+
+    Returns:
+        ReplayBuffer: Buffer of (64,) inputs and (1,) targets
+    """
+    return ReplayBuffer(path, BIDDING_INPUT_DIM, 1, capacity)
+
+
+def playingBuffer(path, capacity=1000000):
+    """
+    Open a buffer of playing samples (Turn.turn_to_matrices rows).
+
+    Args:
+        path (str): Directory of the buffer files
+        capacity (int): Maximum number of samples
+
+    Returns:
+        ReplayBuffer: Buffer of (68,) inputs and (4,) card targets
+    """
+    return ReplayBuffer(path, PLAYING_INPUT_DIM, 4, capacity)
@@ -0,0 +1,359 @@
+"""
+Process-pool self-play with a central learner.
+
+Worker processes play GTarneeb rounds with a frozen snapshot of the bidding
+and playing models and stream the resulting training samples back to the
+learner process, which is the only one calling fit. Workers evaluate the
+bidding models with NumPy (see NumpyModel). The playing model is only
+sent to the workers, and Keras only loaded there, when the players use
+it to play (TarneebPlayer.usesPlayModel). Every few rounds the learner
+publishes refreshed weights, and workers pick them up between rounds
+without restarting. Workers print nothing and only log warnings.
+
+Usage:
+    python -m Tarneeb.SelfPlay --workers 8 --rounds 1000 --card-stats stats.npz
+"""
+
+import argparse
+import contextlib
+import logging
+import multiprocessing as mp
+import os
+import queue
+import random
+import time
+
+import numpy as np
+
+from NumpyModel import fromSnapshot
+from Tarneeb.CardStats import CardStats
+from Tarneeb.TarneebPlayer import TarneebPlayer
+
+
+def modelSnapshot(model):
+    """
+    Capture a picklable copy of a Keras model.
+
+    Args:
+        model: Keras model
+
+    Returns:
+        dict: Architecture as JSON ('config') and weights ('weights')
+    """
+    return {'config': model.to_json(), 'weights': model.get_weights()}
+
+
+def snapshotToModel(snapshot):
+    """
+    Rebuild a model from modelSnapshot output.
+
+    The rebuilt model is not compiled: workers only call predict.
+
+    Args:
+        snapshot (dict): Output of modelSnapshot
+
+    Returns:
+        keras.Model: Model with the snapshot weights
+    """
+    import keras
+    model = keras.models.model_from_json(snapshot['config'])
+    model.set_weights(snapshot['weights'])
+    return model
+
+
+def _latest(q):
+    """Drain a queue without blocking and return the last item, or None."""
+    item = None
+    while True:
+        try:
+            item = q.get_nowait()
+        except queue.Empty:
+            return item
+
+
+def selfPlayWorker(worker_id, snapshot, weights_queue, trajectories, stop,
+                   refresh_every=10, seed=None):
+    """
+    Play rounds forever and send their training samples to the learner.
+
+    Args:
+        worker_id (int): Index of this worker
+        snapshot (dict): Initial models, see SelfPlayLearner.snapshot
+        weights_queue (mp.Queue): Weight updates published by the learner
+        trajectories (mp.Queue): Queue receiving one dict per round, with the
+                                 card statistics every refresh_every rounds,
+                                 then a last {'worker', 'final',
+                                 'card_stats'} dict once stopped
+        stop (mp.Event): Set by the learner to stop the worker
+        refresh_every (int): Rounds between checks for new weights
+        seed (int, optional): Seed for the random and numpy generators
+    """
+    # Game output of every card and round would flood the learner's console
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        _selfPlay(worker_id, snapshot, weights_queue, trajectories, stop,
+                  refresh_every, seed)
+
+
+def _selfPlay(worker_id, snapshot, weights_queue, trajectories, stop, refresh_every, seed):
+    from Tarneeb import GTarneeb
+
+    # GTarneeb configures INFO logging on import
+    logging.getLogger().setLevel(logging.WARNING)
+    random.seed(seed)
+    np.random.seed(seed)
+
+    playModel = None
+    if snapshot['playing'] is not None:
+        playModel = snapshotToModel(snapshot['playing'])
+    players = []
+    for i, s in enumerate(snapshot['bidding']):
+        players.append(TarneebPlayer('w' + str(worker_id) + '-p' + str(i),
+                                     playModel=playModel,
+                                     biddingModel=fromSnapshot(s)))
+    version = snapshot['version']
+
+    rounds = 0
+    while not stop.is_set():
+        if rounds % refresh_every == 0:
+            update = _latest(weights_queue)
+            if update is not None:
+                for p, w in zip(players, update['bidding']):
+                    p.biddingModel.set_weights(w)
+                if playModel is not None:
+                    playModel.set_weights(update['playing'])
+                version = update['version']
+                logging.info('worker ' + str(worker_id) + ' loaded weights v' + str(version))
+
+        tarneeb = GTarneeb.dealRound(players)
+        turns = GTarneeb.playRound(players, tarneeb)
+        Xbid, Ybid = GTarneeb.biddingTrainingData(players)
+        if GTarneeb.finishRound(players):
+            for p in players:
+                p.score = 0
+        X, Yplay = GTarneeb.playingTrainingData(players, turns)
+        rounds += 1
+
+        sample = {'worker': worker_id, 'version': version,
+                  'Xbid': Xbid, 'Ybid': Ybid, 'X': X, 'Yplay': Yplay,
+                  'card_stats': (GTarneeb.cards_record.drain()
+                                 if rounds % refresh_every == 0 else None)}
+        while not stop.is_set():
+            try:
+                trajectories.put(sample, timeout=0.5)
+                break
+            except queue.Full:
+                pass
+        else:
+            # Not sent: keep its statistics for the last message
+            if sample['card_stats'] is not None:
+                GTarneeb.cards_record.merge(sample['card_stats'])
+
+    # Statistics of the rounds played since the last drain
+    try:
+        trajectories.put({'worker': worker_id, 'final': True,
+                          'card_stats': GTarneeb.cards_record.drain()}, timeout=5)
+    except queue.Full:
+        logging.warning('worker ' + str(worker_id) + ' could not send its last card statistics')
+
+
+class SelfPlayLearner:
+    """
+    Central learner training on rounds played by worker processes.
+
+    Attributes:
+        players (list): The 4 TarneebPlayer objects whose bidding models train
+        playModel: Playing model trained on every round
+        num_workers (int): Number of worker processes
+        refresh_every (int): Rounds a worker plays between weight checks
+        publish_every (int): Rounds trained between weight publications
+        version (int): Number of weight publications so far
+        rounds (int): Number of rounds trained on
+        card_stats (CardStats): Card statistics merged from the workers
+    """
+
+    def __init__(self, players, playModel, num_workers=None, refresh_every=10,
+                 publish_every=20, queue_size=64):
+        """
+        Initialize the learner.
+
+        Args:
+            players (list): The 4 TarneebPlayer objects to train
+            playModel: Compiled playing model (see GTarneeb.buildPlayingModel)
+            num_workers (int, optional): Worker processes (default: CPU count - 1)
+            refresh_every (int): Rounds between weight checks in workers
+            publish_every (int): Trained rounds between weight publications
+            queue_size (int): Maximum rounds waiting for the learner
+        """
+        self.players = players
+        self.playModel = playModel
+        self.num_workers = num_workers or max((os.cpu_count() or 2) - 1, 1)
+        self.refresh_every = refresh_every
+        self.publish_every = publish_every
+        self.queue_size = queue_size
+        self.version = 0
+        self.rounds = 0
+        self.card_stats = CardStats()
+        self._workers = []
+        self._weights_queues = []
+
+    def snapshot(self):
+        """
+        Capture the current models for new workers.
+
+        Returns:
+            dict: Bidding model snapshots, playing model snapshot (None if
+                  no player plays with it) and version
+        """
+        return {'version': self.version,
+                'bidding': [modelSnapshot(p.biddingModel) for p in self.players],
+                'playing': modelSnapshot(self.playModel) if self._sendPlaying() else None}
+
+    def _sendPlaying(self):
+        return any(p.usesPlayModel for p in self.players)
+
+    def publish(self):
+        """Send the current weights to every worker, replacing unread ones."""
+        self.version += 1
+        update = {'version': self.version,
+                  'bidding': [p.biddingModel.get_weights() for p in self.players],
+                  'playing': self.playModel.get_weights() if self._sendPlaying() else None}
+        for q in self._weights_queues:
+            _latest(q)
+            q.put(update)
+
+    def start(self):
+        """Spawn the worker processes."""
+        ctx = mp.get_context('spawn')
+        self._stop = ctx.Event()
+        self._trajectories = ctx.Queue(maxsize=self.queue_size)
+        snapshot = self.snapshot()
+        for i in range(self.num_workers):
+            wq = ctx.Queue()
+            w = ctx.Process(target=selfPlayWorker,
+                            args=(i, snapshot, wq, self._trajectories, self._stop,
+                                  self.refresh_every, random.randrange(2 ** 32)),
+                            daemon=True)
+            w.start()
+            self._workers.append(w)
+            self._weights_queues.append(wq)
+        logging.info('started ' + str(self.num_workers) + ' self-play workers')
+
+    def train(self, sample):
+        """
+        Train the models on one round sent by a worker.
+
+        Args:
+            sample (dict): Round samples, see selfPlayWorker
+        """
+        from Tarneeb import GTarneeb
+
+        GTarneeb.trainBiddingModels(self.players, sample['Xbid'], sample['Ybid'])
+        self.playModel.fit(GTarneeb.playingWindows(sample['X']), sample['Yplay'], verbose=0)
+        if sample['card_stats'] is not None:
+            self.card_stats.merge(sample['card_stats'])
+        self.rounds += 1
+
+    def learn(self, rounds):
+        """
+        Train on rounds coming from the workers.
+
+        Args:
+            rounds (int): Number of rounds to train on
+
+        Raises:
+            RuntimeError: If every worker process has died
+        """
+        target = self.rounds + rounds
+        while self.rounds < target:
+            try:
+                sample = self._trajectories.get(timeout=1)
+            except queue.Empty:
+                if not any(w.is_alive() for w in self._workers):
+                    raise RuntimeError('all self-play workers have stopped')
+                continue
+            self.train(sample)
+            if self.rounds % self.publish_every == 0:
+                self.publish()
+                logging.info('learner published weights v' + str(self.version) +
+                             ' after ' + str(self.rounds) + ' rounds')
+
+    def stop(self, timeout=10):
+        """
+        Stop and join the worker processes.
+
+        The card statistics of every round the workers played are merged
+        into card_stats, including the rounds still queued, which are not
+        trained on.
+
+        Args:
+            timeout (float): Seconds to wait for the last statistics of
+                             the workers (default: 10)
+
+        Returns:
+            CardStats: card_stats
+        """
+        self._stop.set()
+        waiting = set(range(len(self._workers)))
+        deadline = time.monotonic() + timeout
+        while waiting and time.monotonic() < deadline:
+            try:
+                sample = self._trajectories.get(timeout=0.5)
+            except queue.Empty:
+                waiting = {i for i in waiting if self._workers[i].is_alive()}
+                continue
+            if sample['card_stats'] is not None:
+                self.card_stats.merge(sample['card_stats'])
+            if sample.get('final'):
+                waiting.discard(sample['worker'])
+        if waiting:
+            logging.warning('no last card statistics from workers ' + str(sorted(waiting)))
+        for w in self._workers:
+            w.join(timeout=5)
+            if w.is_alive():
+                w.terminate()
+        self._workers = []
+        self._weights_queues = []
+        return self.card_stats
+
+    def run(self, rounds):
+        """
+        Start workers, train on the given number of rounds and stop them.
+
+        Args:
+            rounds (int): Number of rounds to train on
+
+        Returns:
+            CardStats: Card statistics of every round played, see stop
+        """
+        self.start()
+        try:
+            self.learn(rounds)
+        finally:
+            self.stop()
+        return self.card_stats
+
+
+if __name__ == '__main__':
+    from Tarneeb.GTarneeb import buildPlayingModel
+
+    parser = argparse.ArgumentParser(description='Tarneeb self-play training')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of worker processes (default: CPU count - 1)')
+    parser.add_argument('--rounds', type=int, default=1000,
+                        help='number of rounds to train on')
+    parser.add_argument('--refresh-every', type=int, default=10,
+                        help='rounds a worker plays between weight checks')
+    parser.add_argument('--publish-every', type=int, default=20,
+                        help='rounds trained between weight publications')
+    parser.add_argument('--card-stats', default=None,
+                        help='.npz file to export the card statistics to')
+    args = parser.parse_args()
+
+    learner = SelfPlayLearner([TarneebPlayer('p' + str(i)) for i in range(4)],
+                              buildPlayingModel(), num_workers=args.workers,
+                              refresh_every=args.refresh_every,
+                              publish_every=args.publish_every)
+    card_stats = learner.run(args.rounds)
+    print('Card statistics:', card_stats.toRecord())
+    if args.card_stats is not None:
+        card_stats.export(args.card_stats)
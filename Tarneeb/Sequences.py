@@ -0,0 +1,125 @@
+"""
+Sliding-window sequences for the LSTM playing model.
+
+The playing model (GTarneeb.buildPlayingModel) reads sequences of
+(timesteps=52, features=68): for every played card, the 52 turn rows up to
+and including that card, zero padded at the start of the round. Instead of
+copying X[i:i+52] into a fresh (52, 52, 68) array, the windows are exposed
+as read-only strided views over a single padded buffer per round, and
+batches over many rounds are only materialized one batch at a time.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+from constants import PLAYING_INPUT_DIM, TOTAL_CARDS
+
+TIMESTEPS = TOTAL_CARDS  # Sequence length of the playing model
+
+
+def padRows(rows, timesteps=TIMESTEPS):
+    """
+    Copy turn rows into a zero-padded round buffer.
+
+    Leading batch axes are kept, so the rows of R rounds, (R, n, features),
+    give R stacked buffers for roundWindows and windowBatches.
+
+    Args:
+        rows (np.ndarray): (..., n, features) turn rows of a round
+        timesteps (int): Sequence length (default: 52)
+
+    Returns:
+        np.ndarray: (..., timesteps - 1 + n, features) buffer of the dtype
+                    of rows
+    """
+    rows = np.asarray(rows)
+    X = np.zeros(rows.shape[:-2] + (timesteps - 1 + rows.shape[-2], rows.shape[-1]),
+                 dtype=rows.dtype)
+    X[..., timesteps - 1:, :] = rows
+    return X
+
+
+def roundWindows(X, timesteps=TIMESTEPS):
+    """
+    View a padded round buffer as one sequence per turn row.
+
+    Window i is X[i:i + timesteps]. No data is copied: the result shares
+    memory with X and is read-only. Leading batch axes are kept, so stacked
+    rounds of shape (R, timesteps - 1 + n, features) give (R, n, timesteps,
+    features).
+
+    Args:
+        X (np.ndarray): (..., timesteps - 1 + n, features) padded buffer
+        timesteps (int): Sequence length (default: 52)
+
+    Returns:
+        np.ndarray: (..., n, timesteps, features) strided view
+    """
+    n = X.shape[-2] - timesteps + 1
+    s0, s1 = X.strides[-2:]
+    return as_strided(X, shape=X.shape[:-2] + (n, timesteps, X.shape[-1]),
+                      strides=X.strides[:-2] + (s0, s0, s1), writeable=False)
+
+
+def windowBatches(X, Y, batch_size=32, shuffle=True, rng=None,
+                  timesteps=TIMESTEPS):
+    """
+    Yield training batches of sequences over many rounds, forever.
+
+    Only the windows of the current batch are copied, so the generator can
+    be passed to model.fit(..., steps_per_epoch=stepsPerEpoch(...)).
+
+    Args:
+        X (np.ndarray): (R, timesteps - 1 + n, features) padded round buffers
+        Y (np.ndarray): (R, n, outputs) targets, one per turn row
+        batch_size (int): Sequences per batch (default: 32)
+        shuffle (bool): Shuffle sequences every epoch (default: True)
+        rng (np.random.Generator, optional): Random generator
+        timesteps (int): Sequence length (default: 52)
+
+    Yields:
+        tuple: (Xbatch, Ybatch) of shapes (b, timesteps, features) and
+               (b, outputs)
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    windows = roundWindows(X, timesteps)
+    n = windows.shape[1]
+    Y = np.asarray(Y).reshape(len(X), n, -1)
+    order = np.arange(len(X) * n)
+    while True:
+        if shuffle:
+            rng.shuffle(order)
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            r, i = np.divmod(idx, n)
+            yield windows[r, i], Y[r, i]
+
+
+def stepsPerEpoch(X, batch_size=32, timesteps=TIMESTEPS):
+    """
+    Number of windowBatches batches covering every sequence once.
+
+    Args:
+        X (np.ndarray): (R, timesteps - 1 + n, features) padded round buffers
+        batch_size (int): Sequences per batch (default: 32)
+        timesteps (int): Sequence length (default: 52)
+
+    Returns:
+        int: Batches per epoch
+    """
+    total = len(X) * (X.shape[1] - timesteps + 1)
+    return -(-total // batch_size)
+
+
+def emptyRound(timesteps=TIMESTEPS, features=PLAYING_INPUT_DIM):
+    """
+    Allocate the padded buffer of a full round (52 turn rows).
+
+    Args:
+        timesteps (int): Sequence length (default: 52)
+        features (int): Features per row (default: 68)
+
+    Returns:
+        np.ndarray: (timesteps - 1 + 52, features) zero buffer
+    """
+    return np.zeros((timesteps - 1 + TOTAL_CARDS, features))
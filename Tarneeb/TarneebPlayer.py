@@ -8,11 +8,15 @@ for bidding and playing in the Tarneeb card game.
 import Player
 import GenModel
 import numpy as np
+import logging
 import math
 import random
 from termcolor import colored
 
 from Cards.StandarDeck import cardstoArray
+from Cards.Bitboard import maskToCards, handIds, legalMask, trickLead
+from Cards.Encoding import HAND_SIZE, TRICK_SIZE, padIds, playingInput
+from Tarneeb import ModelRegistry
 
 
 class TarneebPlayer(Player.Player):
@@ -28,27 +32,56 @@ class TarneebPlayer(Player.Player):
         gamesWon (int): Total number of games won
         number_of_won_turns (int): Tricks won in current round
         biddingModel: Neural network for bidding decisions
+        biddingModelId (str): Id of the bidding model in a ModelRegistry, or None
         playModel: Neural network for card playing decisions
-        history: History of game states for training
+        usesPlayModel (bool): Whether playCard evaluates playModel; False
+                              while it picks a random legal card
     """
     
-    def __init__(self, name, playModel=None):
+    usesPlayModel = False
+    
+    def __init__(self, name, playModel=None, biddingModel=None, biddingModelId=None,
+                 registry=None):
         """
         Initialize a TarneebPlayer with neural network models.
         
         Args:
             name (str): Player's name
             playModel: Optional pre-trained model for playing (default: None)
+            biddingModel: Optional pre-trained model for bidding
+                          (default: None, a new GenModel.Model is built
+                          the first time it is used)
+            biddingModelId (str, optional): Use this model of the registry
+                                            for bidding instead of an own one
+            registry (ModelRegistry, optional): Registry of biddingModelId
+                                                (default: the shared one)
         """
         self.score = 0
         self.bidding = 2
         self.gamesWon = 0
         self.number_of_won_turns = 0
-        self.biddingModel = GenModel.Model()
+        self._biddingModel = biddingModel
+        self.biddingModelId = biddingModelId
+        self.registry = registry
         self.playModel = playModel
-        self.history = np.zeros((52, 68))
+        self.play_input = np.zeros(68)
         Player.Player.__init__(self, str(name))
 
+    @property
+    def biddingModel(self):
+        """Bidding model, from the registry or built on first access."""
+        if self.biddingModelId is not None:
+            registry = ModelRegistry.registry if self.registry is None else self.registry
+            return registry.get(self.biddingModelId)
+        if self._biddingModel is None:
+            self._biddingModel = GenModel.Model()
+        return self._biddingModel
+
+    @biddingModel.setter
+    def biddingModel(self, model):
+        self._biddingModel = model
+        self.biddingModelId = None
+
     def bid(self, scores=[0, 0, 0, 0], biddings=[2, 2, 2, 2], tarneeb=[0, 0, 0, 0]):
         """
         Make a bidding decision using the neural network.
@@ -67,47 +100,61 @@ class TarneebPlayer(Player.Player):
         Returns:
             int: Number of tricks bid (2-13)
         """
-        res = str(self.bidding) + ":" + str(self.number_of_won_turns).split(".")[0] + "/" + str(self.getResult() + self.score)
-        if self.number_of_won_turns > self.bidding:
-            print(colored(res, "blue"), end="\t")
-        elif self.number_of_won_turns == self.bidding:
-            print(res, end="\t")
-        else:
-            print(colored(res, "red"), end="\t")
+        inp = self.biddingInputs(scores, biddings, tarneeb)
+        o = self.biddingModel.predict(x=inp)
+        return self.setBid(o[0][0])
 
-    def getResult(self):
+    def biddingInputs(self, scores=[0, 0, 0, 0], biddings=[2, 2, 2, 2], tarneeb=[0, 0, 0, 0]):
         """
-        Calculate the score result for the current round.
+        Build the bidding model input row for the current hand.
         
-        Scoring rules:
-        - If bid is met: gain points equal to bid
-        - If bid >= 7 and score < 30: double the points
-        - If bid is not met: lose points equal to bid (or doubled)
+        The row is kept in bidding_input for training after the round.
+        
+        Args:
+            scores (list): Scaled scores of all players [0-1]
+            biddings (list): Bids of other players
+            tarneeb (list): One-hot encoded tarneeb type
         
         Returns:
-            int: Points to add/subtract from score (negative if bid not met)
+            np.ndarray: (1, 64) input row
         """
-        self.hand.sort(reverse=True)
         inp = np.concatenate((self.handToArray(), scores, biddings, tarneeb))
         self.bidding_input = inp.reshape(1, 64)
-        o = self.biddingModel.predict(x=np.array(self.bidding_input))
+        return self.bidding_input
+
+    def setBid(self, output):
+        """
+        Convert a bidding model output to a bid and store it.
+        
+        Args:
+            output (float): Model output for this player's bidding_input
         
+        Returns:
+            int: Number of tricks bid (2-13)
+        """
         # Minimum bid based on current score
         min_bid = max(self.score // 10, 2)
         
         # Handle NaN predictions
-        if math.isnan(o[0][0]):
+        if math.isnan(output):
             self.bidding = min_bid
         else:
-            self.bidding = int(o[0][0] * (13 - min_bid) + min_bid)
+            self.bidding = int(output * (13 - min_bid) + min_bid)
         
         return self.bidding
 
-    def __repr__(self):
-        return (self.name + ": " + str(self.score) + '/' + str(self.number_of_won_turns))
-
-    def print_player_round_results(self):
-        """Display the player's round results with color coding."""
+    def getResult(self):
+        """
+        Calculate the score result for the current round.
+        
+        Scoring rules:
+        - If bid is met: gain points equal to bid
+        - If bid >= 7 and score < 30: double the points
+        - If bid is not met: lose points equal to bid (or doubled)
+        
+        Returns:
+            int: Points to add/subtract from score (negative if bid not met)
+        """
         ret = self.bidding
         if (self.bidding >= 7) and (self.score < 30):
             ret = ret * 2
@@ -116,6 +163,19 @@ class TarneebPlayer(Player.Player):
         else:
             return ret
 
+    def __repr__(self):
+        return (self.name + ": " + str(self.score) + '/' + str(self.number_of_won_turns))
+
+    def print_player_round_results(self):
+        """Display the player's round results with color coding."""
+        res = str(self.bidding) + ":" + str(self.number_of_won_turns).split(".")[0] + "/" + str(self.getResult() + self.score)
+        if self.number_of_won_turns > self.bidding:
+            print(colored(res, "blue"), end="\t")
+        elif self.number_of_won_turns == self.bidding:
+            print(res, end="\t")
+        else:
+            print(colored(res, "red"), end="\t")
+
     def roundOver(self):
         """
         Process end of round: update score and reset turn counter.
@@ -181,11 +241,8 @@ class TarneebPlayer(Player.Player):
         Returns:
             Card: The card chosen to play
         """
-        # Prepare played cards matrix (up to 3 cards)
-        played_cards = np.zeros(12)
-        for card in sdcards:
-            played_cards = np.concatenate((played_cards, card.card_to_matrix()))
-        played_cards = played_cards[-12:]
+        # Played cards (up to 3 cards), aligned to the end of the row
+        played_ids = padIds([c.cardId() for c in sdcards][-TRICK_SIZE:], TRICK_SIZE, right=True)
 
         # Player context information
         pc_matrix = np.array([
@@ -196,20 +253,17 @@ class TarneebPlayer(Player.Player):
         ])
 
         # Player hand representation
-        player_input_matrix = np.zeros(13 * 4)
-        for j, h in enumerate(self.hand):
-            player_input_matrix[j * 4:j * 4 + 4] = h.card_to_matrix()
+        hand_ids = padIds(handIds(self.mask), HAND_SIZE)
         
-        input_matrix = np.concatenate([pc_matrix, player_input_matrix, played_cards])
-        print('player input matrix', input_matrix.shape, input_matrix)
+        input_matrix = playingInput(pc_matrix, hand_ids, played_ids, out=self.play_input)
+        logging.debug('player input matrix %s %s', input_matrix.shape, input_matrix)
 
-        # Select card (currently random, can be replaced with NN prediction)
-        card = random.choice(self.hand)
+        # Select card (currently random, can be replaced with NN prediction
+        # masked by self.legalActions(sdcards))
         # Must follow suit if possible
-        if len(sdcards) > 0 and len(self.filterCardsByType(sdcards[0].type)) > 0:
-            card = random.choice(self.filterCardsByType(sdcards[0].type))
+        card = random.choice(maskToCards(legalMask(self.mask, trickLead(sdcards))))
         
-        self.hand.remove(card)
+        self.removeCard(card)
         return card
 
     def chooseCard(self, legalCards):
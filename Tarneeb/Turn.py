@@ -7,6 +7,31 @@ determining the winner, and computing loss functions for neural network training
 
 import numpy as np
 
+from Cards.Bitboard import handIds
+from Cards.Encoding import CONTEXT_SIZE, HAND_SIZE, TRICK_SIZE, padIds, playingInput
+
+
+def cardBeats(card, winCard, tarneeb):
+    """
+    Whether a card beats the card winning a turn so far.
+
+    This is the trick rule of Turn.winner on card ids (see Card.cardId),
+    shared with the search players: a card beats the winning card if it is
+    larger and of the same type, or if it is a tarneeb card and the winning
+    card is not.
+
+    Args:
+        card (int): Card id of the played card
+        winCard (int): Card id of the card winning so far
+        tarneeb (int): Tarneeb type id
+
+    Returns:
+        bool: True if card takes the lead of the turn
+    """
+    if card & 3 == winCard & 3:
+        return card > winCard
+    return card & 3 == tarneeb
+
 
 class Turn():
     """
@@ -23,7 +48,12 @@ class Turn():
         winCard (Card): The card that won this turn
         winnerId (int): ID of the player who won this turn
         winCardId (int): Index of winning card in played_cards
-        loss (dict): Loss values for each card (for training)
+        loss (dict): Loss values for each card (for training), computed on
+                     first access unless set for the whole round (see
+                     WinTable.playingLoss)
+        inputs (np.ndarray): (4, 68) playing inputs encoded by
+                             turn_to_matrices right after the turn, None
+                             until set (see GTarneeb.playRound)
     """
     
     def __init__(self, cards, tarneeb, serial=1, starting_player_id=0):
@@ -39,10 +69,21 @@ class Turn():
         self.serial = serial
         self.starting_player_id = starting_player_id
         self.played_cards = cards
-        self.loss = {}
+        self._loss = None
+        self.inputs = None
         self.tarneeb = tarneeb
         self.winner(self.tarneeb)
-        self.playing_loss_function()
+
+    @property
+    def loss(self):
+        """Loss value of each card, see playing_loss_function."""
+        if self._loss is None:
+            self.playing_loss_function()
+        return self._loss
+
+    @loss.setter
+    def loss(self, loss):
+        self._loss = loss
 
 
     def winner(self, tarneeb):
@@ -57,6 +98,19 @@ class Turn():
         Args:
             tarneeb (CardType): The trump suit for this round
         """
+        self.winCard = self.played_cards[0]
+        self.winCardId = 0
+        self.winnerId = self.starting_player_id
+        tarneeb_id = int(tarneeb)
+        for i in range(1, len(self.played_cards)):
+            card = self.played_cards[i]
+            # Check if this card beats the current winner
+            if cardBeats(card.cardId(), self.winCard.cardId(), tarneeb_id):
+                self.winCard = card
+                self.winCardId = i
+                self.winnerId = (i + self.starting_player_id) % 4
+
+    def __repr__(self):
         player_cards = '['
         for i, c in enumerate(self.played_cards):
             player_cards += str((self.starting_player_id + i)%4) + ':'
@@ -75,18 +129,7 @@ class Turn():
         return str(self.serial) + " " + player_cards + ' winner is ' + str(self.winnerId) + ' with card ' + str(
             self.winCard)
 
-        self.winCard = self.played_cards[0]
-        self.winnerId = self.starting_player_id
-        for i in range(1, len(self.played_cards)):
-            card = self.played_cards[i]
-            # Check if this card beats the current winner
-            if (card.largerThan(self.winCard) or 
-                (card.type == tarneeb and self.winCard.type != tarneeb)):
-                self.winCard = card
-                self.winCardId = i
-                self.winnerId = (i + self.starting_player_id) % 4
-
-    def __repr__(self):
+    def turn_to_matrices(self, players, out=None):
         '''
         - Bidding: scaled (1 value)
         - score: scaled (1 value)
@@ -96,73 +139,46 @@ class Turn():
         - already played cards in this turn (4*3), we can have up to 3 played cards
 
         :param players:
-        :return:
+        :param out: optional (4, 68) buffer to write into
+        :return: (4, 68) input rows, one per played card
         '''
-        played_cards = np.zeros(4 * 3)
-        turn_input_matrix = np.array([])
+        pc_matrix = np.empty((4, CONTEXT_SIZE))
+        hand_ids = np.empty((4, HAND_SIZE), dtype=np.int64)
+        played_ids = np.full((4, TRICK_SIZE), -1, dtype=np.int64)
+        card_ids = [c.cardId() for c in self.played_cards]
         
         for i, c in enumerate(self.played_cards):
-            player_id = (self.starting_player_id + i) % 4
+            player = players[(self.starting_player_id + i) % 4]
             
             # Player context: bidding, score, won turns ratio, is tarneeb
-            pc_matrix = np.array([
-                players[player_id].bidding / 13,
-                players[player_id].score / 41,
-                players[player_id].number_of_won_turns / players[player_id].bidding,
-                c.type == self.tarneeb
-            ])
-
-            # Player's hand representation (13 cards * 4 values each)
-            player_input_matrix = np.zeros(13 * 4)
-            for j, h in enumerate(players[player_id].hand):
-                player_input_matrix[j * 4:j * 4 + 4] = h.card_to_matrix()
-            
-            # Combine all input components
-            input_matrix = np.concatenate([pc_matrix, player_input_matrix, played_cards])
+            pc_matrix[i] = (player.bidding / 13, player.score / 41,
+                            player.number_of_won_turns / player.bidding,
+                            c.type == self.tarneeb)
             
-            # Update played cards for next player
-            if i < 3:
-                played_cards[i * 4:i * 4 + 4] = c.card_to_matrix()
-            
-            turn_input_matrix = np.append(turn_input_matrix, input_matrix)
+            # Player's hand (13 cards) and cards played before this one
+            hand_ids[i] = padIds(handIds(player.mask), HAND_SIZE)
+            played_ids[i, :min(i, TRICK_SIZE)] = card_ids[:min(i, TRICK_SIZE)]
         
-        return turn_input_matrix.reshape(4, 68)
+        return playingInput(pc_matrix, hand_ids, played_ids, out)
 
     def playing_loss_function(self):
         """
         Calculate loss values for each card played in this turn.
         
         Uses probability-based loss functions where cards are assigned
-        expected win probabilities based on their value. Tarneeb cards
-        have higher win probabilities.
+        expected win probabilities, looked up in the simulated win table
+        by value, tarneeb or not, position in the turn and turn number
+        (see Tarneeb.WinTable).
         
         The winning card's loss is adjusted based on the difference between
         its win probability and the average of all cards.
         
-        Note: These probability values are hard-coded and may need tuning
-        based on actual game statistics.
+        Returns:
+            dict: Loss value of each card
         """
-        # Win probabilities for regular cards based on value
-        card_win_prob = {
-            2: 0.012, 3: 0.013, 4: 0.019, 5: 0.028,
-            6: 0.044, 7: 0.068, 8: 0.101, 9: 0.148,
-            10: 0.206, 11: 0.28, 12: 0.38, 13: 0.5, 14: 0.65
-        }
-        
-        # Win probabilities for tarneeb (trump) cards - higher than regular
-        tarneeb_win_prob = {
-            2: 0.175, 3: 0.185, 4: 0.205, 5: 0.223,
-            6: 0.257, 7: 0.3, 8: 0.34, 9: 0.41,
-            10: 0.47, 11: 0.58, 12: 0.7, 13: 0.85, 14: 1.00
-        }
-
-        # Assign base loss to each card
-        for c in self.played_cards:
-            if c.type == self.tarneeb:
-                self.loss[c] = tarneeb_win_prob[c.value.value]
-            else:
-                self.loss[c] = card_win_prob[c.value.value]
-
-        # Adjust winning card's loss based on comparison with other cards
-        self.loss[self.winCard] = (4 * self.loss[self.winCard] - sum(self.loss.values())) * 0.01
-        print('turn analysis ', self.tarneeb.value, self.played_cards, self.winCard, self.loss)
+        # Imported here so that python -m Tarneeb.WinTable runs cleanly
+        from Tarneeb.WinTable import playingLoss
+        loss = playingLoss([[[c.cardId() for c in self.played_cards]]], [self.tarneeb.id],
+                           [[self.winCardId]], tricks=[[self.serial - 1]])
+        self._loss = dict(zip(self.played_cards, loss[0, 0].tolist()))
+        return self._loss
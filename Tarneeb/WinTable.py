@@ -0,0 +1,162 @@
+"""
+Simulated win probabilities of played cards, used by the playing loss.
+
+The win table holds the probability that a card wins its turn, indexed by
+(trump, value, position, trick) as in Tarneeb.CardStats:
+- trump (2): 1 if the card is of the tarneeb type
+- value (13): card value - 2
+- position (4): order of the card in its turn (0 leads)
+- trick (13): turn number - 1
+
+estimateWinTable plays large batches of rounds with random legal cards
+(BatchEngine) and counts them with CardStats. The table is stored as a
+small .npy file (WIN_TABLE_PATH) and loaded once by winTable. Without the
+file, the former hand-tuned probabilities are used for every position and
+trick.
+
+playingLoss computes Turn.playing_loss_function for whole rounds with one
+table lookup.
+
+Usage:
+    python -m Tarneeb.WinTable --rounds 1000000
+"""
+
+import argparse
+import logging
+import os
+
+import numpy as np
+
+from Tarneeb.BatchEngine import play_rounds, randomPolicy
+from Tarneeb.CardStats import CardStats
+
+
+WIN_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'win_table.npy')
+WIN_TABLE_SHAPE = (2, 13, 4, 13)
+WIN_TABLE_AXES = ('trump', 'value', 'position', 'trick')
+
+# Former hand-tuned win probabilities by value (2-14) of regular and tarneeb cards
+CARD_WIN_PROB = np.array([0.012, 0.013, 0.019, 0.028, 0.044, 0.068, 0.101,
+                          0.148, 0.206, 0.28, 0.38, 0.5, 0.65])
+TARNEEB_WIN_PROB = np.array([0.175, 0.185, 0.205, 0.223, 0.257, 0.3, 0.34,
+                             0.41, 0.47, 0.58, 0.7, 0.85, 1.00])
+
+
+def defaultWinTable():
+    """
+    Win table of the former hand-tuned probabilities.
+
+    Returns:
+        np.ndarray: WIN_TABLE_SHAPE table, equal over positions and tricks
+    """
+    table = np.stack([CARD_WIN_PROB, TARNEEB_WIN_PROB])
+    return np.ascontiguousarray(np.broadcast_to(table[:, :, None, None], WIN_TABLE_SHAPE))
+
+
+def estimateWinTable(rounds=1000000, batch_size=100000, seed=None):
+    """
+    Estimate the win table from simulated rounds.
+
+    Cells that no simulated card reached fall back to the win rate of the
+    card over all positions and tricks.
+
+    Args:
+        rounds (int): Number of rounds to simulate (default: 1000000)
+        batch_size (int): Rounds played in lockstep (default: 100000)
+        seed (int, optional): Seed of the deals and plays
+
+    Returns:
+        tuple: (WIN_TABLE_SHAPE float64 table, CardStats of the rounds)
+    """
+    rng = np.random.default_rng(seed)
+    policy = randomPolicy(rng)
+    stats = CardStats()
+    done = 0
+    while done < rounds:
+        n = min(batch_size, rounds - done)
+        stats.addBatch(play_rounds(n, policy, rng=rng))
+        done += n
+    table = stats.winRate(WIN_TABLE_AXES)
+    overall = stats.winRate(('trump', 'value'))[:, :, None, None]
+    table = np.where(np.isnan(table), overall, table)
+    return np.nan_to_num(table, nan=0.0), stats
+
+
+_table = None
+
+
+def winTable(path=WIN_TABLE_PATH):
+    """
+    The win table, loaded from disk on first use.
+
+    Args:
+        path (str): .npy file (default: WIN_TABLE_PATH)
+
+    Returns:
+        np.ndarray: WIN_TABLE_SHAPE table, read-only
+    """
+    global _table
+    if _table is None:
+        if os.path.exists(path):
+            table = np.load(path)
+            if table.shape != WIN_TABLE_SHAPE:
+                raise ValueError(path + ' has shape ' + str(table.shape))
+        else:
+            logging.info('no win table at ' + path + ', using the default probabilities')
+            table = defaultWinTable()
+        table.setflags(write=False)
+        _table = table
+    return _table
+
+
+def playingLoss(plays, tarneeb, win_positions, tricks=None, table=None):
+    """
+    Playing loss of every card of many turns, as Turn.playing_loss_function.
+
+    Each card gets its win probability; the winning card gets instead
+    (4 * its probability - sum of the turn's probabilities) * 0.01.
+
+    Args:
+        plays (array-like): (N, T, 4) card ids in playing order
+        tarneeb (array-like): (N,) tarneeb type id
+        win_positions (array-like): (N, T) index (0-3) of the winning card
+        tricks (array-like, optional): (N, T) turn number - 1 of each turn
+                                       (default: 0 to T-1)
+        table (np.ndarray, optional): Win table (default: winTable())
+
+    Returns:
+        np.ndarray: (N, T, 4) loss of every card
+    """
+    plays = np.asarray(plays, dtype=np.int64)
+    table = winTable() if table is None else table
+    tarneeb = np.asarray(tarneeb, dtype=np.int64)
+    if tricks is None:
+        tricks = np.arange(plays.shape[1])
+    tricks = np.broadcast_to(tricks, plays.shape[:2])
+    loss = table[(plays % 4 == tarneeb[:, None, None]).astype(np.int64), plays // 4,
+                 np.arange(4), tricks[..., None]]
+    win = np.asarray(win_positions, dtype=np.int64)[..., None]
+    adjusted = (4 * np.take_along_axis(loss, win, axis=-1) - loss.sum(axis=-1, keepdims=True)) * 0.01
+    np.put_along_axis(loss, win, adjusted, axis=-1)
+    return loss
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Estimate card win probabilities by simulation')
+    parser.add_argument('--rounds', type=int, default=1000000)
+    parser.add_argument('--batch-size', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', default=WIN_TABLE_PATH, help='.npy file to write')
+    parser.add_argument('--stats', help='also export the card statistics to this .npz file')
+    args = parser.parse_args(argv)
+
+    table, stats = estimateWinTable(args.rounds, args.batch_size, args.seed)
+    np.save(args.output, table.astype(np.float32))
+    if args.stats:
+        stats.export(args.stats)
+    print('win rate by value (regular, tarneeb):')
+    print(np.round(stats.winRate(('trump', 'value')), 3))
+
+
+if __name__ == '__main__':
+    main()
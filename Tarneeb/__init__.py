@@ -7,5 +7,6 @@ and turn handling for the Tarneeb card game.
 
 from Tarneeb.TarneebPlayer import TarneebPlayer
 from Tarneeb.Turn import Turn
+from Tarneeb.BatchEngine import play_rounds
 
-__all__ = ['TarneebPlayer', 'Turn']
+__all__ = ['TarneebPlayer', 'Turn', 'play_rounds']
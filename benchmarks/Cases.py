@@ -0,0 +1,149 @@
+"""
+Benchmarks of the game engine, the input encoders and model inference.
+
+Every module is imported inside its benchmark, so a missing dependency
+(keras) only skips the benchmarks that need it.
+"""
+
+import random
+
+import numpy as np
+
+from benchmarks.Runner import benchmark
+
+BATCH_SIZES = (1, 4, 16, 64, 256, 1024, 4096)
+QUICK_BATCH_SIZES = (1, 64, 4096)
+
+
+class _NoModel:
+    """Placeholder bidding model so players can be built without keras."""
+
+    def predict(self, x, *args, **kwargs):
+        return np.full((len(x), 1), 0.5)
+
+
+def _players():
+    from Tarneeb.TarneebPlayer import TarneebPlayer
+    return [TarneebPlayer(str(i), biddingModel=_NoModel()) for i in range(4)]
+
+
+def _deal(players, deck):
+    for p in players:
+        p.setHand(deck.distripute(13))
+
+
+def _batchSizes(recorder):
+    return QUICK_BATCH_SIZES if recorder.quick else BATCH_SIZES
+
+
+@benchmark('deck')
+def benchDeck(recorder):
+    """StandarDeck creation and distripute of the 4 hands, batched Dealer."""
+    from Cards.Dealer import Dealer, randomSeed
+    from Cards.StandarDeck import StandarDeck
+
+    def deal(deck):
+        for _ in range(4):
+            deck.distripute(13)
+
+    recorder.rate('shuffle_distripute', lambda: deal(StandarDeck(shuffled=True)),
+                  unit='deals/s')
+    recorder.rate('seeded_distripute', lambda: deal(StandarDeck(seed=randomSeed())),
+                  unit='deals/s')
+    n = 4096 if recorder.quick else 65536
+    dealer = Dealer(seed=0)
+    recorder.rate('dealer_%d' % n, lambda: dealer.deals(n), items=n, unit='deals/s')
+
+
+@benchmark('round')
+def benchRound(recorder):
+    """GTarneeb.playRound with random legal play."""
+    from Cards.Card import CardType
+    from Cards.StandarDeck import StandarDeck
+    from Tarneeb import GTarneeb
+
+    players = _players()
+    types = list(CardType)
+
+    def play():
+        _deal(players, StandarDeck(shuffled=True))
+        GTarneeb.playRound(players, random.choice(types))
+
+    recorder.rate('playRound', play, unit='rounds/s')
+
+
+@benchmark('engine')
+def benchEngine(recorder):
+    """BatchEngine.play_rounds with the random policy."""
+    from Tarneeb.BatchEngine import play_rounds, randomPolicy
+
+    n = 64 if recorder.quick else 1024
+    rng = np.random.default_rng(0)
+    policy = randomPolicy(rng)
+    recorder.rate('play_rounds_%d' % n, lambda: play_rounds(n, policy, rng=rng),
+                  items=n, unit='rounds/s')
+
+
+@benchmark('turn')
+def benchTurn(recorder):
+    """Turn construction (winner and loss computation)."""
+    from Cards.Card import CARDS, CardType
+    from Tarneeb.Turn import Turn
+
+    rng = random.Random(0)
+    tricks = [rng.sample(CARDS, 4) for _ in range(256)]
+    types = list(CardType)
+
+    def build():
+        for i, cards in enumerate(tricks):
+            Turn(cards, types[i & 3], serial=1 + i % 13, starting_player_id=i & 3)
+
+    recorder.record('construct', recorder.time(build) / len(tricks) * 1e6, 'us')
+
+
+@benchmark('encoding')
+def benchEncoding(recorder):
+    """Turn.turn_to_matrices and cardstoArray throughput."""
+    from Cards.Card import CardType
+    from Cards.StandarDeck import StandarDeck, cardstoArray
+    from Tarneeb.Turn import Turn
+
+    players = _players()
+    _deal(players, StandarDeck(shuffled=True))
+    trick = [p.hand[0] for p in players]
+    turn = Turn(trick, CardType.SPADE)
+    out = np.empty((4, 68))
+    recorder.rate('turn_to_matrices', lambda: turn.turn_to_matrices(players),
+                  items=4, unit='rows/s')
+    recorder.rate('turn_to_matrices_out', lambda: turn.turn_to_matrices(players, out),
+                  items=4, unit='rows/s')
+
+    hand = players[0].hand
+    mask = players[0].mask
+    recorder.rate('cardstoArray_list', lambda: cardstoArray(hand), unit='hands/s')
+    recorder.rate('cardstoArray_mask', lambda: cardstoArray(mask), unit='hands/s')
+
+
+@benchmark('bidding_model')
+def benchBiddingModel(recorder):
+    """GenModel.Model predict latency per batch size."""
+    import GenModel
+    from constants import BIDDING_INPUT_DIM
+
+    model = GenModel.Model()
+    for b in _batchSizes(recorder):
+        x = np.random.random((b, BIDDING_INPUT_DIM))
+        recorder.latency('predict_b%d' % b, lambda: model.predict(x, verbose=0))
+
+
+@benchmark('playing_model')
+def benchPlayingModel(recorder):
+    """GTarneeb.buildPlayingModel predict latency per batch size."""
+    from Tarneeb import GTarneeb
+    from Tarneeb.Sequences import TIMESTEPS
+    from constants import PLAYING_INPUT_DIM
+
+    model = GTarneeb.buildPlayingModel()
+    for b in _batchSizes(recorder):
+        x = np.random.random((b, TIMESTEPS, PLAYING_INPUT_DIM))
+        recorder.latency('predict_b%d' % b, lambda: model.predict(x, verbose=0))
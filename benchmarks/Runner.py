@@ -0,0 +1,226 @@
+"""
+Timing, result files and baseline comparison for the benchmark suite.
+
+Benchmarks are registered with the @benchmark decorator. Each one receives
+a Recorder and reports any number of named measurements; a benchmark whose
+dependencies are missing raises ImportError or SkipBenchmark and is
+reported as skipped instead of failing the run. Anything benchmarks print
+to stdout is discarded and logging is disabled while they run, so the
+timings measure the game code, not its progress output.
+
+Results are plain JSON:
+    {"machine": {...}, "results": {"name": {"value": v, "unit": u}},
+     "skipped": {"name": "reason"}}
+Units ending in "/s" are rates (higher is better), all others are times
+(lower is better).
+"""
+
+import contextlib
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import timeit
+
+
+BENCHMARKS = {}  # name -> function(recorder)
+
+
+class SkipBenchmark(Exception):
+    """Raised by a benchmark that cannot run in this environment."""
+
+
+def benchmark(name):
+    """
+    Register a benchmark function under a name.
+
+    Args:
+        name (str): Group name, used by --only and as the result prefix
+
+    Returns:
+        function: Decorator registering the function
+    """
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+def measure(fn, min_time=0.2, repeat=3):
+    """
+    Time a function, timeit style.
+
+    The number of calls per repetition grows until one repetition lasts at
+    least min_time; the best repetition is kept.
+
+    Args:
+        fn (callable): Function without arguments to time
+        min_time (float): Minimum seconds per repetition (default: 0.2)
+        repeat (int): Number of repetitions (default: 3)
+
+    Returns:
+        float: Seconds per call
+    """
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    best = elapsed
+    for _ in range(repeat - 1):
+        best = min(best, timer.timeit(number))
+    return best / number
+
+
+def higherIsBetter(unit):
+    """Whether a larger value is an improvement for this unit."""
+    return unit.endswith('/s')
+
+
+class Recorder:
+    """
+    Collects the measurements of one benchmark run.
+
+    Attributes:
+        quick (bool): Use fewer sizes and shorter timings
+        min_time (float): Minimum seconds per timing repetition
+        repeat (int): Timing repetitions
+        results (dict): name -> {"value", "unit"}
+    """
+
+    def __init__(self, quick=False):
+        self.quick = quick
+        self.min_time = 0.05 if quick else 0.2
+        self.repeat = 2 if quick else 3
+        self.results = {}
+
+    def time(self, fn):
+        """Seconds per call of fn, see measure."""
+        return measure(fn, self.min_time, self.repeat)
+
+    def rate(self, name, fn, items=1, unit='ops/s'):
+        """
+        Record the throughput of fn.
+
+        Args:
+            name (str): Measurement name
+            fn (callable): Function processing items per call
+            items (int): Items processed per call (default: 1)
+            unit (str): Rate unit (default: 'ops/s')
+        """
+        self.record(name, items / self.time(fn), unit)
+
+    def latency(self, name, fn, unit='ms'):
+        """
+        Record the time per call of fn.
+
+        Args:
+            name (str): Measurement name
+            fn (callable): Function to time
+            unit (str): One of 's', 'ms' or 'us' (default: 'ms')
+        """
+        scale = {'s': 1, 'ms': 1e3, 'us': 1e6}[unit]
+        self.record(name, self.time(fn) * scale, unit)
+
+    def record(self, name, value, unit):
+        """Store a measurement."""
+        self.results[name] = {'value': float(value), 'unit': unit}
+
+
+def machineInfo():
+    """Platform description stored next to the results."""
+    import numpy as np
+    return {'python': platform.python_version(), 'numpy': np.__version__,
+            'platform': platform.platform(), 'processor': platform.processor(),
+            'cpus': os.cpu_count(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def runBenchmarks(names=None, quick=False, log=sys.stderr):
+    """
+    Run registered benchmarks.
+
+    Args:
+        names (list, optional): Benchmark names to run (default: all)
+        quick (bool): Use fewer sizes and shorter timings (default: False)
+        log (file, optional): Where progress lines are written
+
+    Returns:
+        dict: Results document (see module docstring)
+
+    Raises:
+        KeyError: If a requested benchmark does not exist
+    """
+    names = list(BENCHMARKS) if not names else names
+    doc = {'machine': machineInfo(), 'results': {}, 'skipped': {}}
+    disabled = logging.root.manager.disable
+    for name in names:
+        recorder = Recorder(quick)
+        try:
+            # Game code prints and logs its progress; keep stdout for the results
+            logging.disable(logging.CRITICAL)
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                BENCHMARKS[name](recorder)
+        except (ImportError, SkipBenchmark) as e:
+            doc['skipped'][name] = str(e)
+            if log:
+                print('%-40s skipped: %s' % (name, e), file=log)
+            continue
+        finally:
+            logging.disable(disabled)
+        for key, res in recorder.results.items():
+            doc['results'][name + '.' + key] = res
+            if log:
+                print('%-40s %14.3f %s' % (name + '.' + key, res['value'], res['unit']), file=log)
+    return doc
+
+
+def saveResults(doc, path):
+    """Write a results document as JSON."""
+    with open(path, 'w') as f:
+        json.dump(doc, f, indent=2, sort_keys=True)
+
+
+def loadResults(path):
+    """Read a results document written by saveResults."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def compareResults(doc, baseline, tolerance=0.1):
+    """
+    Compare results with a baseline.
+
+    Args:
+        doc (dict): Current results document
+        baseline (dict): Baseline results document
+        tolerance (float): Allowed relative slowdown (default: 0.1)
+
+    Returns:
+        list: (name, baseline value, value, change, regressed) for every
+              measurement present in both documents. change is the relative
+              speedup: positive is faster, negative slower.
+    """
+    rows = []
+    for name, res in sorted(doc['results'].items()):
+        base = baseline['results'].get(name)
+        if base is None or base['unit'] != res['unit'] or base['value'] <= 0 or res['value'] <= 0:
+            continue
+        if higherIsBetter(res['unit']):
+            change = res['value'] / base['value'] - 1
+        else:
+            change = base['value'] / res['value'] - 1
+        rows.append((name, base['value'], res['value'], change, change < -tolerance))
+    return rows
+
+
+def formatComparison(rows):
+    """Human readable table of compareResults rows."""
+    lines = ['%-40s %14s %14s %8s' % ('benchmark', 'baseline', 'current', 'change')]
+    for name, base, value, change, regressed in rows:
+        lines.append('%-40s %14.3f %14.3f %+7.1f%%%s' % (name, base, value, 100 * change,
+                                                         '  SLOWER' if regressed else ''))
+    return '\n'.join(lines)
@@ -0,0 +1,19 @@
+"""
+Benchmark suite for the game engine, input encoders and model inference.
+
+Run from the repository root:
+    python -m benchmarks                       # run everything, print results
+    python -m benchmarks --only deck turn      # run some benchmarks
+    python -m benchmarks --save-baseline       # store benchmarks/baseline.json
+    python -m benchmarks --baseline benchmarks/baseline.json --tolerance 0.1
+
+When a baseline is given the run exits with status 1 if any measurement is
+slower than the baseline by more than the tolerance.
+"""
+
+from benchmarks.Runner import (BENCHMARKS, SkipBenchmark, benchmark, compareResults,
+                               loadResults, runBenchmarks, saveResults)
+import benchmarks.Cases  # noqa: F401 (registers the benchmarks)
+
+__all__ = ['BENCHMARKS', 'SkipBenchmark', 'benchmark', 'compareResults',
+           'loadResults', 'runBenchmarks', 'saveResults']
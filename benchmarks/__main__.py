@@ -0,0 +1,47 @@
+"""Command line entry point: python -m benchmarks --help."""
+
+import argparse
+import json
+import os
+import sys
+
+from benchmarks import BENCHMARKS, compareResults, loadResults, runBenchmarks, saveResults
+from benchmarks.Runner import formatComparison
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tarneeb benchmark suite')
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS),
+                        help='benchmarks to run (default: all)')
+    parser.add_argument('--quick', action='store_true',
+                        help='fewer batch sizes and shorter timings')
+    parser.add_argument('--output', help='write the results JSON to this file')
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE,
+                        help='compare with a results file (default: benchmarks/baseline.json)')
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE,
+                        help='store the results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='allowed relative slowdown before failing (default: 0.1)')
+    args = parser.parse_args(argv)
+
+    doc = runBenchmarks(args.only, quick=args.quick)
+    if args.output:
+        saveResults(doc, args.output)
+    else:
+        json.dump(doc, sys.stdout, indent=2, sort_keys=True)
+        print()
+    if args.save_baseline:
+        saveResults(doc, args.save_baseline)
+
+    if args.baseline:
+        rows = compareResults(doc, loadResults(args.baseline), args.tolerance)
+        print(formatComparison(rows), file=sys.stderr)
+        if any(row[-1] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -35,3 +35,6 @@ PLAYING_INPUT_DIM = 68  # Input dimension for playing model
 
 # Training constants
 DEFAULT_BATCH_SIZE = 4  # Default batch size for neural network training
+DATASET_BATCH_SIZE = 1024  # Batch size for offline training from game records
+SHUFFLE_BUFFER_SIZE = 100000  # Samples held by the offline shuffle buffer
+MODEL_CACHE_DIR = '.model_cache'  # Initial weights cached by architecture (ModelCache)
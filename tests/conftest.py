@@ -0,0 +1,9 @@
+"""
+Shared pytest setup: the modules of the repository are imported from its
+root, as when running the scripts from there.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,36 @@
+"""Tests of the input checks of Tarneeb.BatchEngine.play_rounds."""
+
+import numpy as np
+import pytest
+
+from Tarneeb.BatchEngine import play_rounds, randomPolicy, shuffledDeals
+
+
+def test_random_rounds_are_complete():
+    rng = np.random.default_rng(0)
+    batch = play_rounds(64, randomPolicy(rng), rng=rng)
+    assert (batch.tricks.sum(axis=1) == 13).all()
+    assert (np.sort(batch.plays.reshape(64, 52), axis=1) == np.arange(52)).all()
+
+
+@pytest.mark.parametrize('card', [-1, -52, 52, 100])
+def test_out_of_range_action_is_rejected(card):
+    with pytest.raises(ValueError):
+        play_rounds(4, lambda obs: np.full(4, card))
+
+
+def test_action_shape_is_checked():
+    with pytest.raises(ValueError):
+        play_rounds(4, lambda obs: obs['legal'].argmax(axis=1)[:2])
+
+
+def test_deals_are_checked():
+    deals = shuffledDeals(4, np.random.default_rng(1))
+    policy = randomPolicy(np.random.default_rng(2))
+    with pytest.raises(ValueError):
+        play_rounds(3, policy, deals=deals)
+    with pytest.raises(ValueError):
+        play_rounds(4, policy, deals=deals[:, :51])
+    deals[2, 0] = deals[2, 1]
+    with pytest.raises(ValueError):
+        play_rounds(4, policy, deals=deals)
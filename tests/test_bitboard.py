@@ -0,0 +1,88 @@
+"""Tests of Cards.Bitboard."""
+
+import random
+
+import numpy as np
+import pytest
+
+from Cards.Bitboard import (FULL_MASK, HAND_ORDER, bestLegalActions, cardsToMask, handIds,
+                            legalMask, maskToArray, maskToCards, maskToHand, maskToIds, popcount)
+from Cards.Card import CARDS, CardType
+
+
+def randomHand(rng, size=13):
+    return rng.sample(CARDS, size)
+
+
+@pytest.mark.parametrize('size', [0, 1, 5, 13, 52])
+def test_mask_round_trip(size):
+    rng = random.Random(size)
+    for _ in range(50):
+        cards = randomHand(rng, size)
+        mask = cardsToMask(cards)
+        assert popcount(mask) == size
+        assert set(maskToCards(mask)) == set(cards)
+        assert cardsToMask(maskToCards(mask)) == mask
+        assert maskToIds(mask) == sorted((c.cardId() for c in cards), reverse=True)
+
+
+def test_full_mask():
+    assert cardsToMask(CARDS) == FULL_MASK
+    assert maskToCards(FULL_MASK) == list(reversed(CARDS))
+    assert maskToCards(0) == []
+
+
+def test_mask_to_array():
+    cards = randomHand(random.Random(0))
+    array = maskToArray(cardsToMask(cards), 0.5)
+    assert array.shape == (52,)
+    assert sorted(np.flatnonzero(array)) == sorted(c.cardId() for c in cards)
+    assert (array[array > 0] == 0.5).all()
+
+
+def test_hand_order_matches_card_sort():
+    rng = random.Random(1)
+    for _ in range(100):
+        cards = randomHand(rng)
+        assert maskToHand(cardsToMask(cards)) == sorted(cards, reverse=True)
+    assert sorted(HAND_ORDER) == list(range(52))
+    assert handIds(FULL_MASK) == list(HAND_ORDER)
+
+
+def bruteForceLegal(cards, lead):
+    follow = [c for c in cards if lead is not None and c.type == lead]
+    return set(follow or cards)
+
+
+@pytest.mark.parametrize('lead', [None] + list(CardType))
+def test_legal_mask(lead):
+    rng = random.Random(str(lead))
+    for _ in range(100):
+        cards = randomHand(rng, rng.randint(1, 13))
+        mask = cardsToMask(cards)
+        expected = bruteForceLegal(cards, lead)
+        assert set(maskToCards(legalMask(mask, lead))) == expected
+        lead_id = -1 if lead is None else lead.id
+        assert set(maskToCards(legalMask(mask, lead_id))) == expected
+        assert set(maskToCards(legalMask(mask, np.int64(lead_id)))) == expected
+
+
+def test_legal_mask_is_subset_of_hand():
+    rng = random.Random(2)
+    for _ in range(100):
+        mask = cardsToMask(randomHand(rng, rng.randint(0, 13)))
+        for lead in CardType:
+            legal = legalMask(mask, lead)
+            assert legal & ~mask == 0
+            assert (legal == 0) == (mask == 0)
+
+
+def test_best_legal_actions():
+    scores = np.arange(52.0)[::-1].repeat(2).reshape(52, 2).T.copy()
+    legal = np.zeros((2, 52), dtype=bool)
+    legal[0, [7, 30]] = True
+    legal[1, 51] = True
+    assert bestLegalActions(scores, legal).tolist() == [7, 51]
+    legal[1] = False
+    with pytest.raises(ValueError):
+        bestLegalActions(scores, legal)
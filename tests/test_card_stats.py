@@ -0,0 +1,89 @@
+"""Tests of the counters of Tarneeb.CardStats."""
+
+import numpy as np
+import pytest
+
+from Tarneeb.BatchEngine import play_rounds, randomPolicy
+from Tarneeb.CardStats import STATS_SHAPE, CardStats
+from Tarneeb.GameRecord import recordsFromBatch, replayTurns
+
+
+def _batch(n, seed):
+    rng = np.random.default_rng(seed)
+    return play_rounds(n, randomPolicy(rng), rng=rng)
+
+
+def legacyRecord(turns, tarneeb):
+    """The former GTarneeb cards_record dict, counted card by card."""
+    record = {}
+    for turn in turns:
+        for c in turn.played_cards:
+            k = str(c.value.value)
+            if c == turn.winCard:
+                k += '-W'
+            if c.type == tarneeb:
+                k = 'T-' + k
+            record[k] = record.get(k, 0) + 1
+    return record
+
+
+def test_hand_counted_turns():
+    # Tarneeb type 1. Turn 1, led by seat 0: the 3 of tarneeb of seat 2
+    # wins. Turn 2, led by seat 2: the Ace of tarneeb of seat 1 wins.
+    stats = CardStats()
+    stats.addRounds([[[48, 0, 5, 44], [51, 47, 2, 49]]], [[0, 2]], [[2, 1]], [1])
+    expected = np.zeros(STATS_SHAPE, dtype=np.int64)
+    for cell in [(0, 12, 0, 0, 0, 0), (0, 0, 0, 1, 1, 0), (1, 1, 1, 2, 2, 0),
+                 (0, 11, 0, 3, 3, 0), (0, 12, 0, 2, 0, 1), (0, 11, 0, 3, 1, 1),
+                 (0, 0, 0, 0, 2, 1), (1, 12, 1, 1, 3, 1)]:
+        expected[cell] += 1
+    np.testing.assert_array_equal(stats.counts, expected)
+    assert stats.toRecord() == {'14': 2, '13': 2, '2': 2, 'T-3-W': 1, 'T-14-W': 1}
+    rates = stats.winRate(('trump',))
+    assert rates.tolist() == [0.0, 1.0]
+
+
+def test_records_match_the_legacy_dict():
+    batch = _batch(16, 0)
+    records = recordsFromBatch(batch, np.full((16, 4), 3))
+    stats = CardStats()
+    stats.addRecords(records)
+    legacy = {}
+    for rec in records:
+        tarneeb, turns = replayTurns(rec)
+        for k, v in legacyRecord(turns, tarneeb).items():
+            legacy[k] = legacy.get(k, 0) + v
+    assert any(k.startswith('T-') and k.endswith('-W') for k in legacy)
+    assert stats.toRecord() == legacy
+    assert stats.total() == 16 * 52
+
+    from_batch = CardStats()
+    from_batch.addBatch(batch)
+    np.testing.assert_array_equal(from_batch.counts, stats.counts)
+
+
+def test_merge_drain_and_export(tmp_path):
+    a, b, both = CardStats(), CardStats(), CardStats()
+    first, second = _batch(8, 1), _batch(8, 2)
+    a.addBatch(first)
+    b.addBatch(second)
+    both.addBatch(first)
+    both.addBatch(second)
+    merged = a.copy().merge(b)
+    np.testing.assert_array_equal(merged.counts, both.counts)
+
+    drained = a.drain()
+    assert a.total() == 0 and drained.total() == 8 * 52
+
+    path = str(tmp_path / 'stats.npz')
+    both.export(path)
+    loaded = CardStats.load(path)
+    np.testing.assert_array_equal(loaded.counts, both.counts)
+    assert loaded.toRecord() == both.toRecord()
+
+
+def test_load_rejects_other_axes(tmp_path):
+    path = str(tmp_path / 'other.npz')
+    np.savez(path, counts=np.zeros(STATS_SHAPE, dtype=np.int64), axes=np.array(['a', 'b']))
+    with pytest.raises(ValueError):
+        CardStats.load(path)
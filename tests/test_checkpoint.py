@@ -0,0 +1,38 @@
+"""Tests of the files written by Tarneeb.Checkpoint.CheckpointManager."""
+
+import os
+
+from Tarneeb.Checkpoint import CheckpointManager
+
+
+def test_queued_checkpoints_are_written_on_close(tmp_path):
+    with CheckpointManager(str(tmp_path), keep=2) as checkpoints:
+        for step in range(1, 4):
+            checkpoints.save({'step': step}, step)
+    assert checkpoints.steps() == [2, 3]
+    assert checkpoints.load() == {'step': 3}
+
+
+def test_unfinished_checkpoints_are_removed(tmp_path):
+    with CheckpointManager(str(tmp_path)) as checkpoints:
+        checkpoints.save({'step': 1}, 1)
+    stale = checkpoints.path(2) + '.tmp'
+    with open(stale, 'wb') as f:
+        f.write(b'partial')
+    other = tmp_path / 'notes.tmp'
+    other.write_text('kept')
+    CheckpointManager(str(tmp_path)).close()
+    assert not os.path.exists(stale)
+    assert other.exists()
+    assert checkpoints.steps() == [1]
+
+
+def test_clear_lets_a_new_run_keep_its_checkpoints(tmp_path):
+    with CheckpointManager(str(tmp_path), keep=3) as old:
+        for step in (100, 110, 120):
+            old.save({'run': 'old', 'step': step}, step)
+    with CheckpointManager(str(tmp_path), keep=3) as checkpoints:
+        checkpoints.clear()
+        checkpoints.save({'run': 'new', 'step': 10}, 10)
+    assert checkpoints.steps() == [10]
+    assert checkpoints.load() == {'run': 'new', 'step': 10}
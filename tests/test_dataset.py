@@ -0,0 +1,48 @@
+"""Tests that Tarneeb.Dataset encodes records like the live game."""
+
+import collections
+
+import numpy as np
+
+from Tarneeb.BatchEngine import play_rounds, randomPolicy
+from Tarneeb.Dataset import playingArrays, playingDataset
+from Tarneeb.GameRecord import GameRecordWriter, recordsFromBatch, replayRound
+from Tarneeb.Sequences import padRows, roundWindows
+from Tarneeb.TarneebPlayer import TarneebPlayer
+
+
+def _records(n, seed):
+    rng = np.random.default_rng(seed)
+    batch = play_rounds(n, randomPolicy(rng), rng=rng)
+    bids = rng.integers(2, 14, (n, 4))
+    scores = rng.integers(0, 41, (n, 4))
+    return recordsFromBatch(batch, bids, scores)
+
+
+def test_playing_arrays_match_replayed_turns():
+    records = _records(8, 0)
+    X, _ = playingArrays(records)
+    players = [TarneebPlayer('p' + str(i)) for i in range(4)]
+    for rec, rows in zip(records, X):
+        live = np.concatenate([turn.turn_to_matrices(players)
+                               for _, turn in replayRound(rec, players)])
+        np.testing.assert_allclose(rows, live, rtol=1e-6)
+
+
+def test_playing_dataset_yields_every_window_once(tmp_path):
+    records = _records(7, 1)
+    path = str(tmp_path / 'games.trn')
+    with GameRecordWriter(path) as writer:
+        for rec in records:
+            writer.append(rec)
+    X, Y = playingArrays(records)
+    expected = collections.Counter(
+        w.tobytes() + y.tobytes()
+        for w, y in zip(roundWindows(padRows(X)).reshape(-1, 52, 68), Y.reshape(-1, 4)))
+    sizes, seen = [], collections.Counter()
+    for xb, yb in playingDataset([path], batch_size=100, buffer_size=52 * 4,
+                                 workers=0, chunk_size=3, seed=0):
+        sizes.append(len(xb))
+        seen.update(w.tobytes() + y.tobytes() for w, y in zip(xb, yb))
+    assert sizes == [100, 100, 100, 64]
+    assert seen == expected
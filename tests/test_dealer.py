@@ -0,0 +1,42 @@
+"""Tests of the seeded deals of Cards.Dealer."""
+
+import numpy as np
+
+from Cards.Dealer import (DEAL_CHUNK, Dealer, dealFromSeed, dealHands, dealTarneeb,
+                          dealsFromSeeds)
+from Cards.StandarDeck import StandarDeck
+
+
+def test_deals_are_permutations():
+    seeds, deals = Dealer(seed=0).deals(DEAL_CHUNK + 100)
+    assert deals.shape == (DEAL_CHUNK + 100, 52)
+    assert (np.sort(deals, axis=1) == np.arange(52)).all()
+    assert len({d.tobytes() for d in deals}) == len(deals)
+    assert (dealTarneeb(deals) == deals[:, 51] % 4).all()
+
+
+def test_scalar_and_batch_deals_agree():
+    # Edge seeds and the seeds of a stream, across a DEAL_CHUNK boundary
+    seeds = np.concatenate((np.array([0, 1, 2 ** 63, 2 ** 64 - 1], dtype=np.uint64),
+                            Dealer(seed=7).seeds(DEAL_CHUNK + 10)))
+    batch = dealsFromSeeds(seeds)
+    for i in list(range(20)) + list(range(DEAL_CHUNK - 5, len(seeds))):
+        np.testing.assert_array_equal(dealFromSeed(int(seeds[i])), batch[i])
+
+
+def test_same_seed_same_deal():
+    first, second = Dealer(seed=3), Dealer(seed=3)
+    for n in (5, 17):
+        s1, d1 = first.deals(n)
+        s2, d2 = second.deals(n)
+        np.testing.assert_array_equal(s1, s2)
+        np.testing.assert_array_equal(d1, d2)
+    assert first.count == 22
+    assert not (Dealer(seed=4).seeds(22) == Dealer(seed=3).seeds(22)).any()
+
+
+def test_seeded_deck_deals_the_hands_of_its_seed():
+    seed = 123456789
+    deck = StandarDeck(seed=seed)
+    hands = [deck.distripute(13) for _ in range(4)]
+    assert hands == dealHands(dealFromSeed(seed))
@@ -0,0 +1,85 @@
+"""Tests of Tarneeb.DoubleDummy against a brute-force search."""
+
+import random
+
+import pytest
+
+from Cards.Bitboard import legalMask, maskToIds
+from Cards.Card import CARDS, CardType
+from Tarneeb.DoubleDummy import DoubleDummySolver, sideBiddingTargets
+from Tarneeb.Turn import Turn
+
+TYPES = sorted(CardType, key=lambda t: t.id)
+
+
+def bruteForce(hands, leader, tarneeb):
+    """Tricks of seats 0 and 2 with perfect play, by full minimax."""
+    if not hands[0]:
+        return 0
+
+    def play(trick):
+        seat = (leader + len(trick)) % 4
+        lead = trick[0] % 4 if trick else -1
+        values = []
+        for c in maskToIds(legalMask(hands[seat], lead)):
+            hands[seat] ^= 1 << c
+            if len(trick) == 3:
+                turn = Turn([CARDS[i] for i in trick + [c]], TYPES[tarneeb],
+                            starting_player_id=leader)
+                won = 1 - turn.winnerId % 2
+                values.append(won + bruteForce(hands, turn.winnerId, tarneeb))
+            else:
+                values.append(play(trick + [c]))
+            hands[seat] ^= 1 << c
+        return max(values) if seat % 2 == 0 else min(values)
+
+    return play([])
+
+
+def randomPosition(rng, size, types=4):
+    pool = [c for c in range(52) if c % 4 < types]
+    cards = rng.sample(pool, 4 * size)
+    return [sum(1 << c for c in cards[i * size:(i + 1) * size]) for i in range(4)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 3])
+def test_matches_brute_force(size):
+    rng = random.Random(size)
+    solver = DoubleDummySolver()
+    for _ in range(60):
+        # Few types make following, ruffing and discarding frequent
+        hands = randomPosition(rng, size, rng.choice([2, 3, 4]))
+        tarneeb = rng.randrange(4)
+        leader = rng.randrange(4)
+        expected = bruteForce(list(hands), leader, tarneeb)
+        assert solver.solve(hands, tarneeb, leader) == (expected, size - expected)
+
+
+def test_top_cards_win_every_trick():
+    # Seat 0 holds the four Aces and leads; no one else can win a trick
+    aces = sum(1 << (48 + t) for t in range(4))
+    others = [sum(1 << (4 * v + t) for t in range(4)) for v in range(3)]
+    assert DoubleDummySolver().solve([aces] + others, 0, leader=0) == (4, 0)
+
+
+def test_solve_deal_uses_last_card_as_tarneeb():
+    # Seat i holds the 13 cards of type (i + 1) % 4; the last card dealt
+    # is a club, held by seat 3, who ruffs every trick
+    deal = [4 * v + (i + 1) % 4 for i in range(4) for v in range(13)]
+    solver = DoubleDummySolver()
+    assert solver.solveDeal(deal) == (0, 13)
+    assert solver.solveDeal(deal, tarneeb=1) == (13, 0)
+
+
+def test_side_targets_give_each_seat_its_side_tricks():
+    deal = [4 * v + (i + 1) % 4 for i in range(4) for v in range(13)]
+    targets = sideBiddingTargets([deal], tarneebs=[1])
+    assert targets.tolist() == [[1.0, -2 / 11, 1.0, -2 / 11]]
+
+
+def test_invalid_hands():
+    solver = DoubleDummySolver()
+    with pytest.raises(ValueError):
+        solver.solve([0b1, 0b10, 0b100, 0b11000], 0)
+    with pytest.raises(ValueError):
+        solver.solve([0b1, 0b1, 0b100, 0b1000], 0)
@@ -0,0 +1,32 @@
+"""Tests of the record fields of Tarneeb.GameRecord."""
+
+import numpy as np
+
+from Tarneeb.BatchEngine import play_rounds, randomPolicy
+from Tarneeb.GameRecord import recordsFromBatch, replayRound, roundRecord
+from Tarneeb.TarneebPlayer import TarneebPlayer
+
+
+def _batch(n, seed):
+    rng = np.random.default_rng(seed)
+    return play_rounds(n, randomPolicy(rng), rng=rng)
+
+
+def test_out_of_range_values_are_clipped_not_wrapped():
+    batch = _batch(1, 0)
+    rec = recordsFromBatch(batch, [[-3, 5, 40, 300]], scores=[[0, 0, 40000, -40000]])[0]
+    assert rec['bids'].tolist() == [0, 5, 13, 13]
+    assert rec['deltas'][3] == -128
+    assert rec['scores'].tolist() == [0, 0, 32767, -32768]
+
+
+def test_round_record_clips_mutated_bids():
+    rec = recordsFromBatch(_batch(1, 1), [[3, 3, 3, 3]])[0]
+    players = [TarneebPlayer('p' + str(i)) for i in range(4)]
+    replayed = list(replayRound(rec, players))
+    tarneeb, turns = replayed[0][0], [turn for _, turn in replayed]
+    players[0].bidding, players[1].bidding = -2, 20
+    hands = rec['deal'].reshape(4, 13)
+    again = roundRecord(players, hands, tarneeb, turns, [0, 0, 0, 0])
+    assert again['bids'].tolist() == [0, 13, 3, 3]
+    np.testing.assert_array_equal(again['plays'], rec['plays'])
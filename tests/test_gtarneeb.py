@@ -0,0 +1,27 @@
+"""Tests of the training helpers of Tarneeb.GTarneeb."""
+
+import numpy as np
+
+from Tarneeb.GTarneeb import trainBiddingModels
+from Tarneeb.ModelRegistry import ModelRegistry
+from Tarneeb.TarneebPlayer import TarneebPlayer
+
+
+class CountingModel:
+    def __init__(self):
+        self.fits = 0
+
+    def fit(self, X, Y, **kwargs):
+        self.fits += 1
+
+
+def test_shared_bidding_model_trains_once():
+    registry = ModelRegistry(factory=CountingModel)
+    shared = registry.create()
+    own = CountingModel()
+    players = [TarneebPlayer('p' + str(i), biddingModelId=shared, registry=registry)
+               for i in range(3)]
+    players.append(TarneebPlayer('p3', biddingModel=own))
+    trainBiddingModels(players, np.zeros((4, 64)), np.zeros(4))
+    assert registry.get(shared).fits == 1
+    assert own.fits == 1
@@ -0,0 +1,140 @@
+"""Tests of the determinization search of Tarneeb.MonteCarloPlayer."""
+
+import random
+import time
+
+import numpy as np
+
+from Cards.Bitboard import TYPE_MASKS, cardsToMask, legalMask, maskToIds, trickLead
+from Cards.Card import CARDS, CardType
+from Cards.Dealer import dealFromSeed, dealHands, dealTarneeb
+from Tarneeb.MonteCarloPlayer import MonteCarloPlayer, evaluateCards, sampleHands
+from Tarneeb.Turn import Turn
+
+
+def _tarneeb(seed):
+    tid = int(dealTarneeb(dealFromSeed(seed)))
+    return next(t for t in CardType if t.id == tid)
+
+
+def _playRound(players, seed, check=None):
+    """Play a round of the seeded deal, calling check before every card."""
+    tarneeb = _tarneeb(seed)
+    for seat, (p, hand) in enumerate(zip(players, dealHands(dealFromSeed(seed)))):
+        p.setHand(hand)
+        p.startRound(seat, tarneeb)
+    leader, played = 0, []
+    for serial in range(13):
+        cards = []
+        for pos in range(4):
+            seat = (leader + pos) % 4
+            if check is not None:
+                check(players[seat], cards)
+            cards.append(players[seat].playCard(cards))
+        turn = Turn(cards, tarneeb, serial=serial + 1, starting_player_id=leader)
+        for p in players:
+            p.observeTurn(turn)
+        played.append(turn)
+        leader = turn.winnerId
+    return played
+
+
+def test_plays_only_legal_cards():
+    players = [MonteCarloPlayer('p' + str(i), budget_ms=2, seed=i) for i in range(4)]
+    chosen = []
+
+    def check(player, cards):
+        chosen.append(legalMask(player.mask, trickLead(cards)))
+
+    turns = _playRound(players, 11, check)
+    played = [c.cardId() for t in turns for c in t.played_cards]
+    assert sorted(played) == list(range(52))
+    for legal, t in zip(chosen, played):
+        assert legal & (1 << t)
+    assert all(p.mask == 0 for p in players)
+
+
+def test_same_seed_same_choices():
+    def choices(seed):
+        players = [MonteCarloPlayer('p' + str(i), budget_ms=10000, seed=seed + i,
+                                    max_samples=8) for i in range(4)]
+        return [c.cardId() for t in _playRound(players, 5) for c in t.played_cards]
+
+    assert choices(100) == choices(100)
+    player = MonteCarloPlayer('p')
+    player.setHand(dealHands(dealFromSeed(5))[0])
+    state = player.state([])
+    candidates = maskToIds(player.mask)
+    first = evaluateCards(state, candidates, 10, seed=3, max_samples=20)
+    second = evaluateCards(state, candidates, 10, seed=3, max_samples=20)
+    assert first[1] == second[1] == 20
+    np.testing.assert_array_equal(first[0], second[0])
+
+
+def test_observed_turns_record_voids():
+    player = MonteCarloPlayer('p')
+    player.startRound(0, CardType.HEART)
+    lead = CARDS[4 * 5 + CardType.SPADE.id]
+    cards = [lead, CARDS[4 * 7 + CardType.SPADE.id],
+             CARDS[4 * 2 + CardType.HEART.id], CARDS[4 * 9 + CardType.CLUB.id]]
+    # Seat 1 led, so seats 3 and 0 failed to follow spades
+    player.observeTurn(Turn(cards, CardType.HEART, starting_player_id=1))
+    spades = TYPE_MASKS[CardType.SPADE.id]
+    assert player.voids == [spades, 0, 0, spades]
+    assert player.played == cardsToMask(cards)
+    assert player.turns_done == 1
+    # A void in the current trick is known before the turn ends
+    s = player.state([CARDS[4 * 3 + CardType.CLUB.id], CARDS[4 * 4 + CardType.DIAMOND.id]])
+    assert s['leader'] == 2 and s['voids'][3] == spades | TYPE_MASKS[CardType.CLUB.id]
+    assert s['counts'] == [12, 12, 11, 11]
+
+
+def test_sampled_hands_respect_counts_and_voids():
+    player = MonteCarloPlayer('p')
+    hands = dealHands(dealFromSeed(21))
+    player.setHand(hands[2])
+    player.startRound(2, _tarneeb(21))
+    player.voids[1] = TYPE_MASKS[CardType.HEART.id]
+    player.voids[3] = TYPE_MASKS[CardType.CLUB.id]
+    trick = [hands[0][0]]
+    state = player.state(trick)
+    rng = random.Random(0)
+    for _ in range(50):
+        sample = sampleHands(state, rng)
+        assert sample[2] == player.mask
+        assert [bin(h).count('1') for h in sample] == state['counts']
+        assert sample[0] | sample[1] | sample[3] == state['unknown']
+        assert not (sample[0] & sample[1] or sample[1] & sample[3] or sample[0] & sample[3])
+        assert not sample[1] & TYPE_MASKS[CardType.HEART.id]
+        assert not sample[3] & TYPE_MASKS[CardType.CLUB.id]
+
+
+def test_search_stops_at_the_time_budget():
+    player = MonteCarloPlayer('p')
+    player.setHand(dealHands(dealFromSeed(8))[0])
+    state = player.state([])
+    candidates = maskToIds(player.mask)
+    start = time.perf_counter()
+    totals, samples = evaluateCards(state, candidates, 0.05, seed=0)
+    elapsed = time.perf_counter() - start
+    assert samples >= 1 and totals.shape == (13,)
+    # One sample costs one rollout per candidate, well under the budget
+    assert elapsed < 0.05 + 0.5
+    assert evaluateCards(state, candidates, 0, seed=0)[1] == 1
+    # Every sample scores the 13 tricks of each candidate between both sides
+    assert ((totals >= 0) & (totals <= 13 * samples)).all()
+
+
+def test_worker_pool_matches_in_process_search():
+    hand = dealHands(dealFromSeed(9))[0]
+    results = []
+    for workers in (0, 1):
+        player = MonteCarloPlayer('p', budget_ms=10000, workers=workers, seed=4,
+                                  max_samples=10)
+        player.setHand(hand)
+        try:
+            results.append(player.evaluate(player.state([]), maskToIds(player.mask)))
+        finally:
+            player.close()
+    assert results[0][1] == results[1][1] == 10
+    np.testing.assert_array_equal(results[0][0], results[1][0])
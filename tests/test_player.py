@@ -0,0 +1,27 @@
+"""Tests of the hand view of Player."""
+
+import random
+
+import pytest
+
+from Cards.Bitboard import cardsToMask
+from Cards.Card import CARDS
+from Player import Player
+
+
+def test_hand_is_sorted_tuple():
+    cards = random.Random(0).sample(CARDS, 13)
+    p = Player('p')
+    p.setHand(cards)
+    assert p.hand == tuple(sorted(cards, reverse=True))
+    with pytest.raises(AttributeError):
+        p.hand.append(cards[0])
+
+
+def test_hand_assignment_sets_mask():
+    cards = random.Random(1).sample(CARDS, 13)
+    p = Player('p')
+    p.hand = cards
+    assert p.mask == cardsToMask(cards)
+    p.hand = []
+    assert p.mask == 0 and p.hand == ()
@@ -0,0 +1,39 @@
+"""Tests of the persistence of Tarneeb.ReplayBuffer."""
+
+import numpy as np
+
+from Tarneeb.ReplayBuffer import ReplayBuffer
+
+
+def test_reopen_after_crash_keeps_flushed_samples(tmp_path):
+    buffer = ReplayBuffer(str(tmp_path), 3, 1, capacity=100, flush_every=10)
+    for i in range(25):
+        buffer.append(np.full(3, i), i)
+    # No flush or close: reopening sees the last automatic flush
+    reopened = ReplayBuffer(str(tmp_path), 3, 1)
+    assert (reopened.size, reopened.head) == (20, 20)
+    assert (reopened.Y[:20, 0] == np.arange(20)).all()
+    assert (reopened.X[:20] == np.arange(20)[:, None]).all()
+
+
+def test_extend_wraps_and_flushes(tmp_path):
+    buffer = ReplayBuffer(str(tmp_path), 2, 1, capacity=8, flush_every=4)
+    buffer.extend(np.arange(10).reshape(5, 2), np.arange(5))
+    buffer.extend(np.arange(10, 24).reshape(7, 2), np.arange(5, 12))
+    reopened = ReplayBuffer(str(tmp_path), 2, 1)
+    assert (reopened.size, reopened.head) == (8, 4)
+    assert list(reopened.Y[:, 0]) == [8, 9, 10, 11, 4, 5, 6, 7]
+
+
+def test_sample_blocks_returns_whole_blocks(tmp_path):
+    # 4-sample blocks in a capacity that is not a multiple of 4
+    buffer = ReplayBuffer(str(tmp_path), 1, 1, capacity=10)
+    for b in range(5):
+        rows = np.arange(4 * b, 4 * b + 4)
+        buffer.extend(rows[:, None], rows)
+    X, Y = buffer.sampleBlocks(50, 4, rng=np.random.default_rng(0))
+    assert X.shape == (50, 4, 1) and Y.shape == (50, 4, 1)
+    starts = set(Y[:, 0, 0].tolist())
+    # Only the two newest blocks are complete
+    assert starts == {12, 16}
+    assert (Y[:, :, 0] == Y[:, :1, 0] + np.arange(4)).all()
@@ -0,0 +1,45 @@
+"""Tests of the LSTM windows of Tarneeb.Sequences."""
+
+import numpy as np
+
+from Tarneeb.Sequences import padRows, roundWindows, stepsPerEpoch, windowBatches
+
+
+def copiedWindows(rows, timesteps):
+    """Windows built by copying, as the training loop used to."""
+    padded = np.concatenate((np.zeros((timesteps - 1, rows.shape[1])), rows))
+    return np.stack([padded[i:i + timesteps] for i in range(len(rows))])
+
+
+def test_round_windows_match_copies():
+    rows = np.arange(6 * 3, dtype=np.float32).reshape(6, 3) + 1
+    X = padRows(rows, timesteps=4)
+    assert X.shape == (9, 3) and X.dtype == np.float32
+    windows = roundWindows(X, timesteps=4)
+    assert not windows.flags.writeable
+    np.testing.assert_array_equal(windows, copiedWindows(rows, 4))
+
+
+def test_stacked_rounds_keep_their_batch_axis():
+    rows = np.random.default_rng(0).random((3, 5, 2))
+    windows = roundWindows(padRows(rows, timesteps=3), timesteps=3)
+    assert windows.shape == (3, 5, 3, 2)
+    for r in range(3):
+        np.testing.assert_array_equal(windows[r], copiedWindows(rows[r], 3))
+
+
+def test_window_batches_cover_every_window_once_per_epoch():
+    rows = np.random.default_rng(1).random((3, 5, 2))
+    Y = np.arange(15).reshape(3, 5, 1)
+    X = padRows(rows, timesteps=3)
+    steps = stepsPerEpoch(X, batch_size=4, timesteps=3)
+    assert steps == 4
+    gen = windowBatches(X, Y, batch_size=4, rng=np.random.default_rng(2), timesteps=3)
+    seen = []
+    for _ in range(steps):
+        xb, yb = next(gen)
+        for x, y in zip(xb, yb[:, 0]):
+            r, i = divmod(int(y), 5)
+            np.testing.assert_array_equal(x, copiedWindows(rows[r], 3)[i])
+            seen.append(int(y))
+    assert sorted(seen) == list(range(15))
@@ -0,0 +1,47 @@
+"""Tests of the playing loss of Tarneeb.WinTable."""
+
+import numpy as np
+
+from Cards.Card import CARDS, CardType
+from Tarneeb.BatchEngine import play_rounds, randomPolicy
+from Tarneeb.Turn import Turn
+from Tarneeb.WinTable import defaultWinTable, playingLoss
+
+# The former Turn.playing_loss_function probabilities, by card value
+CARD_WIN_PROB = {2: 0.012, 3: 0.013, 4: 0.019, 5: 0.028, 6: 0.044, 7: 0.068, 8: 0.101,
+                 9: 0.148, 10: 0.206, 11: 0.28, 12: 0.38, 13: 0.5, 14: 0.65}
+TARNEEB_WIN_PROB = {2: 0.175, 3: 0.185, 4: 0.205, 5: 0.223, 6: 0.257, 7: 0.3, 8: 0.34,
+                    9: 0.41, 10: 0.47, 11: 0.58, 12: 0.7, 13: 0.85, 14: 1.00}
+
+
+def formerLoss(turn):
+    """Turn.playing_loss_function before the win table."""
+    loss = {}
+    for c in turn.played_cards:
+        if c.type == turn.tarneeb:
+            loss[c] = TARNEEB_WIN_PROB[c.value.value]
+        else:
+            loss[c] = CARD_WIN_PROB[c.value.value]
+    loss[turn.winCard] = (4 * loss[turn.winCard] - sum(loss.values())) * 0.01
+    return loss
+
+
+def test_default_table_matches_the_former_formula():
+    rng = np.random.default_rng(0)
+    batch = play_rounds(20, randomPolicy(rng), rng=rng)
+    types = {t.id: t for t in CardType}
+    turns = []
+    for r in range(20):
+        leader = 0
+        for j in range(13):
+            cards = [CARDS[int(c)] for c in batch.plays[r, j]]
+            turns.append(Turn(cards, types[int(batch.tarneeb[r])], serial=j + 1,
+                              starting_player_id=leader))
+            leader = turns[-1].winnerId
+    plays = batch.plays.reshape(20, 13, 4)
+    wins = np.array([t.winCardId for t in turns]).reshape(20, 13)
+    losses = playingLoss(plays, batch.tarneeb, wins, table=defaultWinTable())
+    for turn, loss in zip(turns, losses.reshape(-1, 4)):
+        former = formerLoss(turn)
+        np.testing.assert_allclose(loss, [former[c] for c in turn.played_cards],
+                                   rtol=0, atol=1e-12)